@@ -0,0 +1,54 @@
+"""Benchmark del inicio de sesión: verificación de la contraseña (KDF), emisión y validación del token.
+
+Uso (desde la raíz del repositorio):
+    python dashboard_estudiantes/benchmarks/bench_auth.py
+    python dashboard_estudiantes/benchmarks/bench_auth.py --repeticiones 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import almacen_usuarios  # noqa: E402
+from almacen_usuarios import AlmacenUsuarios  # noqa: E402
+
+# Tiempo de ida y vuelta tolerado además del costo de la KDF
+OBJETIVO_MS = 100
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    almacen = AlmacenUsuarios(':memory:', secreto='benchmark')
+    almacen.guardar_usuario('profesor', 'clave-de-prueba', 'Profesor de prueba')
+    token = almacen.emitir_token('profesor')
+
+    t_kdf = medir(lambda: almacen_usuarios.hash_password('clave-de-prueba'), args.repeticiones)
+    t_login = medir(lambda: almacen.emitir_token(almacen.autenticar('profesor', 'clave-de-prueba')[0]['usuario']),
+                    args.repeticiones)
+    t_token = medir(lambda: almacen.validar_token(token), args.repeticiones * 100)
+
+    print(f"KDF ({almacen_usuarios.ITERACIONES:,} iteraciones): {t_kdf:8.2f} ms")
+    print(f"Login (verificación + token):     {t_login:8.2f} ms")
+    print(f"Validación de token (rerun):      {t_token:8.3f} ms")
+    sobrecosto = t_login - t_kdf
+    estado = "✅" if sobrecosto < OBJETIVO_MS else "❌"
+    print(f"{estado} Ida y vuelta sin la KDF: {sobrecosto:.2f} ms (objetivo < {OBJETIVO_MS} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark del motor columnar de métricas frente al cálculo anterior por filas.
+
+Uso (desde la raíz del repositorio):
+    python dashboard_estudiantes/benchmarks/bench_metricas.py
+    python dashboard_estudiantes/benchmarks/bench_metricas.py --filas 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import datos_sinteticos  # noqa: E402
+import metricas  # noqa: E402
+
+CURSOS = datos_sinteticos.CURSOS_EJEMPLO
+COLUMNAS_DERIVADAS = [
+    'Promedio', 'Asistencia (%)', 'Promedio_Anterior', 'Progreso Académico (%)', 'Desempeño academico'
+]
+
+
+def calcular_metricas_por_filas(df, cursos):
+    """Implementación anterior de calcular_metricas (apply por fila), usada como referencia"""
+    for curso in cursos:
+        df[curso] = pd.to_numeric(df[curso], errors='coerce').fillna(0)
+
+    df['Promedio'] = df[cursos].mean(axis=1).round(2)
+    df['Asistencia (%)'] = (df['Clases Asistidas'] / df['Clases Totales'] * 100).round(2)
+
+    df = df.sort_values(['ID_Estudiante', 'Semana'])
+    df['Promedio_Anterior'] = df.groupby('ID_Estudiante')['Promedio'].shift(1)
+
+    def calcular_progreso(row):
+        if pd.isna(row['Promedio_Anterior']) or row['Promedio_Anterior'] == 0:
+            return 0
+        return ((row['Promedio'] - row['Promedio_Anterior']) / 20 * 100)
+
+    df['Progreso Académico (%)'] = df.apply(calcular_progreso, axis=1).round(2)
+
+    condiciones = [df['Promedio'] >= 16, df['Promedio'] >= 14, df['Promedio'] >= 11, df['Promedio'] < 11]
+    opciones = ['Excelente', 'Bueno', 'Regular', 'En Riesgo']
+    df['Desempeño academico'] = np.select(condiciones, opciones, default='Regular')
+    return df
+
+
+def generar_filas(n_filas, semanas=36, seed=42):
+    """Genera un DataFrame sintético con ~n_filas estudiante-semana, sin métricas calculadas"""
+    df = datos_sinteticos.generar_datos(n_estudiantes=max(1, n_filas // semanas), n_semanas=semanas, seed=seed)
+    return df.drop(columns=COLUMNAS_DERIVADAS)
+
+
+def medir(funcion, df):
+    inicio = time.perf_counter()
+    resultado = funcion(df.copy(), CURSOS)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'Filas':>10} {'Por filas (s)':>14} {'Columnar (s)':>13} {'Aceleración':>12}")
+    for n_filas in args.filas:
+        df = generar_filas(n_filas)
+        t_filas, esperado = medir(calcular_metricas_por_filas, df)
+        t_columnar, obtenido = medir(metricas.calcular_metricas, df)
+
+        columnas = ['Promedio', 'Asistencia (%)', 'Progreso Académico (%)', 'Desempeño academico']
+        pd.testing.assert_frame_equal(
+            esperado[columnas].reset_index(drop=True), obtenido[columnas].reset_index(drop=True),
+            check_dtype=False
+        )
+        print(f"{n_filas:>10,} {t_filas:>14.3f} {t_columnar:>13.3f} {t_filas / t_columnar:>11.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Suite de benchmarks del pipeline de datos y modelos, con línea base en JSON.
+
+Mide tiempo y pico de memoria de cada etapa con datos sintéticos a varias escalas y
+las compara con la línea base guardada: termina con código 1 si alguna etapa empeora
+más que el umbral.
+
+Uso (desde la raíz del repositorio):
+    python dashboard_estudiantes/benchmarks/bench_pipeline.py --guardar      # registrar la línea base
+    python dashboard_estudiantes/benchmarks/bench_pipeline.py                # comparar con la línea base
+    python dashboard_estudiantes/benchmarks/bench_pipeline.py --filas 1000 100000 --umbral 0.5
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import esquema  # noqa: E402
+import ingesta  # noqa: E402
+import metricas  # noqa: E402
+from bench_metricas import CURSOS, generar_filas  # noqa: E402
+from modelos import PredictorDesempeno, elegir_motor_svm  # noqa: E402
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base_pipeline.json')
+
+# Diferencia mínima para considerar regresión (evita falsas alarmas por ruido en etapas muy cortas)
+MINIMO_SEGUNDOS = 0.05
+MINIMO_MB = 1.0
+
+# Llamadas a predecir_riesgo_manual por medición
+N_PREDICCIONES = 100
+
+
+def medir(ejecutar, argumentos):
+    """Ejecuta una etapa dos veces: una cronometrada y otra con tracemalloc para el pico de memoria"""
+    inicio = time.perf_counter()
+    resultado = ejecutar(*argumentos())
+    segundos = time.perf_counter() - inicio
+
+    argumentos_memoria = argumentos()
+    tracemalloc.start()
+    ejecutar(*argumentos_memoria)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, {'segundos': round(segundos, 4), 'pico_mb': round(pico / 2**20, 2)}
+
+
+def sin_cache(df):
+    """Argumentos de una etapa que infiere el esquema, sin reutilizar esquemas de mediciones previas"""
+    esquema.limpiar_cache()
+    return (df,)
+
+
+def csv_en_memoria(datos):
+    """Argumentos de una etapa que lee un CSV: archivo en memoria y caché de esquemas vacía"""
+    esquema.limpiar_cache()
+    archivo = io.BytesIO(datos)
+    archivo.name = 'bench.csv'
+    return (archivo,)
+
+
+def predecir_varios(predictor, notas):
+    for _ in range(N_PREDICCIONES):
+        predictor.predecir_riesgo_manual(notas, 90.0, 0.0)
+
+
+def ejecutar_escala(n_filas, max_filas_modelo, max_filas_excel):
+    """Mide todas las etapas para un tamaño de datos"""
+    crudo = generar_filas(n_filas)
+    procesado = metricas.calcular_metricas(crudo.copy(), CURSOS)
+    muestra_modelo = procesado.head(max_filas_modelo)
+    datos_csv = crudo.to_csv(index=False).encode()
+
+    etapas = [
+        ('leer_csv_texto', lambda archivo: ingesta.procesar_dataframe(ingesta.leer_archivo(archivo)),
+         lambda: csv_en_memoria(datos_csv)),
+        ('leer_csv_por_bloques', ingesta.leer_csv_por_bloques, lambda: csv_en_memoria(datos_csv)),
+        ('formatear_fechas_df', ingesta.formatear_fechas_df, lambda: (crudo.copy(),)),
+        ('actualizar_listas_desde_dataframe',
+         lambda df: (ingesta.detectar_estudiantes(df), ingesta.detectar_cursos(df)), lambda: sin_cache(crudo)),
+        ('calcular_metricas', metricas.calcular_metricas, lambda: (crudo.copy(), CURSOS)),
+        ('preparar_datos', lambda df: PredictorDesempeno().preparar_datos(df), lambda: sin_cache(procesado.copy())),
+    ]
+    resultados = {}
+    for nombre, ejecutar, argumentos in etapas:
+        _, resultados[nombre] = medir(ejecutar, argumentos)
+
+    def entrenar(df):
+        predictor = PredictorDesempeno()
+        predictor.entrenar_modelos(df, motor_svm=elegir_motor_svm(len(df)))
+        return predictor
+
+    predictor, resultados['entrenar_modelos'] = medir(entrenar, lambda: (muestra_modelo.copy(),))
+    notas = [12.0] * len(CURSOS)
+    _, resultados['predecir_riesgo_manual'] = medir(predecir_varios, lambda: (predictor, notas))
+    _, resultados['exportar_excel'] = medir(ingesta.exportar_excel, lambda: (procesado.head(max_filas_excel),))
+    _, resultados['exportar_csv'] = medir(ingesta.exportar_csv, lambda: (procesado,))
+    _, resultados['exportar_parquet'] = medir(ingesta.exportar_parquet, lambda: (procesado,))
+    return resultados
+
+
+def comparar(actual, base, umbral):
+    """Lista de regresiones (escala, etapa, métrica, base, actual) que superan el umbral"""
+    regresiones = []
+    for escala, etapas in actual.items():
+        for etapa, medidas in etapas.items():
+            referencia = base.get(escala, {}).get(etapa)
+            if referencia is None:
+                continue
+            for metrica, minimo in [('segundos', MINIMO_SEGUNDOS), ('pico_mb', MINIMO_MB)]:
+                antes, ahora = referencia[metrica], medidas[metrica]
+                if ahora > antes * (1 + umbral) and ahora - antes > minimo:
+                    regresiones.append((escala, etapa, metrica, antes, ahora))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--linea-base', default=LINEA_BASE)
+    parser.add_argument('--guardar', action='store_true', help="Guarda los resultados como nueva línea base")
+    parser.add_argument('--umbral', type=float, default=0.25, help="Empeoramiento tolerado (0.25 = 25%%)")
+    parser.add_argument('--max-filas-modelo', type=int, default=100_000,
+                        help="Filas usadas para entrenar (KNN y SVM no escalan a millones en un benchmark)")
+    parser.add_argument('--max-filas-excel', type=int, default=100_000)
+    args = parser.parse_args()
+
+    actual = {}
+    print(f"{'Filas':>10} {'Etapa':<36} {'Tiempo (s)':>11} {'Pico (MB)':>10}")
+    for n_filas in args.filas:
+        escala = str(n_filas)
+        actual[escala] = ejecutar_escala(n_filas, args.max_filas_modelo, args.max_filas_excel)
+        for etapa, medidas in actual[escala].items():
+            print(f"{n_filas:>10,} {etapa:<36} {medidas['segundos']:>11.3f} {medidas['pico_mb']:>10.1f}")
+
+    if args.guardar:
+        with open(args.linea_base, 'w', encoding='utf-8') as archivo:
+            json.dump({
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'resultados': actual,
+            }, archivo, indent=2)
+        print(f"\n✅ Línea base guardada en {args.linea_base}")
+        return
+
+    if not os.path.exists(args.linea_base):
+        print(f"\nℹ️ No hay línea base en {args.linea_base}; ejecuta con --guardar para registrarla")
+        return
+
+    with open(args.linea_base, encoding='utf-8') as archivo:
+        base = json.load(archivo)['resultados']
+    regresiones = comparar(actual, base, args.umbral)
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones (umbral {args.umbral:.0%}):")
+        for escala, etapa, metrica, antes, ahora in regresiones:
+            print(f"   {int(escala):>10,} {etapa:<36} {metrica}: {antes} → {ahora}")
+        sys.exit(1)
+    print(f"\n✅ Sin regresiones respecto a la línea base (umbral {args.umbral:.0%})")
+
+
+if __name__ == '__main__':
+    main()
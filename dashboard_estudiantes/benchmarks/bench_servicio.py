@@ -0,0 +1,146 @@
+"""Benchmark de rendimiento del servicio HTTP de predicción con un cliente local.
+
+Entrena un modelo con datos sintéticos en un registro temporal, levanta el servicio en un
+proceso aparte y mide peticiones por segundo: individuales sin agrupar, individuales
+agrupadas en lotes y peticiones /predict/lote.
+
+Uso (desde la raíz del repositorio):
+    python dashboard_estudiantes/benchmarks/bench_servicio.py
+    python dashboard_estudiantes/benchmarks/bench_servicio.py --peticiones 5000 --concurrencia 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+RUTA_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, RUTA_SRC)
+
+import datos_sinteticos  # noqa: E402
+from modelos import PredictorDesempeno  # noqa: E402
+from registro_modelos import RegistroModelos  # noqa: E402
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def preparar_registro(directorio):
+    """Entrena y registra un modelo con datos sintéticos"""
+    df = datos_sinteticos.generar_datos(seed=42)
+    predictor = PredictorDesempeno()
+    predictor.entrenar_modelos(df)
+    RegistroModelos(directorio).guardar(predictor, 'benchmark')
+    return [c for c in predictor.caracteristicas if c not in ['Asistencia (%)', 'Progreso Académico (%)']]
+
+
+def generar_estudiantes(n, n_cursos, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"notas": rng.uniform(5, 20, n_cursos).round(1).tolist(),
+         "asistencia": round(float(rng.uniform(60, 100)), 1),
+         "progreso": round(float(rng.uniform(-15, 15)), 1)}
+        for _ in range(n)
+    ]
+
+
+def levantar_servicio(directorio, puerto, espera_ms, max_lote):
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(RUTA_SRC, 'servicio_prediccion.py'), '--registro', directorio,
+         '--puerto', str(puerto), '--espera-ms', str(espera_ms), '--max-lote', str(max_lote)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    proceso.stdout.readline()  # espera el mensaje de inicio (modelo cargado)
+    return proceso
+
+
+async def medir_individuales(url, estudiantes, concurrencia):
+    cliente = AsyncHTTPClient(max_clients=concurrencia)
+    latencias = []
+    cola = list(reversed(estudiantes))
+
+    async def trabajador():
+        while cola:
+            cuerpo = json.dumps(cola.pop())
+            inicio = time.perf_counter()
+            respuesta = await cliente.fetch(url + '/predict', method='POST', body=cuerpo)
+            latencias.append(time.perf_counter() - inicio)
+            json.loads(respuesta.body)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    total = time.perf_counter() - inicio
+    return len(estudiantes) / total, np.percentile(latencias, 50) * 1000, np.percentile(latencias, 95) * 1000
+
+
+async def medir_lotes(url, estudiantes, tamano):
+    cliente = AsyncHTTPClient()
+    inicio = time.perf_counter()
+    for i in range(0, len(estudiantes), tamano):
+        respuesta = await cliente.fetch(url + '/predict/lote', method='POST',
+                                        body=json.dumps({"estudiantes": estudiantes[i:i + tamano]}))
+        json.loads(respuesta.body)
+    return len(estudiantes) / (time.perf_counter() - inicio)
+
+
+async def verificar(url, estudiantes):
+    """El servicio devuelve lo mismo que predecir_riesgo_manual y rechaza entradas inválidas"""
+    cliente = AsyncHTTPClient()
+    respuesta = json.loads((await cliente.fetch(url + '/predict', method='POST', body=json.dumps(estudiantes[0]))).body)
+    try:
+        await cliente.fetch(url + '/predict', method='POST', body='{"notas": "x"}')
+        invalida = 200
+    except HTTPClientError as e:
+        invalida = e.code
+    return respuesta, invalida
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--concurrencia', type=int, default=32)
+    parser.add_argument('--tamano-lote', type=int, default=200)
+    parser.add_argument('--espera-ms', type=float, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cursos = preparar_registro(directorio)
+        estudiantes = generar_estudiantes(args.peticiones, len(cursos))
+
+        predictor, _ = RegistroModelos(directorio).cargar_compatible()
+        esperado = predictor.predecir_riesgo_manual(
+            estudiantes[0]['notas'], estudiantes[0]['asistencia'], estudiantes[0]['progreso']
+        )
+
+        escenarios = [("Individuales sin agrupar", 0, 1), ("Individuales agrupadas", args.espera_ms, 256)]
+        print(f"{'Escenario':<28} {'Pet/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+        for nombre, espera_ms, max_lote in escenarios:
+            puerto = puerto_libre()
+            proceso = levantar_servicio(directorio, puerto, espera_ms, max_lote)
+            try:
+                url = f"http://127.0.0.1:{puerto}"
+                respuesta, invalida = asyncio.run(verificar(url, estudiantes))
+                assert respuesta == esperado, "La respuesta del servicio difiere de predecir_riesgo_manual"
+                assert invalida == 400, f"Entrada inválida respondió {invalida}"
+                por_segundo, p50, p95 = asyncio.run(medir_individuales(url, estudiantes, args.concurrencia))
+                print(f"{nombre:<28} {por_segundo:>9.0f} {p50:>9.1f} {p95:>9.1f}")
+                if max_lote > 1:
+                    por_segundo = asyncio.run(medir_lotes(url, estudiantes, args.tamano_lote))
+                    print(f"{f'/predict/lote ({args.tamano_lote} por petición)':<28} {por_segundo:>9.0f}")
+            finally:
+                proceso.terminate()
+                proceso.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Benchmark de los motores SVM (kernel frente a lineal calibrado): tiempo de entrenamiento y precisión.
+
+Uso (desde la raíz del repositorio):
+    python dashboard_estudiantes/benchmarks/bench_svm.py
+    python dashboard_estudiantes/benchmarks/bench_svm.py --filas 5000 50000 --motores lineal
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import datos_sinteticos  # noqa: E402
+from modelos import MOTORES_SVM, PredictorDesempeno  # noqa: E402
+
+
+def medir(motor, df):
+    """Entrena un predictor con el motor dado y devuelve (tiempo SVM, precisión SVM)"""
+    predictor = PredictorDesempeno(motor_svm=motor)
+    resultados = predictor.entrenar_modelos(df.copy())
+    return resultados['svm_tiempo'], resultados['svm_accuracy']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000, 10_000, 50_000])
+    parser.add_argument('--motores', nargs='+', choices=MOTORES_SVM, default=MOTORES_SVM)
+    args = parser.parse_args()
+
+    print(f"{'Filas':>10} {'Motor':>8} {'Tiempo SVM (s)':>15} {'Precisión':>10}")
+    for n_filas in args.filas:
+        df = datos_sinteticos.generar_datos(n_estudiantes=max(1, n_filas // 36), n_semanas=36)
+        for motor in args.motores:
+            inicio = time.perf_counter()
+            tiempo, precision = medir(motor, df)
+            print(f"{len(df):>10,} {motor:>8} {tiempo:>15.3f} {precision:>10.2%}"
+                  f"  (total {time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Registro durable de calificaciones ingresadas (SQLite en modo WAL).
+
+Cada dataset (archivo o sección) tiene su propio registro dentro de la base: los IDs suelen
+empezar en 1 en cada archivo, así que la clave es (dataset, estudiante, semana).
+
+Importar registros descargados antes desde la app (desde la raíz del repositorio):
+    python dashboard_estudiantes/src/almacen_calificaciones.py importar calificaciones_estudiantes.xlsx --dataset 6A.xlsx
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+import ingesta
+
+RUTA_CALIFICACIONES = os.environ.get(
+    'CALIFICACIONES_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'calificaciones.db')
+)
+
+# Máximo de IDs que se filtran dentro de la consulta
+MAX_PARAMETROS = 900
+
+# Columnas fijas del registro (columna del DataFrame -> columna de la tabla); las notas van en JSON
+COLUMNAS = {
+    'ID_Estudiante': 'id_estudiante',
+    'Alumno': 'alumno',
+    'Semana': 'semana',
+    'Fecha Inicio': 'fecha_inicio',
+    'Fecha Fin': 'fecha_fin',
+    'Clases Asistidas': 'clases_asistidas',
+    'Clases Totales': 'clases_totales',
+    'Promedio': 'promedio',
+    'Asistencia (%)': 'asistencia',
+    'Progreso Académico (%)': 'progreso',
+    'Desempeño academico': 'desempeno',
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS calificaciones (
+    dataset TEXT NOT NULL DEFAULT '',
+    id_estudiante TEXT NOT NULL,
+    semana INTEGER NOT NULL,
+    alumno TEXT,
+    fecha_inicio TEXT,
+    fecha_fin TEXT,
+    clases_asistidas INTEGER,
+    clases_totales INTEGER,
+    promedio REAL,
+    asistencia REAL,
+    progreso REAL,
+    desempeno TEXT,
+    notas TEXT NOT NULL,
+    actualizado TEXT NOT NULL,
+    PRIMARY KEY (dataset, id_estudiante, semana)
+);
+CREATE TABLE IF NOT EXISTS versiones (
+    dataset TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+# Registros de antes de separar por dataset: quedan en el dataset '' (se pueden reimportar con --dataset)
+MIGRACION_DATASET = """
+ALTER TABLE calificaciones RENAME TO calificaciones_anterior;
+{esquema}
+INSERT INTO calificaciones ({columnas}) SELECT {columnas} FROM calificaciones_anterior;
+DROP TABLE calificaciones_anterior;
+DROP TABLE IF EXISTS version;
+"""
+
+_COLUMNAS_TABLA = list(COLUMNAS.values()) + ['notas', 'actualizado']
+UPSERT = (
+    f"INSERT INTO calificaciones (dataset, {', '.join(_COLUMNAS_TABLA)}) "
+    f"VALUES (?, {', '.join('?' for _ in _COLUMNAS_TABLA)}) "
+    "ON CONFLICT (dataset, id_estudiante, semana) DO UPDATE SET "
+    + ', '.join(f"{col} = excluded.{col}" for col in _COLUMNAS_TABLA if col not in ('id_estudiante', 'semana'))
+)
+
+
+def _valor(valor):
+    """Convierte escalares de numpy/pandas a tipos que acepta sqlite3 (NaN como NULL)"""
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return None
+    if hasattr(valor, 'item'):
+        valor = valor.item()
+        return None if isinstance(valor, float) and valor != valor else valor
+    return valor
+
+
+class AlmacenCalificaciones:
+    """Registro de calificaciones ingresadas en SQLite (modo WAL), una fila por (dataset, estudiante, semana)"""
+
+    def __init__(self, ruta=RUTA_CALIFICACIONES):
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        if ruta != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        # Una conexión compartida por las sesiones, protegida por el lock
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.execute('PRAGMA journal_mode=WAL')
+        self.conexion.execute('PRAGMA synchronous=NORMAL')
+        columnas = [fila[1] for fila in self.conexion.execute('PRAGMA table_info(calificaciones)')]
+        if columnas and 'dataset' not in columnas:
+            self.conexion.executescript(
+                'BEGIN;' + MIGRACION_DATASET.format(esquema=ESQUEMA, columnas=', '.join(_COLUMNAS_TABLA)) + 'COMMIT;'
+            )
+        self.conexion.executescript(ESQUEMA)
+
+    def _fila(self, registro, cursos, actualizado, dataset):
+        fila = [_valor(registro.get(col)) for col in COLUMNAS]
+        fila[0] = str(fila[0])  # el ID se guarda como texto (numérico o alfanumérico)
+        notas = {curso: _valor(registro[curso]) for curso in cursos if curso in registro}
+        return [dataset] + fila + [json.dumps(notas, ensure_ascii=False), actualizado]
+
+    def guardar_lote(self, registros, cursos, dataset=''):
+        """Inserta o reemplaza varios registros del dataset en una sola transacción"""
+        actualizado = datetime.now().isoformat(timespec='seconds')
+        filas = [self._fila(registro, cursos, actualizado, dataset) for registro in registros]
+        with self.lock, self.conexion:
+            self.conexion.executemany(UPSERT, filas)
+            self.conexion.execute(
+                'INSERT INTO versiones (dataset, valor) VALUES (?, 1) '
+                'ON CONFLICT (dataset) DO UPDATE SET valor = valor + 1', (dataset,)
+            )
+        return len(filas)
+
+    def guardar(self, registro, cursos, dataset=''):
+        """Inserta o reemplaza el registro de un estudiante del dataset en una semana"""
+        return self.guardar_lote([registro], cursos, dataset)
+
+    def version(self, dataset=''):
+        """Contador que aumenta con cada guardado en el dataset (sirve como clave de caché de descargas)"""
+        with self.lock:
+            fila = self.conexion.execute('SELECT valor FROM versiones WHERE dataset = ?', (dataset,)).fetchone()
+        return fila[0] if fila else 0
+
+    def resumen(self, dataset=''):
+        """Totales del registro del dataset calculados en SQLite, sin cargar las filas"""
+        with self.lock:
+            registros, estudiantes, semanas, promedio = self.conexion.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT alumno), COUNT(DISTINCT semana), AVG(promedio) '
+                'FROM calificaciones WHERE dataset = ?', (dataset,)
+            ).fetchone()
+        return {'registros': registros, 'estudiantes': estudiantes, 'semanas': semanas, 'promedio': promedio}
+
+    def cargar(self, ids=None, dataset=''):
+        """Registro del dataset (u opcionalmente de algunos IDs) como DataFrame con una columna por curso"""
+        consulta = f"SELECT {', '.join(_COLUMNAS_TABLA)} FROM calificaciones WHERE dataset = ?"
+        parametros = [dataset]
+        if ids is not None:
+            ids = [str(id_estudiante) for id_estudiante in ids]
+            # Con muchos IDs se lee todo y se filtra después (SQLite limita los parámetros por consulta)
+            if len(ids) <= MAX_PARAMETROS:
+                consulta += f" AND id_estudiante IN ({', '.join('?' for _ in ids)})"
+                parametros += ids
+        with self.lock:
+            filas = self.conexion.execute(consulta + ' ORDER BY semana, alumno', parametros).fetchall()
+
+        tabla = pd.DataFrame(filas, columns=_COLUMNAS_TABLA)
+        if ids is not None and len(parametros) == 1:
+            tabla = tabla[tabla['id_estudiante'].isin(ids)].reset_index(drop=True)
+        notas = pd.DataFrame([json.loads(texto) for texto in tabla['notas']], index=tabla.index)
+        df = tabla[list(COLUMNAS.values())].rename(columns={v: k for k, v in COLUMNAS.items()})
+
+        # Mismo orden de columnas que el formulario: datos, notas, asistencia y métricas
+        fijas = ['ID_Estudiante', 'Alumno', 'Semana', 'Fecha Inicio', 'Fecha Fin']
+        return pd.concat([df[fijas], notas, df.drop(columns=fijas)], axis=1)
+
+    def importar(self, df, cursos, dataset=''):
+        """Guarda un DataFrame de calificaciones (p. ej. un registro anterior) del dataset en una transacción"""
+        df = df.copy()
+        for curso in cursos:
+            df[curso] = pd.to_numeric(df[curso], errors='coerce')
+        return self.guardar_lote(df.to_dict('records'), cursos, dataset)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de calificaciones en SQLite")
+    parser.add_argument('comando', choices=['importar', 'resumen'])
+    parser.add_argument('archivos', nargs='*', help="Archivos CSV/Excel descargados desde el Ingreso de Calificaciones")
+    parser.add_argument('--dataset', default='',
+                        help="Dataset al que pertenecen: nombre del archivo cargado en la app (p. ej. 6A.xlsx)")
+    parser.add_argument('--destino', default=RUTA_CALIFICACIONES)
+    args = parser.parse_args()
+
+    almacen = AlmacenCalificaciones(args.destino)
+    if args.comando == 'importar':
+        for ruta in args.archivos:
+            df = ingesta.leer_archivo(ruta)
+            filas = almacen.importar(df, ingesta.detectar_cursos(df), args.dataset)
+            print(f"✅ {ruta}: {filas} registros guardados en {args.destino} ({args.dataset or 'sin dataset'})")
+    print(almacen.resumen(args.dataset))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Almacén Parquet particionado por año, sección y semana.
+
+Importar archivos existentes (desde la raíz del repositorio):
+    python dashboard_estudiantes/src/almacen_parquet.py importar datos.csv seccion_b.xlsx
+    python dashboard_estudiantes/src/almacen_parquet.py importar datos.csv --seccion A --destino otra/carpeta
+"""
+import argparse
+import os
+import uuid
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+import ingesta
+
+DIRECTORIO_PARQUET = os.environ.get(
+    'DATASET_PARQUET_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'processed', 'estudiantes')
+)
+
+# Columnas de partición (en el orden de las carpetas)
+PARTICIONES = ['Anio', 'Seccion', 'Semana']
+ESQUEMA_PARTICIONES = pa.schema([('Anio', pa.int32()), ('Seccion', pa.string()), ('Semana', pa.int32())])
+
+
+def existe_dataset(directorio=DIRECTORIO_PARQUET):
+    """Indica si el directorio contiene un dataset Parquet"""
+    return os.path.isdir(directorio) and any(
+        nombre.endswith('.parquet') for _, _, archivos in os.walk(directorio) for nombre in archivos
+    )
+
+
+def _abrir_dataset(directorio):
+    return ds.dataset(directorio, format='parquet', partitioning=ds.partitioning(ESQUEMA_PARTICIONES, flavor='hive'))
+
+
+def agregar_columnas_particion(df, seccion, anio=None):
+    """Agrega Anio y Seccion al DataFrame a partir de las fechas o de los valores dados"""
+    if anio is None and 'Fecha Inicio' in df.columns:
+        anios = pd.to_datetime(df['Fecha Inicio'], format='%d/%m/%Y', errors='coerce').dt.year
+        df['Anio'] = anios.fillna(anios.mode().iloc[0] if anios.notna().any() else datetime.now().year).astype('int32')
+    else:
+        df['Anio'] = int(anio or datetime.now().year)
+    df['Seccion'] = str(seccion)
+    df['Semana'] = df['Semana'].astype('int32')
+    return df
+
+
+def escribir_dataset(df, seccion, directorio=DIRECTORIO_PARQUET, anio=None):
+    """Escribe un DataFrame procesado reemplazando sus particiones año/sección/semana"""
+    df = agregar_columnas_particion(df.copy(), seccion, anio)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        tabla,
+        directorio,
+        format='parquet',
+        partitioning=ds.partitioning(ESQUEMA_PARTICIONES, flavor='hive'),
+        basename_template=f"parte-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+        existing_data_behavior='delete_matching'
+    )
+    return len(df)
+
+
+def listar_particiones(directorio=DIRECTORIO_PARQUET):
+    """Lista las particiones disponibles (sin leer datos) como DataFrame Anio/Seccion/Semana"""
+    if not existe_dataset(directorio):
+        return pd.DataFrame(columns=PARTICIONES)
+
+    filas = []
+    for fragmento in _abrir_dataset(directorio).get_fragments():
+        expresion = ds.get_partition_keys(fragmento.partition_expression)
+        filas.append({col: expresion.get(col) for col in PARTICIONES})
+    return pd.DataFrame(filas, columns=PARTICIONES).drop_duplicates().sort_values(PARTICIONES, ignore_index=True)
+
+
+def version_dataset(directorio=DIRECTORIO_PARQUET):
+    """Versión del dataset según la última modificación de sus archivos"""
+    if not existe_dataset(directorio):
+        return None
+    return max(
+        os.path.getmtime(os.path.join(raiz, nombre))
+        for raiz, _, archivos in os.walk(directorio) for nombre in archivos if nombre.endswith('.parquet')
+    )
+
+
+def cargar_dataset(directorio=DIRECTORIO_PARQUET, anios=None, secciones=None, semanas=None,
+                   alumnos=None, columnas=None):
+    """Carga solo las particiones y columnas pedidas, filtrando en el lector"""
+    dataset = _abrir_dataset(directorio)
+
+    filtro = None
+    condiciones = [
+        ('Anio', anios),
+        ('Seccion', secciones),
+        ('Semana', semanas),
+        ('Alumno', alumnos),
+    ]
+    for columna, valores in condiciones:
+        if valores is None:
+            continue
+        if columna == 'Semana' and isinstance(valores, tuple):
+            # Rango de semanas (desde, hasta)
+            condicion = (pc.field('Semana') >= valores[0]) & (pc.field('Semana') <= valores[1])
+        else:
+            condicion = pc.field(columna).isin(list(valores))
+        filtro = condicion if filtro is None else filtro & condicion
+
+    if columnas is not None:
+        columnas = [col for col in columnas if col in dataset.schema.names]
+
+    tabla = dataset.to_table(columns=columnas, filter=filtro)
+    df = tabla.to_pandas()
+    if 'Semana' in df.columns:
+        df['Semana'] = df['Semana'].astype('int64')
+    orden = [col for col in ['ID_Estudiante', 'Semana'] if col in df.columns]
+    if orden:
+        df = df.sort_values(orden, kind='stable', ignore_index=True)
+    return df
+
+
+def importar_archivo(ruta, seccion=None, directorio=DIRECTORIO_PARQUET, anio=None):
+    """Procesa un CSV/Excel existente y lo guarda en el almacén Parquet"""
+    df = ingesta.leer_archivo(ruta)
+    df, _, _ = ingesta.procesar_dataframe(df)
+    seccion = seccion or os.path.splitext(os.path.basename(ruta))[0]
+    return escribir_dataset(df, seccion, directorio, anio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén Parquet de datos estudiantiles")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    importar = subparsers.add_parser('importar', help="Convierte archivos CSV/Excel al almacén Parquet")
+    importar.add_argument('archivos', nargs='+')
+    importar.add_argument('--seccion', help="Sección (por defecto, el nombre de cada archivo)")
+    importar.add_argument('--anio', type=int, help="Año (por defecto, se toma de 'Fecha Inicio')")
+    importar.add_argument('--destino', default=DIRECTORIO_PARQUET)
+
+    listar = subparsers.add_parser('listar', help="Muestra las particiones disponibles")
+    listar.add_argument('--destino', default=DIRECTORIO_PARQUET)
+
+    args = parser.parse_args()
+
+    if args.comando == 'importar':
+        for ruta in args.archivos:
+            filas = importar_archivo(ruta, args.seccion, args.destino, args.anio)
+            print(f"✅ {ruta}: {filas} registros importados en {args.destino}")
+    elif args.comando == 'listar':
+        particiones = listar_particiones(args.destino)
+        print(particiones.groupby(['Anio', 'Seccion'])['Semana'].agg(['min', 'max', 'count']).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""Usuarios de la app (SQLite) con contraseñas derivadas por PBKDF2 y tokens de sesión firmados.
+
+No hay cuentas predefinidas. El primer usuario se crea con la línea de comandos o, al arrancar con el
+almacén vacío, desde AUTH_USUARIO_INICIAL y AUTH_PASSWORD_INICIAL (rol admin).
+
+Agregar un usuario o cambiar su contraseña (desde la raíz del repositorio):
+    python dashboard_estudiantes/src/almacen_usuarios.py agregar zegarra --nombre "Profesor Zegarra" --grado "6to Primaria"
+    python dashboard_estudiantes/src/almacen_usuarios.py listar
+"""
+import argparse
+import base64
+import getpass
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+
+RUTA_USUARIOS = os.environ.get(
+    'USUARIOS_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'usuarios.db')
+)
+
+# Costo de la derivación (PBKDF2-SHA256): ~0.1 s por verificación
+ITERACIONES = int(os.environ.get('AUTH_ITERACIONES', 200_000))
+# Vigencia del token de sesión (solo vive en la sesión del servidor, nunca en la URL)
+HORAS_TOKEN = float(os.environ.get('AUTH_HORAS_TOKEN', 8))
+# Intentos fallidos tolerados por usuario dentro de la ventana antes de bloquear
+MAX_INTENTOS = int(os.environ.get('AUTH_MAX_INTENTOS', 5))
+VENTANA_INTENTOS = 300  # segundos
+SEGUNDOS_BLOQUEO = 300
+
+# Usuario creado al arrancar con el almacén vacío (la contraseña nunca va en el código)
+USUARIO_INICIAL = os.environ.get('AUTH_USUARIO_INICIAL')
+PASSWORD_INICIAL = os.environ.get('AUTH_PASSWORD_INICIAL')
+
+# Hashes de contraseñas que se publicaron con el código: las cuentas que aún los usan deben cambiarla
+HASHES_PUBLICADOS = {
+    "pbkdf2_sha256$200000$6mDlnOMl6gtFY3XkoSCUDw$Kg0_l1AOPsOpGoWxp4L7-L8KiRsc1wwmOMfktZ2uWGU",
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    usuario TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    rol TEXT NOT NULL,
+    grado TEXT
+);
+CREATE TABLE IF NOT EXISTS tokens_revocados (
+    firma TEXT PRIMARY KEY,
+    vence INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS configuracion (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+
+def _b64(datos):
+    return base64.urlsafe_b64encode(datos).rstrip(b'=').decode()
+
+
+def _desde_b64(texto):
+    return base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4))
+
+
+def hash_password(password, iteraciones=ITERACIONES, sal=None):
+    """Hash con sal de la contraseña en formato pbkdf2_sha256$iteraciones$sal$hash"""
+    sal = sal or secrets.token_bytes(16)
+    derivada = hashlib.pbkdf2_hmac('sha256', password.encode(), sal, iteraciones)
+    return f"pbkdf2_sha256${iteraciones}${_b64(sal)}${_b64(derivada)}"
+
+
+def verificar_password(password, hash_guardado):
+    """Compara la contraseña con el hash guardado en tiempo constante"""
+    try:
+        algoritmo, iteraciones, sal, esperado = hash_guardado.split('$')
+    except ValueError:
+        return False
+    if algoritmo != 'pbkdf2_sha256':
+        return False
+    derivada = hashlib.pbkdf2_hmac('sha256', password.encode(), _desde_b64(sal), int(iteraciones))
+    return hmac.compare_digest(derivada, _desde_b64(esperado))
+
+
+class AlmacenUsuarios:
+    """Usuarios en SQLite, verificación de contraseñas, tokens firmados y límite de intentos fallidos"""
+
+    def __init__(self, ruta=RUTA_USUARIOS, secreto=None):
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        if ruta != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.executescript(ESQUEMA)
+        if USUARIO_INICIAL and PASSWORD_INICIAL and not self.listar():
+            self.guardar_usuario(USUARIO_INICIAL, PASSWORD_INICIAL, USUARIO_INICIAL, rol='admin')
+        self.secreto = (secreto or os.environ.get('AUTH_SECRETO') or self._secreto_guardado()).encode()
+        # Hash de relleno: un usuario inexistente cuesta lo mismo que una contraseña incorrecta
+        self._hash_relleno = hash_password(secrets.token_hex(8))
+        self._fallos = defaultdict(deque)  # usuario -> instantes de los intentos fallidos recientes
+
+    def _secreto_guardado(self):
+        """Clave de firma de los tokens, generada una vez y guardada junto a los usuarios"""
+        with self.lock, self.conexion:
+            self.conexion.execute(
+                "INSERT OR IGNORE INTO configuracion (clave, valor) VALUES ('secreto_tokens', ?)",
+                (secrets.token_hex(32),)
+            )
+            return self.conexion.execute(
+                "SELECT valor FROM configuracion WHERE clave = 'secreto_tokens'"
+            ).fetchone()[0]
+
+    def usuario(self, usuario):
+        """Datos del usuario (sin el hash) o None si no existe"""
+        with self.lock:
+            fila = self.conexion.execute(
+                'SELECT usuario, nombre, rol, grado FROM usuarios WHERE usuario = ?', (usuario,)
+            ).fetchone()
+        return dict(zip(['usuario', 'nombre', 'rol', 'grado'], fila)) if fila else None
+
+    def guardar_usuario(self, usuario, password, nombre, rol='profesor', grado=''):
+        """Crea el usuario o reemplaza su contraseña y datos"""
+        with self.lock, self.conexion:
+            self.conexion.execute(
+                'INSERT INTO usuarios (usuario, hash, nombre, rol, grado) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (usuario) DO UPDATE SET hash = excluded.hash, nombre = excluded.nombre, '
+                'rol = excluded.rol, grado = excluded.grado',
+                (usuario, hash_password(password), nombre, rol, grado)
+            )
+
+    def listar(self):
+        """Usuarios registrados (sin hashes)"""
+        with self.lock:
+            filas = self.conexion.execute('SELECT usuario, nombre, rol, grado FROM usuarios ORDER BY usuario').fetchall()
+        return [dict(zip(['usuario', 'nombre', 'rol', 'grado'], fila)) for fila in filas]
+
+    def segundos_bloqueo(self, usuario):
+        """Segundos que faltan para poder reintentar (0 si el usuario no está bloqueado)"""
+        ahora = time.monotonic()
+        with self.lock:
+            fallos = self._fallos.get(usuario)
+            if not fallos:
+                return 0
+            while fallos and ahora - fallos[0] > max(VENTANA_INTENTOS, SEGUNDOS_BLOQUEO):
+                fallos.popleft()
+            recientes = [instante for instante in fallos if ahora - instante <= VENTANA_INTENTOS]
+            if len(recientes) < MAX_INTENTOS:
+                return 0
+            return max(0, int(fallos[-1] + SEGUNDOS_BLOQUEO - ahora) + 1)
+
+    def autenticar(self, usuario, password):
+        """Devuelve (datos del usuario, None) si las credenciales son válidas o (None, mensaje de error)"""
+        bloqueo = self.segundos_bloqueo(usuario)
+        if bloqueo:
+            return None, f"Demasiados intentos fallidos. Intente de nuevo en {bloqueo} s"
+
+        with self.lock:
+            fila = self.conexion.execute('SELECT hash FROM usuarios WHERE usuario = ?', (usuario,)).fetchone()
+        valido = verificar_password(password, fila[0] if fila else self._hash_relleno) and fila is not None
+        if not valido:
+            with self.lock:
+                self._fallos[usuario].append(time.monotonic())
+            return None, "Usuario o contraseña incorrectos"
+
+        with self.lock:
+            self._fallos.pop(usuario, None)
+        if fila[0] in HASHES_PUBLICADOS:
+            return None, ("La contraseña de esta cuenta es pública y debe cambiarse: "
+                          f"python dashboard_estudiantes/src/almacen_usuarios.py agregar {usuario}")
+        return self.usuario(usuario), None
+
+    def emitir_token(self, usuario, horas=HORAS_TOKEN):
+        """Token firmado (HMAC-SHA256) con el usuario y su vencimiento"""
+        carga = _b64(f"{usuario}|{int(time.time() + horas * 3600)}|{secrets.token_hex(8)}".encode())
+        return f"{carga}.{_b64(hmac.new(self.secreto, carga.encode(), hashlib.sha256).digest())}"
+
+    def validar_token(self, token):
+        """Datos del usuario del token si la firma es válida y no venció; None en otro caso"""
+        try:
+            carga, firma = token.split('.')
+            esperada = hmac.new(self.secreto, carga.encode(), hashlib.sha256).digest()
+            if not hmac.compare_digest(esperada, _desde_b64(firma)):
+                return None
+            usuario, vence, _ = _desde_b64(carga).decode().rsplit('|', 2)
+        except Exception:
+            return None
+        if int(vence) < time.time():
+            return None
+        with self.lock:
+            if self.conexion.execute('SELECT 1 FROM tokens_revocados WHERE firma = ?', (firma,)).fetchone():
+                return None
+        return self.usuario(usuario)
+
+    def revocar_token(self, token):
+        """Invalida el token antes de su vencimiento (al cerrar sesión)"""
+        try:
+            carga, firma = token.split('.')
+            vence = int(_desde_b64(carga).decode().rsplit('|', 2)[1])
+        except Exception:
+            return
+        with self.lock, self.conexion:
+            self.conexion.execute('DELETE FROM tokens_revocados WHERE vence < ?', (int(time.time()),))
+            self.conexion.execute('INSERT OR IGNORE INTO tokens_revocados (firma, vence) VALUES (?, ?)', (firma, vence))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Usuarios de la app")
+    parser.add_argument('comando', choices=['agregar', 'listar'])
+    parser.add_argument('usuario', nargs='?')
+    parser.add_argument('--nombre')
+    parser.add_argument('--rol', default='profesor', help="'admin' ve además el panel de rendimiento")
+    parser.add_argument('--grado', default='')
+    parser.add_argument('--destino', default=RUTA_USUARIOS)
+    args = parser.parse_args()
+
+    almacen = AlmacenUsuarios(args.destino)
+    if args.comando == 'agregar':
+        if not args.usuario:
+            parser.error("indique el usuario")
+        password = getpass.getpass("Contraseña: ")
+        if password != getpass.getpass("Repita la contraseña: "):
+            parser.error("las contraseñas no coinciden")
+        almacen.guardar_usuario(args.usuario, password, args.nombre or args.usuario, args.rol, args.grado)
+        print(f"✅ Usuario {args.usuario} guardado en {args.destino}")
+    for datos in almacen.listar():
+        print(f"{datos['usuario']}: {datos['nombre']} ({datos['rol']}, {datos['grado']})")
+
+
+if __name__ == '__main__':
+    main()
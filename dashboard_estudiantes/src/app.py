@@ -5,9 +5,20 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import warnings
-from modelos import PredictorDesempeno
-import io
-from datetime import datetime, timedelta
+from modelos import PredictorDesempeno, elegir_motor_svm
+import metricas
+import datos_sinteticos
+import ingesta
+import esquema
+import almacen_parquet
+import entrenamiento
+import instrumentacion
+from registro_modelos import RegistroModelos
+from cache_ingesta import CacheIngesta, copia_compartida, huella_contenido
+from contexto_datos import ContextoDatos
+from almacen_calificaciones import AlmacenCalificaciones
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
 
 
 # === AGREGAR ESTE IMPORT ===
@@ -15,6 +26,9 @@ from auth import verificar_autenticacion, mostrar_logout
 
 warnings.filterwarnings('ignore')
 
+# Copy-on-write: las sesiones comparten los datasets de la caché y solo copian lo que modifican
+pd.set_option('mode.copy_on_write', True)
+
 # Configurar página
 st.set_page_config(
     page_title="Sistema de Monitoreo Estudiantil por Semanas",
@@ -22,213 +36,320 @@ st.set_page_config(
     layout="wide"
 )
 
+# Medición de tiempos de esta ejecución (sin costo si la instrumentación está desactivada)
+instrumentacion.iniciar_ejecucion()
+
 # === AGREGAR ESTA LÍNEA AQUÍ - DESPUÉS DE set_page_config ===
 verificar_autenticacion()
 
-# Inicializar predictor
+# Registro de modelos en disco (versiones entrenadas)
 @st.cache_resource
-def cargar_predictor():
-    return PredictorDesempeno()
+def cargar_registro_modelos():
+    return RegistroModelos()
 
-predictor = cargar_predictor()
+# Inicializar predictor (compartido; los entrenamientos corren en procesos de fondo)
+@st.cache_resource
+def cargar_gestor_entrenamiento():
+    # Arranque en caliente: usar la última versión guardada si existe
+    registro = cargar_registro_modelos()
+    predictor, metadatos = registro.cargar_compatible()
+    return entrenamiento.GestorEntrenamientos(
+        predictor or PredictorDesempeno(), registro=registro, metadatos_modelo=metadatos
+    )
 
-# Listas globales que se actualizarán con datos reales
-ESTUDIANTES = []
-CURSOS = []
+gestor_entrenamiento = cargar_gestor_entrenamiento()
+gestor_entrenamiento.actualizar()
+predictor = gestor_entrenamiento.predictor
 
-def actualizar_listas_desde_dataframe(df):
-    """Actualiza las listas de estudiantes y cursos desde el DataFrame cargado"""
-    global ESTUDIANTES, CURSOS
-    
-    if 'Alumno' in df.columns:
-        ESTUDIANTES = sorted(df['Alumno'].unique().tolist())
-    elif 'Estudiante' in df.columns:
-        ESTUDIANTES = sorted(df['Estudiante'].unique().tolist())
-    elif 'Nombre' in df.columns:
-        ESTUDIANTES = sorted(df['Nombre'].unique().tolist())
-    elif 'Student' in df.columns:
-        ESTUDIANTES = sorted(df['Student'].unique().tolist())
+# Caché de archivos procesados compartida por todas las sesiones
+@st.cache_resource
+def cargar_cache_ingesta():
+    return CacheIngesta()
+
+# Registro durable de calificaciones ingresadas (SQLite compartido por las sesiones)
+@st.cache_resource
+def cargar_almacen_calificaciones():
+    return AlmacenCalificaciones()
+
+# Pool de procesos para cargar varias secciones a la vez (sus procesos se reutilizan entre cargas)
+@st.cache_resource
+def cargar_pool_ingesta():
+    return ingesta.crear_pool_ingesta()
+
+def contexto_sesion():
+    """Dataset de trabajo de esta sesión (vacío si todavía no hay uno)"""
+    contexto = st.session_state.get('contexto_datos')
+    return contexto if contexto is not None else ContextoDatos(pd.DataFrame(), [], [])
+
+def listas_desde_dataframe(df, huella=None):
+    """Obtiene las listas de estudiantes y cursos del DataFrame cargado"""
+    # El esquema (roles de columnas) se infiere una vez por archivo y queda en caché
+    estudiantes = ingesta.detectar_estudiantes(df, huella)
     
     # Identificar columnas de cursos automáticamente
-    columnas_excluir = ['ID_Estudiante', 'Alumno', 'Estudiante', 'Nombre', 'Student', 'Semana', 
-                       'Fecha Inicio', 'Fecha Fin', 'Clases Asistidas', 'Clases Totales', 
-                       'Promedio', 'Asistencia (%)', 'Promedio_Anterior', 
-                       'Progreso Académico (%)', 'Desempeño academico', 'en_riesgo']
-    
-    posibles_cursos = []
-    for col in df.columns:
-        if col not in columnas_excluir:
-            # Verificar si la columna contiene datos numéricos (notas)
-            if pd.api.types.is_numeric_dtype(df[col]):
-                posibles_cursos.append(col)
-            # Si no es numérica, verificar si puede convertirse
-            else:
-                try:
-                    # Intentar convertir a numérico
-                    temp_series = pd.to_numeric(df[col], errors='coerce')
-                    if not temp_series.isna().all():  # Si al menos algunos valores son numéricos
-                        posibles_cursos.append(col)
-                except:
-                    continue
-    
-    if posibles_cursos:
-        CURSOS = posibles_cursos
-    else:
-        # Si no se detectan cursos, usar los predeterminados
-        CURSOS = [
-            'Comunicación', 'Matemática', 'Ciencia y Tecnología',
-            'Personal Social', 'Educación Religiosa', 'Educación Física',
-            'Arte', 'Inglés'
-        ]
+    return estudiantes, ingesta.detectar_cursos(df, huella)
 
 def formatear_fechas_df(df):
     """Convierte las fechas al formato día/mes/año"""
-    columnas_fecha = ['Fecha Inicio', 'Fecha Fin']
-    
-    for col in columnas_fecha:
-        if col in df.columns:
-            # Para CSV, las fechas vienen como texto, intentar parsear
-            try:
-                # Primero detectar el formato original y convertir a datetime
-                df[col] = pd.to_datetime(df[col], dayfirst=True, errors='coerce').dt.strftime('%d/%m/%Y')
-            except:
-                # Si falla, intentar otro método
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%d/%m/%Y')
-                except:
-                    pass
-    return df
-
-def calcular_metricas(df):
+    return ingesta.formatear_fechas_df(df)
+
+def calcular_metricas(df, cursos):
     """Calcula métricas automáticamente"""
-    # Convertir columnas de cursos a numérico si es necesario
-    for curso in CURSOS:
-        if curso in df.columns:
-            df[curso] = pd.to_numeric(df[curso], errors='coerce').fillna(0)
-    
-    # Calcular promedio si hay cursos definidos
-    if CURSOS and all(curso in df.columns for curso in CURSOS):
-        df['Promedio'] = df[CURSOS].mean(axis=1).round(2)
-    else:
+    if not (cursos and all(curso in df.columns for curso in cursos)):
         st.error("No se pudieron identificar las columnas de cursos")
         return df
     
-    # Calcular asistencia si las columnas existen
-    if 'Clases Asistidas' in df.columns and 'Clases Totales' in df.columns:
-        df['Asistencia (%)'] = (df['Clases Asistidas'] / df['Clases Totales'] * 100).round(2)
-    elif 'Asistencia' in df.columns:
-        df['Asistencia (%)'] = df['Asistencia'].round(2)
-    
-    # Calcular progreso académico (comparando con semana anterior)
-    if 'ID_Estudiante' in df.columns and 'Semana' in df.columns:
-        df = df.sort_values(['ID_Estudiante', 'Semana'])
-        df['Promedio_Anterior'] = df.groupby('ID_Estudiante')['Promedio'].shift(1)
-        
-        # Calcular progreso evitando divisiones por cero
-        def calcular_progreso(row):
-            if pd.isna(row['Promedio_Anterior']) or row['Promedio_Anterior'] == 0:
-                return 0
-            rango_posible = 20
-            return ((row['Promedio'] - row['Promedio_Anterior']) / rango_posible * 100)
-        
-        df['Progreso Académico (%)'] = df.apply(calcular_progreso, axis=1).round(2)
-    
-    # Determinar desempeño académico
-    condiciones = [
-        df['Promedio'] >= 16,
-        df['Promedio'] >= 14,
-        df['Promedio'] >= 11,
-        df['Promedio'] < 11
-    ]
-    opciones = ['Excelente', 'Bueno', 'Regular', 'En Riesgo']
-    df['Desempeño academico'] = np.select(condiciones, opciones, default='Regular')
-    
-    return df
+    # Motor columnar (sin apply por fila)
+    return metricas.calcular_metricas(df, cursos)
+
+def procesar_csv_por_bloques(archivo, huella=None):
+    """Lee un CSV por bloques con tipos compactos mostrando el avance"""
+    barra = st.sidebar.progress(0.0, text="📥 Leyendo CSV...")
+    with instrumentacion.span('ingesta.bloques'):
+        df, estudiantes, cursos, informe = ingesta.leer_csv_por_bloques(
+            archivo, huella, progreso=lambda fraccion, mensaje: barra.progress(fraccion, text=f"📥 {mensaje}")
+        )
+    barra.empty()
+    st.session_state.informe_ingesta = informe
+    return df, estudiantes, cursos
+
+def procesar_archivo(archivo, huella=None):
+    """Lee un archivo cargado y aplica fechas, listas y métricas; devuelve (df, estudiantes, cursos)"""
+    if archivo.name.lower().endswith('.csv'):
+        return procesar_csv_por_bloques(archivo, huella)
+    
+    st.session_state.informe_ingesta = None
+    with instrumentacion.span('ingesta.leer'):
+        df = ingesta.leer_archivo(archivo)
+    
+    # ← CORREGIDO: Agregada esta línea para formatear fechas
+    with instrumentacion.span('ingesta.fechas'):
+        df = formatear_fechas_df(df)
+    
+    # Listas de estudiantes y cursos con los datos reales
+    with instrumentacion.span('ingesta.listas'):
+        estudiantes, cursos = listas_desde_dataframe(df, huella)
+    
+    # Calcular métricas
+    with instrumentacion.span('ingesta.metricas'):
+        return calcular_metricas(df, cursos), estudiantes, cursos
+
+@instrumentacion.medir()
+def cargar_archivo(archivo):
+    """Obtiene el archivo procesado desde la caché compartida o lo procesa si no existe"""
+    cache = cargar_cache_ingesta()
+    huella = huella_contenido(archivo.getvalue())
+    entrada = cache.obtener(huella)
+    
+    if entrada is None:
+        df, estudiantes, cursos = procesar_archivo(archivo, huella)
+        if 'Promedio' in df.columns:
+            cache.guardar(huella, df, estudiantes=estudiantes, cursos=cursos,
+                          informe=st.session_state.get('informe_ingesta'))
+        # La versión guardada es compartida: la sesión trabaja sobre su propia copia
+        df = copia_compartida(df)
+    else:
+        df, estudiantes, cursos = entrada['df'], entrada['estudiantes'], entrada['cursos']
+        st.session_state.informe_ingesta = entrada.get('informe')
+    
+    st.session_state.informe_secciones = None
+    return df, estudiantes, cursos
+
+@instrumentacion.medir()
+def cargar_archivos(archivos):
+    """Procesa varios archivos de sección en paralelo (o los toma de la caché compartida)"""
+    cache = cargar_cache_ingesta()
+    huella = huella_contenido(''.join(huella_contenido(archivo.getvalue()) for archivo in archivos).encode())
+    entrada = cache.obtener(huella)
+    
+    if entrada is None:
+        barra = st.sidebar.progress(0.0, text="📥 Procesando secciones...")
+        try:
+            with instrumentacion.span('ingesta.secciones'):
+                df, estudiantes, cursos, informe = ingesta.procesar_secciones(
+                    [(archivo.name, archivo.getvalue()) for archivo in archivos], cargar_pool_ingesta(),
+                    progreso=lambda fraccion, mensaje: barra.progress(fraccion, text=f"📥 {mensaje}")
+                )
+        except BrokenProcessPool:
+            # Un proceso del pool murió y ningún archivo se pudo procesar
+            cargar_pool_ingesta.clear()
+            raise
+        barra.empty()
+        if informe['pool_roto']:
+            # Dataset incompleto por una falla del pool (no del contenido): no se comparte en la caché
+            cargar_pool_ingesta.clear()
+            st.sidebar.warning("⚠️ Un proceso de carga terminó de forma inesperada; quita los archivos y vuelve a cargarlos para reintentar.")
+        else:
+            cache.guardar(huella, df, estudiantes=estudiantes, cursos=cursos, informe_secciones=informe)
+            df = copia_compartida(df)
+    else:
+        df, estudiantes, cursos = entrada['df'], entrada['estudiantes'], entrada['cursos']
+        informe = entrada['informe_secciones']
+    
+    st.session_state.informe_ingesta = None
+    st.session_state.informe_secciones = informe
+    return df, estudiantes, cursos
 
+def mostrar_informe_secciones(informe):
+    """Muestra el tiempo y los errores de cada archivo de una carga de varias secciones"""
+    archivos = informe['archivos']
+    errores = archivos[archivos['Error'] != '']
+    for _, fila in errores.iterrows():
+        st.sidebar.warning(f"⚠️ {fila['Archivo']}: {fila['Error']}")
+    
+    with st.sidebar.expander(f"📂 Secciones cargadas ({len(archivos) - len(errores)}/{len(archivos)})"):
+        st.caption(
+            f"⏱️ {informe['segundos']:.1f}s en total | archivo más lento: {archivos['Segundos'].max():.1f}s | "
+            f"suma de archivos: {archivos['Segundos'].sum():.1f}s"
+        )
+        if informe['ids_con_seccion']:
+            st.caption("ℹ️ Los IDs se repetían entre archivos: se antepuso la sección (ej. seccion_a-1)")
+        st.dataframe(archivos, use_container_width=True, hide_index=True)
+
+def mostrar_informe_ingesta(informe):
+    """Muestra la validación y el uso de memoria por columna de la lectura por bloques"""
+    with st.sidebar.expander("🧮 Memoria de la ingesta"):
+        total = informe['memoria'].loc['Total']
+        st.caption(
+            f"{informe['filas']:,} filas en {informe['bloques']} bloques | "
+            f"{total['Bytes texto'] / 2**20:.1f} MB como texto → {total['Bytes compacto'] / 2**20:.1f} MB "
+            f"({total['Reducción (%)']:.0f}% menos)"
+        )
+        if informe['semanas_invalidas']:
+            st.warning(f"⚠️ {informe['semanas_invalidas']} filas descartadas por semana inválida")
+        if informe['notas_invalidas'] or informe['notas_fuera_rango']:
+            st.warning(f"⚠️ {informe['notas_invalidas']} notas no numéricas (se toman como 0) | "
+                       f"{informe['notas_fuera_rango']} notas fuera del rango 0-{metricas.RANGO_NOTAS}")
+        st.dataframe(informe['memoria'], use_container_width=True)
+
+@st.cache_data(show_spinner=False)
+def listar_particiones_parquet(version):
+    return almacen_parquet.listar_particiones()
+
+# Particiones leídas compartidas entre sesiones (cada sesión recibe una copia perezosa)
+@st.cache_resource(show_spinner="Leyendo particiones...", max_entries=16)
+def leer_particiones_parquet(anio, seccion, semanas, version):
+    df = almacen_parquet.cargar_dataset(anios=[anio], secciones=[seccion], semanas=semanas)
+    return (df,) + listas_desde_dataframe(df)
+
+@instrumentacion.medir()
+def cargar_desde_parquet():
+    """Carga desde el almacén Parquet solo las particiones seleccionadas"""
+    version = almacen_parquet.version_dataset()
+    particiones = listar_particiones_parquet(version)
+    
+    anio = st.sidebar.selectbox("Año", sorted(particiones['Anio'].unique(), reverse=True))
+    particiones = particiones[particiones['Anio'] == anio]
+    seccion = st.sidebar.selectbox("Sección", sorted(particiones['Seccion'].unique()))
+    semanas_seccion = particiones.loc[particiones['Seccion'] == seccion, 'Semana']
+    desde, hasta = int(semanas_seccion.min()), int(semanas_seccion.max())
+    semanas = st.sidebar.slider("Semanas", desde, hasta, (desde, hasta)) if desde < hasta else (desde, hasta)
+    
+    clave = ('parquet', int(anio), seccion, semanas, version)
+    if contexto_sesion().clave == clave:
+        return contexto_sesion()
+    
+    df, estudiantes, cursos = leer_particiones_parquet(int(anio), seccion, semanas, version)
+    return establecer_contexto(copia_compartida(df), estudiantes, cursos, clave, f"parquet/{int(anio)}/{seccion}")
+
+def aplicar_calificaciones_guardadas(df, cursos, dataset):
+    """Integra al dataset las calificaciones de su registro durable que pertenecen a sus estudiantes"""
+    if df.empty or 'ID_Estudiante' not in df.columns:
+        return df
+    try:
+        guardadas = cargar_almacen_calificaciones().cargar(ids=df['ID_Estudiante'].unique().tolist(), dataset=dataset)
+        return metricas.aplicar_registros(df, guardadas, cursos)
+    except Exception as e:
+        st.sidebar.warning(f"⚠️ No se pudieron aplicar las calificaciones guardadas: {e}")
+        return df
+
+def establecer_contexto(df, estudiantes, cursos, clave, dataset):
+    """Crea el dataset de trabajo de la sesión (con las calificaciones guardadas) y lo devuelve"""
+    df = aplicar_calificaciones_guardadas(df, cursos, dataset)
+    st.session_state.contexto_datos = ContextoDatos(df, estudiantes, cursos, clave, dataset)
+    return st.session_state.contexto_datos
+
+@instrumentacion.medir()
+def sincronizar_modelo(contexto):
+    """Elige el modelo de la sesión: el compartido si es compatible con su dataset o, si no, el más reciente compatible del registro"""
+    global predictor
+    
+    df = contexto.df
+    if df.empty:
+        return
+    
+    # Se revisa en cada rerun: otra sesión puede haber reemplazado el modelo compartido
+    caracteristicas = contexto.caracteristicas()
+    if predictor.entrenado and predictor.caracteristicas == caracteristicas:
+        contexto.modelo_registro = None
+    else:
+        # Modelo propio de la sesión (el compartido no se toca); sin uno compatible, la sesión queda sin modelo
+        registro = cargar_registro_modelos()
+        metadatos = registro.buscar_compatible(caracteristicas, contexto.huella())
+        if metadatos is None:
+            contexto.modelo_registro = (PredictorDesempeno(), None)
+        elif contexto.modelo_registro is None or contexto.modelo_registro[1] != metadatos:
+            contexto.modelo_registro = (registro.cargar(metadatos) or PredictorDesempeno(), metadatos)
+        predictor = contexto.modelo_registro[0]
+    
+    if st.session_state.get('modelo_sincronizado') == contexto.clave:
+        return
+    st.session_state.modelo_sincronizado = contexto.clave
+    
+    # Modo incremental: aprender solo de las filas que el modelo aún no ha visto
+    resultados = actualizar_modelo_incremental(predictor.filas_nuevas(df), contexto)
+    if resultados is not None:
+        st.sidebar.caption(f"⚡ Modelo actualizado con {resultados['filas']} registros nuevos "
+                           f"({resultados['tiempo_total'] * 1000:.0f} ms)")
+
+def actualizar_modelo_incremental(df_nuevas, contexto):
+    """Aplica al predictor compartido las filas nuevas sin reentrenar (solo en modo incremental)"""
+    global predictor
+    
+    if not st.session_state.get('modo_incremental') or df_nuevas.empty or not predictor.admite_incremental():
+        return None
+    if predictor is not gestor_entrenamiento.predictor:
+        # La sesión usa un modelo propio del registro: no se publica para las demás
+        return None
+    # La huella del dataset solo se calcula cuando el gestor guarda la versión en el registro
+    resultados = gestor_entrenamiento.actualizar_incremental(df_nuevas, contexto.huella)
+    if resultados is not None:
+        predictor = gestor_entrenamiento.predictor
+    return resultados
+
+def opciones_estudiantes(contexto):
+    """Opciones de los selectores de estudiante y cómo mostrarlas.
+
+    Con índice, las opciones son claves (IDs): dos estudiantes de distintas secciones con el
+    mismo nombre son opciones distintas. Sin datos, los nombres de la lista de la sesión.
+    """
+    df = contexto.df
+    if df.empty or 'Semana' not in df.columns:
+        return contexto.estudiantes, str
+    indice = contexto.indice_estudiantes()
+    return indice.estudiantes(), indice.etiqueta
+
+def identificar_estudiante(contexto, estudiante):
+    """ID, nombre y columnas de identificación (sección) del estudiante elegido en un selector de opciones_estudiantes"""
+    df = contexto.df
+    if not df.empty and 'Semana' in df.columns and 'ID_Estudiante' in df.columns:
+        indice = contexto.indice_estudiantes()
+        extra = {'Seccion': indice.secciones[estudiante]} if estudiante in indice.secciones else {}
+        return estudiante, indice.nombres.get(estudiante, estudiante), extra
+    return contexto.estudiantes.index(estudiante) + 1, estudiante, {}
+
+@instrumentacion.medir()
 def generar_datos_ejemplo():
     """Genera datos de ejemplo para 36 semanas - ACTUALIZADO A 2025"""
-    global ESTUDIANTES, CURSOS
-    
-    # Si no hay estudiantes definidos, usar los predeterminados
-    if not ESTUDIANTES:
-        ESTUDIANTES = [
-            "Adriana Beatriz León Vargas", "Ariana Michelle León Cordero",
-            "Andrés Felipe Guerrero Soto", "Camila Estefanía Salazar Vega",
-            "Carlos Andrés Herrera Medina", "Carmen Rosa Méndez Fuentes",
-            "Dafne Isabel Castro Díaz", "Daniela Estefanía Vásquez Ruiz",
-            "Diana Sofia Campos Díaz", "Eduardo Enrique Prado Jiménez",
-            "Felipe Augusto Espinoza Torres", "Gabriela Isabel Ríos Medina",
-            "Gisela Emilia Contreras Mendizábal", "Hugo Francisco Mendoza Rojas",
-            "Jorge Eduardo Salazar Peña", "José Antonio Díaz Romero",
-            "Juan Carlos Morales Miranda", "Laura Valentina Paredes Silva",
-            "Luciana Andrea Vásquez Romero", "Luis Alberto García Pérez",
-            "Magdalena Alejandra Torres Mendoza", "María Fernanda Gutiérrez Rojas",
-            "Naomi Emilia Cervantes Herrera", "Natalia Eugenia Chávez Herrera",
-            "Pablo Daniel Cabrera Luna", "Paula Renata Gómez Silva",
-            "Renata Alejandra Olivos Díaz", "Ricardo José Navarro Campos",
-            "Sofía Camila Gutiérrez Salazar", "Sonia Valentina Quispe López",
-            "Valeria Alejandra Paredes Flores"
-        ]
-    
-    if not CURSOS:
-        CURSOS = [
-            'Comunicación', 'Matemática', 'Ciencia y Tecnología',
-            'Personal Social', 'Educación Religiosa', 'Educación Física',
-            'Arte', 'Inglés'
-        ]
-    
-    np.random.seed(42)
-    datos = []
-    
-    # FECHA ACTUALIZADA A 2025
-    fecha_base = datetime(2025, 4, 14)  
-    
-    for i, estudiante in enumerate(ESTUDIANTES, 1):
-        promedio_base = np.random.normal(13, 2)
-        
-        for semana in range(1, 37):  # 36 semanas
-            # Calcular fecha (cada semana empieza en lunes)
-            fecha_inicio = fecha_base + timedelta(weeks=semana-1)
-            fecha_fin = fecha_inicio + timedelta(days=6)
-            
-            # Generar notas con tendencia
-            if i % 5 == 0:  # Estudiantes en riesgo
-                tendencia = np.random.choice([-0.1, -0.2, 0], p=[0.6, 0.3, 0.1])
-            else:
-                tendencia = np.random.choice([0.1, 0.05, 0], p=[0.5, 0.3, 0.2])
-            
-            notas = []
-            for curso in range(len(CURSOS)):
-                nota_base = max(0, min(20, promedio_base + np.random.normal(0, 1)))
-                # Aplicar tendencia progresiva
-                nota_ajustada = nota_base + (tendencia * semana)
-                notas.append(max(0, min(20, round(nota_ajustada, 1))))
-            
-            promedio = np.mean(notas)
-            clases_totales = 20
-            # Asistencia con tendencia
-            if i % 5 == 0:
-                clases_asistidas = max(10, np.random.randint(12, 18))
-            else:
-                clases_asistidas = np.random.randint(16, 21)
-            
-            asistencia = (clases_asistidas / clases_totales) * 100
-            
-            datos.append({
-                'ID_Estudiante': i,
-                'Alumno': estudiante,
-                'Semana': semana,
-                'Fecha Inicio': fecha_inicio.strftime('%d/%m/%Y'),
-                'Fecha Fin': fecha_fin.strftime('%d/%m/%Y'),
-                **dict(zip(CURSOS, notas)),
-                'Clases Asistidas': clases_asistidas,
-                'Clases Totales': clases_totales
-            })
-    
-    df = pd.DataFrame(datos)
-    return calcular_metricas(df)
+    # Generador vectorizado y memorizado (se reutiliza entre reruns)
+    df = datos_sinteticos.generar_datos(seed=42)
+    estudiantes = datos_sinteticos.nombres_estudiantes(len(datos_sinteticos.NOMBRES_EJEMPLO))
+    cursos = datos_sinteticos.nombres_cursos(len(datos_sinteticos.CURSOS_EJEMPLO))
+    return df, estudiantes, cursos
 
-def mostrar_dashboard_general(df):
+@instrumentacion.medir()
+def mostrar_dashboard_general(contexto):
+    df = contexto.df
     st.header("📊 Dashboard General - Visión Semanal")
     
     if df.empty:
@@ -236,87 +357,84 @@ def mostrar_dashboard_general(df):
         return
     
     # Mostrar información sobre los datos cargados
-    if 'Alumno' in df.columns and len(df['Alumno'].unique()) > 0:
-        st.info(f"📁 Datos cargados: {len(df)} registros, {len(ESTUDIANTES)} estudiantes, {len(CURSOS)} cursos")
+    if 'Alumno' in df.columns and len(contexto.estudiantes) > 0:
+        st.info(f"📁 Datos cargados: {len(df)} registros, {len(contexto.estudiantes)} estudiantes, {len(contexto.cursos)} cursos")
     else:
-        st.info(f"📁 Usando datos de ejemplo: {len(df)} registros, {len(ESTUDIANTES)} estudiantes, {len(CURSOS)} cursos")
+        st.info(f"📁 Usando datos de ejemplo: {len(df)} registros, {len(contexto.estudiantes)} estudiantes, {len(contexto.cursos)} cursos")
+    
+    # Agregados materializados: cambiar de semana es solo una búsqueda
+    agregados = contexto.agregados_semanales()
     
     # Selector de semana para el dashboard
-    semanas_disponibles = sorted(df['Semana'].unique())
+    semanas_disponibles = agregados.semanas()
     semana_seleccionada = st.selectbox("Seleccionar Semana para Dashboard", semanas_disponibles)
     
-    datos_semana = df[df['Semana'] == semana_seleccionada]
+    resumen, distribucion, top_estudiantes = agregados.semana(semana_seleccionada)
     
     # Métricas generales de la semana seleccionada - CORREGIDAS
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        promedio_general = datos_semana['Promedio'].mean()
-        st.metric(f"Promedio General Semana {semana_seleccionada}", f"{promedio_general:.1f}")
+        st.metric(f"Promedio General Semana {semana_seleccionada}", f"{resumen['Promedio']:.1f}")
     
     with col2:
-        asistencia_promedio = datos_semana['Asistencia (%)'].mean()
-        st.metric("Asistencia Promedio", f"{asistencia_promedio:.1f}%")
+        st.metric("Asistencia Promedio", f"{resumen['Asistencia (%)']:.1f}%")
     
     with col3:
-        estudiantes_riesgo = len(datos_semana[datos_semana['Desempeño academico'] == 'En Riesgo'])
-        st.metric("Estudiantes en Riesgo", estudiantes_riesgo)
+        st.metric("Estudiantes en Riesgo", int(resumen['En Riesgo']))
     
     with col4:
-        # CORRECCIÓN: Evitar NaN en progreso promedio
-        progreso_promedio = datos_semana['Progreso Académico (%)'].mean()
-        if pd.isna(progreso_promedio):
-            progreso_promedio = 0
-        st.metric("Progreso Promedio", f"{progreso_promedio:.1f}%")
+        st.metric("Progreso Promedio", f"{resumen['Progreso Académico (%)']:.1f}%")
     
     # Gráficos
     col1, col2 = st.columns(2)
     
     with col1:
         # Distribución de desempeño por semana
-        fig_desempeno = px.pie(
-            datos_semana, 
-            names='Desempeño academico',
-            title=f'Distribución del Desempeño - Semana {semana_seleccionada}',
-            color='Desempeño academico',
-            color_discrete_map={
-                'Excelente': '#00CC96',
-                'Bueno': '#636EFA',
-                'Regular': '#FECB52',
-                'En Riesgo': '#EF553B'
-            }
-        )
-        st.plotly_chart(fig_desempeno)
+        distribucion = distribucion[distribucion > 0]
+        with instrumentacion.span('grafico.desempeno'):
+            fig_desempeno = px.pie(
+                names=distribucion.index,
+                values=distribucion.values,
+                title=f'Distribución del Desempeño - Semana {semana_seleccionada}',
+                color=distribucion.index,
+                color_discrete_map={
+                    'Excelente': '#00CC96',
+                    'Bueno': '#636EFA',
+                    'Regular': '#FECB52',
+                    'En Riesgo': '#EF553B'
+                }
+            )
+            st.plotly_chart(fig_desempeno)
     
     with col2:
         # Evolución de promedios por semana (todas las semanas)
-        evolucion_promedio = df.groupby('Semana').agg({
-            'Promedio': 'mean',
-            'Asistencia (%)': 'mean'
-        }).reset_index()
-        
-        fig_evolucion = go.Figure()
-        fig_evolucion.add_trace(go.Scatter(
-            x=evolucion_promedio['Semana'],
-            y=evolucion_promedio['Promedio'],
-            mode='lines+markers',
-            name='Promedio General',
-            line=dict(color='#636EFA', width=3)
-        ))
-        fig_evolucion.add_vline(x=semana_seleccionada, line_dash="dash", line_color="red")
-        fig_evolucion.update_layout(
-            title='Evolución del Promedio General por Semana',
-            xaxis_title='Semana',
-            yaxis_title='Promedio'
-        )
-        st.plotly_chart(fig_evolucion)
+        evolucion_promedio = agregados.evolucion()
+        
+        with instrumentacion.span('grafico.evolucion'):
+            fig_evolucion = go.Figure()
+            fig_evolucion.add_trace(go.Scatter(
+                x=evolucion_promedio['Semana'],
+                y=evolucion_promedio['Promedio'],
+                mode='lines+markers',
+                name='Promedio General',
+                line=dict(color='#636EFA', width=3)
+            ))
+            fig_evolucion.add_vline(x=semana_seleccionada, line_dash="dash", line_color="red")
+            fig_evolucion.update_layout(
+                title='Evolución del Promedio General por Semana',
+                xaxis_title='Semana',
+                yaxis_title='Promedio'
+            )
+            st.plotly_chart(fig_evolucion)
     
     # Top 5 estudiantes de la semana
     st.subheader(f"🏆 Top 5 Estudiantes - Semana {semana_seleccionada}")
-    top_estudiantes = datos_semana.nlargest(5, 'Promedio')[['Alumno', 'Promedio', 'Asistencia (%)', 'Desempeño academico']]
     st.dataframe(top_estudiantes, use_container_width=True)
 
-def mostrar_monitoreo_semanal(df):
+@instrumentacion.medir()
+def mostrar_monitoreo_semanal(contexto):
+    df = contexto.df
     st.header("👨‍🎓 Monitoreo Detallado por Semana")
     
     if df.empty:
@@ -327,17 +445,18 @@ def mostrar_monitoreo_semanal(df):
     
     with col1:
         # Selector de semana
-        semanas_disponibles = sorted(df['Semana'].unique())
+        semanas_disponibles = contexto.agregados_semanales().semanas()
         semana_seleccionada = st.selectbox("Seleccionar Semana", semanas_disponibles)
     
     with col2:
-        # Selector de estudiante
-        estudiante_seleccionado = st.selectbox("Seleccionar Estudiante", ESTUDIANTES)
+        # Selector de estudiante (por clave: los nombres pueden repetirse entre secciones)
+        opciones, etiqueta = opciones_estudiantes(contexto)
+        estudiante_seleccionado = st.selectbox("Seleccionar Estudiante", opciones, format_func=etiqueta)
     
-    if estudiante_seleccionado and semana_seleccionada:
-        # Datos del estudiante en la semana seleccionada
-        datos_estudiante = df[(df['Alumno'] == estudiante_seleccionado) & 
-                             (df['Semana'] == semana_seleccionada)]
+    if estudiante_seleccionado is not None and semana_seleccionada:
+        # Datos del estudiante en la semana seleccionada (búsqueda en el índice)
+        indice = contexto.indice_estudiantes()
+        datos_estudiante = indice.fila(estudiante_seleccionado, semana_seleccionada)
         
         if not datos_estudiante.empty:
             datos_semana = datos_estudiante.iloc[0]
@@ -378,61 +497,109 @@ def mostrar_monitoreo_semanal(df):
             
             with col1:
                 # Gráfico de barras de notas por curso
-                if all(curso in datos_semana for curso in CURSOS):
-                    notas_curso = [datos_semana[curso] for curso in CURSOS]
-                    fig_notas = px.bar(
-                        x=CURSOS, 
-                        y=notas_curso,
-                        title=f'Notas por Curso - Semana {semana_seleccionada}',
-                        labels={'x': 'Curso', 'y': 'Nota'},
-                        color=notas_curso,
-                        color_continuous_scale='Viridis'
-                    )
-                    fig_notas.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
-                    fig_notas.update_layout(showlegend=False)
-                    st.plotly_chart(fig_notas)
+                if all(curso in datos_semana for curso in contexto.cursos):
+                    notas_curso = [datos_semana[curso] for curso in contexto.cursos]
+                    with instrumentacion.span('grafico.notas'):
+                        fig_notas = px.bar(
+                            x=contexto.cursos, 
+                            y=notas_curso,
+                            title=f'Notas por Curso - Semana {semana_seleccionada}',
+                            labels={'x': 'Curso', 'y': 'Nota'},
+                            color=notas_curso,
+                            color_continuous_scale='Viridis'
+                        )
+                        fig_notas.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
+                        fig_notas.update_layout(showlegend=False)
+                        st.plotly_chart(fig_notas)
                 else:
                     st.warning("No se encontraron datos de cursos para mostrar")
             
             with col2:
                 # Comparativa con semanas anteriores
-                historial_estudiante = df[df['Alumno'] == estudiante_seleccionado].sort_values('Semana')
-                fig_historial = px.line(
-                    historial_estudiante,
-                    x='Semana',
-                    y='Promedio',
-                    title='Evolución del Promedio',
-                    markers=True
-                )
-                fig_historial.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
-                fig_historial.add_vline(x=semana_seleccionada, line_dash="dash", line_color="green")
-                st.plotly_chart(fig_historial)
+                historial_estudiante = indice.historial(estudiante_seleccionado)
+                with instrumentacion.span('grafico.historial'):
+                    fig_historial = px.line(
+                        historial_estudiante,
+                        x='Semana',
+                        y='Promedio',
+                        title='Evolución del Promedio',
+                        markers=True
+                    )
+                    fig_historial.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
+                    fig_historial.add_vline(x=semana_seleccionada, line_dash="dash", line_color="green")
+                    st.plotly_chart(fig_historial)
             
             # Tabla detallada de calificaciones
-            if all(curso in datos_semana for curso in CURSOS):
+            if all(curso in datos_semana for curso in contexto.cursos):
                 st.subheader("📊 Calificaciones Detalladas")
                 datos_detallados = {
-                    'Curso': CURSOS,
-                    'Nota': [datos_semana[curso] for curso in CURSOS],
-                    'Estado': ['✅ Aprobado' if datos_semana[curso] >= 11 else '❌ Riesgo' for curso in CURSOS]
+                    'Curso': contexto.cursos,
+                    'Nota': [datos_semana[curso] for curso in contexto.cursos],
+                    'Estado': ['✅ Aprobado' if datos_semana[curso] >= 11 else '❌ Riesgo' for curso in contexto.cursos]
                 }
                 df_detallado = pd.DataFrame(datos_detallados)
                 st.dataframe(df_detallado, use_container_width=True)
-            
+
+            mostrar_perfiles_similares(df, datos_estudiante, semana_seleccionada)
+
         else:
-            st.warning(f"No hay datos disponibles para {estudiante_seleccionado} en la semana {semana_seleccionada}")
+            st.warning(f"No hay datos disponibles para {etiqueta(estudiante_seleccionado)} en la semana {semana_seleccionada}")
+
+@instrumentacion.medir()
+def mostrar_perfiles_similares(df, datos_estudiante, semana):
+    """Muestra los compañeros con perfil más parecido según el índice del modelo KNN"""
+    st.subheader("🧑‍🤝‍🧑 Estudiantes con Perfil Similar")
+
+    if not predictor.entrenado or predictor.referencias is None:
+        st.info("Entrena los modelos de predicción para buscar estudiantes con perfil similar.")
+        return
+
+    k = st.slider("Cantidad de estudiantes similares", 3, 10, 5, key="k_similares")
+    similares = predictor.buscar_similares(datos_estudiante, k)
+    if similares is None:
+        st.error("No se pudieron buscar estudiantes similares")
+        return
+
+    en_riesgo = int(similares['En Riesgo'].sum())
+    st.write(f"**{en_riesgo} de {len(similares)}** estudiantes con perfil similar estuvieron en riesgo.")
+    st.dataframe(similares.drop(columns=['Consulta']), use_container_width=True, hide_index=True)
+
+    # Consulta en lote: todo el salón en la semana seleccionada
+    if st.checkbox(f"Ver perfiles similares de todo el salón (semana {semana})", key="similares_salon"):
+        datos_semana = df[df['Semana'] == semana]
+        similares_salon = predictor.buscar_similares(datos_semana, k)
+        if similares_salon is None:
+            st.error("No se pudieron buscar estudiantes similares")
+            return
+
+        columna_alumno = 'Alumno' if 'Alumno' in similares_salon.columns else similares_salon.columns[1]
+        resumen = similares_salon.groupby('Consulta', sort=False).agg(**{
+            'Estudiantes Similares': (columna_alumno, lambda nombres: ', '.join(map(str, nombres))),
+            'Similares en Riesgo': ('En Riesgo', 'sum'),
+        })
+        resumen.insert(0, 'Estudiante', datos_semana.loc[resumen.index, columna_alumno].to_numpy())
+        st.dataframe(
+            resumen.sort_values('Similares en Riesgo', ascending=False),
+            use_container_width=True,
+            hide_index=True
+        )
 
-def mostrar_prediccion_riesgo(df):
+@instrumentacion.medir()
+def mostrar_prediccion_riesgo(contexto):
+    df = contexto.df
     st.header("🔮 Predicción de Riesgo Académico")
     
     # Verificar si los modelos están entrenados
     if not predictor.entrenado and not df.empty:
-        if st.button("🔧 Entrenar Modelos con Datos Actuales"):
-            with st.spinner("Entrenando modelos de IA..."):
-                resultados = predictor.entrenar_modelos(df)
-                if resultados:
-                    st.success("✅ Modelos entrenados exitosamente!")
-                    st.rerun()
+        entrenando = gestor_entrenamiento.activo() is not None
+        if st.button("🔧 Entrenar Modelos con Datos Actuales", disabled=entrenando):
+            st.session_state.trabajo_entrenamiento = gestor_entrenamiento.enviar(
+                df, contexto.huella(), elegir_motor_svm(len(df), st.session_state.get('modo_incremental', False)),
+                esquema.inferir_esquema(df)
+            )
+            entrenando = True
+        if entrenando:
+            st.info("⏳ Entrenando modelos en segundo plano. Puedes seguir navegando; el avance se muestra en la barra lateral.")
     
     if not predictor.entrenado:
         st.warning("""
@@ -449,7 +616,7 @@ def mostrar_prediccion_riesgo(df):
     
     # Usar session_state para mantener los datos
     if 'notas_manuales' not in st.session_state:
-        st.session_state.notas_manuales = {curso: 12.0 for curso in CURSOS}
+        st.session_state.notas_manuales = {curso: 12.0 for curso in contexto.cursos}
     if 'asistencia_manual' not in st.session_state:
         st.session_state.asistencia_manual = 85.0
     if 'resultado_prediccion' not in st.session_state:
@@ -461,7 +628,8 @@ def mostrar_prediccion_riesgo(df):
         st.subheader("📊 Datos Académicos")
         
         # Selector de estudiante (solo para referencia)
-        estudiante_referencia = st.selectbox("Estudiante (para referencia)", ESTUDIANTES, key="pred_ref")
+        opciones, etiqueta = opciones_estudiantes(contexto)
+        estudiante_referencia = st.selectbox("Estudiante (para referencia)", opciones, format_func=etiqueta, key="pred_ref")
         
         st.markdown("#### Ingresar Calificaciones (0-20)")
         
@@ -469,7 +637,7 @@ def mostrar_prediccion_riesgo(df):
         notas_actualizadas = {}
         cols_notas = st.columns(4)
         
-        for i, curso in enumerate(CURSOS):
+        for i, curso in enumerate(contexto.cursos):
             with cols_notas[i % 4]:
                 nota = st.number_input(
                     f"{curso}",
@@ -520,14 +688,15 @@ def mostrar_prediccion_riesgo(df):
             st.metric("Asistencia", f"{asistencia:.1f}%")
         
         # Gráfico rápido de notas
-        fig_barras = px.bar(
-            x=list(st.session_state.notas_manuales.keys()),
-            y=list(st.session_state.notas_manuales.values()),
-            title="Distribución de Notas Ingresadas",
-            labels={'x': 'Curso', 'y': 'Nota'}
-        )
-        fig_barras.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
-        st.plotly_chart(fig_barras, use_container_width=True)
+        with instrumentacion.span('grafico.barras'):
+            fig_barras = px.bar(
+                x=list(st.session_state.notas_manuales.keys()),
+                y=list(st.session_state.notas_manuales.values()),
+                title="Distribución de Notas Ingresadas",
+                labels={'x': 'Curso', 'y': 'Nota'}
+            )
+            fig_barras.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
+            st.plotly_chart(fig_barras, use_container_width=True)
     
     # Botón de predicción
     st.markdown("---")
@@ -537,7 +706,7 @@ def mostrar_prediccion_riesgo(df):
         if st.button("🎯 REALIZAR PREDICCIÓN DE RIESGO", use_container_width=True, type="primary"):
             with st.spinner("Analizando desempeño del estudiante..."):
                 # Preparar datos para predicción
-                notas_lista = [st.session_state.notas_manuales[curso] for curso in CURSOS]
+                notas_lista = [st.session_state.notas_manuales[curso] for curso in contexto.cursos]
                 
                 # Realizar predicción
                 resultado = predictor.predecir_riesgo_manual(
@@ -631,54 +800,138 @@ def mostrar_prediccion_riesgo(df):
         # Gráfico de análisis comparativo
         st.subheader("📈 Análisis Comparativo")
         
-        fig_comparativo = go.Figure()
+        with instrumentacion.span('grafico.comparativo'):
+            fig_comparativo = go.Figure()
         
-        # Notas actuales vs límite de aprobación
-        fig_comparativo.add_trace(go.Bar(
-            name='Notas del Estudiante',
-            x=CURSOS,
-            y=[st.session_state.notas_manuales[curso] for curso in CURSOS],
-            marker_color=['#EF553B' if st.session_state.notas_manuales[curso] < 11 else '#00CC96' for curso in CURSOS]
-        ))
+            # Notas actuales vs límite de aprobación
+            fig_comparativo.add_trace(go.Bar(
+                name='Notas del Estudiante',
+                x=contexto.cursos,
+                y=[st.session_state.notas_manuales[curso] for curso in contexto.cursos],
+                marker_color=['#EF553B' if st.session_state.notas_manuales[curso] < 11 else '#00CC96' for curso in contexto.cursos]
+            ))
         
-        fig_comparativo.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
-        fig_comparativo.update_layout(title="Análisis de Notas vs Límite de Aprobación")
-        st.plotly_chart(fig_comparativo, use_container_width=True)
+            fig_comparativo.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
+            fig_comparativo.update_layout(title="Análisis de Notas vs Límite de Aprobación")
+            st.plotly_chart(fig_comparativo, use_container_width=True)
     
     elif st.session_state.resultado_prediccion and 'error' in st.session_state.resultado_prediccion:
         st.error(f"Error en la predicción: {st.session_state.resultado_prediccion['error']}")
 
-def mostrar_trayectoria_academica(df):
+    mostrar_riesgo_aula(df)
+
+@instrumentacion.medir()
+def mostrar_riesgo_aula(df):
+    """Muestra la predicción de riesgo de todo el aula calculada en lote"""
+    if df.empty:
+        return
+
+    st.markdown("---")
+    st.header("🏫 Riesgo del Aula")
+
+    # Una sola pasada vectorizada sobre todas las filas estudiante-semana
+    resultados = predictor.predecir_riesgo_lote(df)
+    if resultados is None:
+        st.error("No se pudo calcular el riesgo del aula")
+        return
+
+    if 'Semana' in resultados.columns:
+        semanas_disponibles = sorted(resultados['Semana'].unique())
+        semana_seleccionada = st.selectbox(
+            "Seleccionar Semana", semanas_disponibles,
+            index=len(semanas_disponibles) - 1, key="semana_riesgo_aula"
+        )
+        resultados = resultados[resultados['Semana'] == semana_seleccionada]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Estudiantes Evaluados", len(resultados))
+    with col2:
+        st.metric("Estudiantes en Riesgo", int(resultados['En Riesgo'].sum()))
+    with col3:
+        st.metric("Confianza Promedio", f"{resultados['Confianza General'].mean():.1%}")
+
+    tabla = resultados.sort_values(['En Riesgo', 'Votos Riesgo', 'Promedio'], ascending=[False, False, True])
+    st.dataframe(
+        tabla,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Confianza Árbol': st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1),
+            'Confianza SVM': st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1),
+            'Confianza KNN': st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1),
+            'Confianza General': st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1),
+        }
+    )
+
+@instrumentacion.medir()
+def mostrar_trayectoria_academica(contexto):
+    df = contexto.df
     st.header("📈 Trayectoria y Proyección Académica")
     
     if df.empty:
         st.warning("No hay datos disponibles")
         return
     
-    estudiante_seleccionado = st.selectbox("Seleccionar Estudiante para Proyección", ESTUDIANTES, key="trayectoria")
+    opciones, etiqueta = opciones_estudiantes(contexto)
+    estudiante_seleccionado = st.selectbox("Seleccionar Estudiante para Proyección", opciones,
+                                           format_func=etiqueta, key="trayectoria")
     
-    if estudiante_seleccionado:
+    if estudiante_seleccionado is not None:
         # Mostrar historial real
         st.subheader("Historial Académico Real")
-        historial_real = df[df['Alumno'] == estudiante_seleccionado].sort_values('Semana')
+        historial_real = contexto.indice_estudiantes().historial(estudiante_seleccionado)
         
         if not historial_real.empty:
-            fig_historial = px.line(
-                historial_real,
-                x='Semana',
-                y='Promedio',
-                title=f'Evolución del Promedio - {estudiante_seleccionado}',
-                markers=True
-            )
-            fig_historial.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
-            st.plotly_chart(fig_historial)
+            with instrumentacion.span('grafico.historial'):
+                fig_historial = px.line(
+                    historial_real,
+                    x='Semana',
+                    y='Promedio',
+                    title=f'Evolución del Promedio - {etiqueta(estudiante_seleccionado)}',
+                    markers=True
+                )
+                fig_historial.add_hline(y=11, line_dash="dash", line_color="red", annotation_text="Límite Aprobación")
+                st.plotly_chart(fig_historial)
+
+@instrumentacion.medir()
+def mostrar_descarga_calificaciones(dataset):
+    """Genera la descarga del registro del dataset solo cuando se pide y la reutiliza mientras no cambie"""
+    formato = st.radio("Formato", list(ingesta.FORMATOS_EXPORTACION), horizontal=True, key="formato_descarga",
+                       help="CSV y Parquet se generan mucho más rápido que Excel en registros grandes")
+    exportar, extension, mime = ingesta.FORMATOS_EXPORTACION[formato]
+    
+    # Descargas ya generadas de esta sesión, por (dataset, versión de su registro, formato)
+    version = (dataset, cargar_almacen_calificaciones().version(dataset))
+    descargas = st.session_state.setdefault('descargas_calificaciones', {})
+    clave = (version, formato)
+    
+    if clave not in descargas:
+        if not st.button(f"⚙️ Preparar {formato}", use_container_width=True):
+            return
+        try:
+            with st.spinner(f"Generando {formato}..."), instrumentacion.span(f"exportar.{extension}"):
+                datos = exportar(cargar_almacen_calificaciones().cargar(dataset=dataset))
+        except Exception as e:
+            st.error(f"❌ Error al generar el archivo {formato}: {e}")
+            return
+        # Solo se conserva la versión actual del registro
+        descargas = {c: d for c, d in descargas.items() if c[0] == version}
+        descargas[clave] = datos
+        st.session_state.descargas_calificaciones = descargas
+    
+    st.download_button(
+        label=f"📥 Descargar {formato} Completo",
+        data=descargas[clave],
+        file_name=f"calificaciones_estudiantes_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}",
+        mime=mime,
+        use_container_width=True
+    )
 
-def mostrar_ingreso_calificaciones():
+def mostrar_ingreso_calificaciones(contexto):
     st.header("📝 Ingreso de Calificaciones Semanales")
     
-    # Inicializar el DataFrame en session_state si no existe
-    if 'calificaciones_guardadas' not in st.session_state:
-        st.session_state.calificaciones_guardadas = pd.DataFrame()
+    almacen = cargar_almacen_calificaciones()
     
     with st.form("formulario_calificaciones"):
         st.subheader("Datos de la Semana")
@@ -686,7 +939,8 @@ def mostrar_ingreso_calificaciones():
         col1, col2 = st.columns(2)
         
         with col1:
-            estudiante = st.selectbox("Estudiante", ESTUDIANTES, key="ingreso")
+            opciones, etiqueta = opciones_estudiantes(contexto)
+            estudiante = st.selectbox("Estudiante", opciones, format_func=etiqueta, key="ingreso")
             semana = st.number_input("Semana", min_value=1, max_value=36, value=1)
             
             fecha_inicio = st.date_input("Fecha Inicio")
@@ -704,7 +958,7 @@ def mostrar_ingreso_calificaciones():
         cols = st.columns(4)
         calificaciones = {}
         
-        for i, curso in enumerate(CURSOS):
+        for i, curso in enumerate(contexto.cursos):
             with cols[i % 4]:
                 calificaciones[curso] = st.number_input(
                     f"{curso}", 
@@ -718,96 +972,80 @@ def mostrar_ingreso_calificaciones():
         submitted = st.form_submit_button("💾 Guardar Calificaciones en Excel")
         
         if submitted:
-            # Calcular métricas
-            promedio = sum(calificaciones.values()) / len(calificaciones)
+            datos_trabajo = contexto.df
+            id_estudiante, estudiante, identificacion = identificar_estudiante(contexto, estudiante)
             
             # Crear nuevo registro
-            nuevo_registro = {
-                'ID_Estudiante': ESTUDIANTES.index(estudiante) + 1,
+            registro = {
+                'ID_Estudiante': id_estudiante,
                 'Alumno': estudiante,
+                **identificacion,
                 'Semana': semana,
                 'Fecha Inicio': fecha_inicio.strftime('%d/%m/%Y'),
                 'Fecha Fin': fecha_fin.strftime('%d/%m/%Y'),
                 **calificaciones,
                 'Clases Asistidas': clases_asistidas,
-                'Clases Totales': clases_totales,
-                'Promedio': round(promedio, 2),
-                'Asistencia (%)': round(asistencia_porcentaje, 2),
-                'Progreso Académico (%)': 0,
-                'Desempeño academico': 'Excelente' if promedio >= 16 else 
-                                      'Bueno' if promedio >= 14 else 
-                                      'Regular' if promedio >= 11 else 'En Riesgo'
+                'Clases Totales': clases_totales
             }
             
-            # Convertir a DataFrame
-            nuevo_df = pd.DataFrame([nuevo_registro])
-            
-            # Combinar con datos existentes
-            if st.session_state.calificaciones_guardadas.empty:
-                st.session_state.calificaciones_guardadas = nuevo_df
-            else:
-                # Verificar si ya existe un registro para este estudiante en esta semana
-                existe_registro = st.session_state.calificaciones_guardadas[
-                    (st.session_state.calificaciones_guardadas['Alumno'] == estudiante) & 
-                    (st.session_state.calificaciones_guardadas['Semana'] == semana)
-                ]
-                
-                if not existe_registro.empty:
-                    # Actualizar registro existente
-                    st.session_state.calificaciones_guardadas = st.session_state.calificaciones_guardadas[
-                        ~((st.session_state.calificaciones_guardadas['Alumno'] == estudiante) & 
-                          (st.session_state.calificaciones_guardadas['Semana'] == semana))
-                    ]
-                
-                st.session_state.calificaciones_guardadas = pd.concat(
-                    [st.session_state.calificaciones_guardadas, nuevo_df], 
-                    ignore_index=True
+            if not datos_trabajo.empty and 'ID_Estudiante' in datos_trabajo.columns:
+                # Integrar al dataset de trabajo recalculando solo lo afectado
+                datos_trabajo, registro_calculado, semanas_afectadas = metricas.actualizar_registro(
+                    datos_trabajo, registro, contexto.cursos
                 )
+                contexto.reemplazar_datos(datos_trabajo, semanas_afectadas)
+                
+                # Modo incremental: el modelo aprende el registro sin reentrenar
+                resultados_incremental = actualizar_modelo_incremental(pd.DataFrame([registro_calculado]), contexto)
+                if resultados_incremental is not None:
+                    st.success(f"⚡ Modelo actualizado incrementalmente ({resultados_incremental['tiempo_total'] * 1000:.0f} ms)")
+            else:
+                registro_calculado = metricas.calcular_metricas(pd.DataFrame([registro]), contexto.cursos).iloc[0].to_dict()
+            
+            nuevo_registro = {
+                **registro,
+                'Promedio': registro_calculado['Promedio'],
+                'Asistencia (%)': registro_calculado['Asistencia (%)'],
+                'Progreso Académico (%)': registro_calculado['Progreso Académico (%)'],
+                'Desempeño academico': registro_calculado['Desempeño academico']
+            }
+            
+            # Guardar en el registro durable (reemplaza la semana si el estudiante ya la tenía)
+            try:
+                almacen.guardar(nuevo_registro, contexto.cursos, contexto.dataset)
+            except Exception as e:
+                st.error(f"❌ Error al guardar en el registro de calificaciones: {e}")
+                return
             
             st.success(f"✅ Calificaciones de {estudiante} guardadas exitosamente para la semana {semana}!")
     
     # Mostrar el botón para ver el Excel y el resumen
     st.markdown("---")
     
+    # Totales calculados en SQLite (sin cargar el registro completo en cada ejecución)
+    resumen = almacen.resumen(contexto.dataset)
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        if not st.session_state.calificaciones_guardadas.empty:
-            # Crear Excel en memoria
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                st.session_state.calificaciones_guardadas.to_excel(writer, sheet_name='Calificaciones', index=False)
-            
-            excel_data = output.getvalue()
-            
-            st.download_button(
-                label="📥 Descargar Excel Completo",
-                data=excel_data,
-                file_name=f"calificaciones_estudiantes_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+        if resumen['registros']:
+            mostrar_descarga_calificaciones(contexto.dataset)
     
     with col2:
-        if not st.session_state.calificaciones_guardadas.empty:
+        if resumen['registros']:
             if st.button("👁️ Ver Excel Actualizado", use_container_width=True):
                 st.subheader("📊 Vista Previa del Excel")
                 
-                # Mostrar estadísticas rápidas
-                total_registros = len(st.session_state.calificaciones_guardadas)
-                estudiantes_unicos = st.session_state.calificaciones_guardadas['Alumno'].nunique()
-                semanas_unicas = st.session_state.calificaciones_guardadas['Semana'].nunique()
-                
                 col_stats1, col_stats2, col_stats3 = st.columns(3)
                 with col_stats1:
-                    st.metric("Total Registros", total_registros)
+                    st.metric("Total Registros", resumen['registros'])
                 with col_stats2:
-                    st.metric("Estudiantes", estudiantes_unicos)
+                    st.metric("Estudiantes", resumen['estudiantes'])
                 with col_stats3:
-                    st.metric("Semanas", semanas_unicas)
+                    st.metric("Semanas", resumen['semanas'])
                 
-                # Mostrar datos ordenados
-                df_ordenado = st.session_state.calificaciones_guardadas.sort_values(['Semana', 'Alumno'])
+                # Mostrar datos ordenados (el registro ya se lee ordenado por semana y alumno)
+                df_ordenado = almacen.cargar(dataset=contexto.dataset)
                 st.dataframe(df_ordenado, use_container_width=True)
                 
                 # Mostrar resumen por estudiante
@@ -821,7 +1059,7 @@ def mostrar_ingreso_calificaciones():
                 st.dataframe(resumen_estudiantes, use_container_width=True)
     
     # Mostrar estado actual siempre visible
-    if not st.session_state.calificaciones_guardadas.empty:
+    if resumen['registros']:
         st.markdown("---")
         st.subheader("📋 Estado Actual del Registro")
         
@@ -829,18 +1067,82 @@ def mostrar_ingreso_calificaciones():
         col_res1, col_res2, col_res3, col_res4 = st.columns(4)
         
         with col_res1:
-            st.metric("Registros Totales", len(st.session_state.calificaciones_guardadas))
+            st.metric("Registros Totales", resumen['registros'])
         with col_res2:
-            st.metric("Estudiantes Registrados", st.session_state.calificaciones_guardadas['Alumno'].nunique())
+            st.metric("Estudiantes Registrados", resumen['estudiantes'])
         with col_res3:
-            st.metric("Semanas Capturadas", st.session_state.calificaciones_guardadas['Semana'].nunique())
+            st.metric("Semanas Capturadas", resumen['semanas'])
         with col_res4:
-            promedio_general = st.session_state.calificaciones_guardadas['Promedio'].mean()
-            st.metric("Promedio General", f"{promedio_general:.1f}")
+            st.metric("Promedio General", f"{resumen['promedio']:.1f}")
     
     else:
         st.info("ℹ️ Aún no se han guardado calificaciones. Usa el formulario arriba para comenzar.")
 
+def mostrar_estado_entrenamiento():
+    """Muestra el avance del entrenamiento en segundo plano (se refresca solo mientras corre)"""
+    trabajo_id = st.session_state.get('trabajo_entrenamiento') or gestor_entrenamiento.activo()
+    if trabajo_id is None:
+        return
+    
+    def panel():
+        gestor_entrenamiento.actualizar()
+        estado = gestor_entrenamiento.estado(trabajo_id)
+        if estado is None:
+            return
+        
+        if estado['estado'] in (entrenamiento.PENDIENTE, entrenamiento.EJECUTANDO):
+            st.progress(estado['progreso'], text=f"🧠 Trabajo {estado['id']}: {estado['mensaje']} ({estado['duracion']:.0f}s)")
+            if st.button("⛔ Cancelar Entrenamiento", key="cancelar_entrenamiento"):
+                gestor_entrenamiento.cancelar(trabajo_id)
+                st.rerun(scope="app")
+        elif estado['estado'] == entrenamiento.COMPLETADO:
+            # Al terminar, recargar toda la app una vez para usar el predictor nuevo
+            if st.session_state.get('entrenamiento_aplicado') != trabajo_id:
+                st.session_state.entrenamiento_aplicado = trabajo_id
+                st.rerun(scope="app")
+            resultados = estado['resultados']
+            st.success(f"✅ Modelos entrenados exitosamente! ({estado['duracion']:.1f}s)")
+            st.metric("Árbol de Decisión", f"{resultados['arbol_accuracy']:.2%}",
+                      f"{resultados['arbol_tiempo']:.2f}s", delta_color="off")
+            st.metric(f"SVM ({estado['motor_svm']})", f"{resultados['svm_accuracy']:.2%}",
+                      f"{resultados['svm_tiempo']:.2f}s", delta_color="off")
+            st.metric("KNN", f"{resultados['knn_accuracy']:.2%}",
+                      f"{resultados['knn_tiempo']:.2f}s", delta_color="off")
+            st.caption(f"⏱️ Entrenamiento paralelo: {resultados['tiempo_total']:.2f}s")
+        elif estado['estado'] == entrenamiento.CANCELADO:
+            st.warning(f"⛔ Entrenamiento {estado['id']} cancelado")
+        else:
+            st.error(f"❌ Error en entrenamiento: {estado['mensaje']}")
+    
+    en_curso = gestor_entrenamiento.activo() == trabajo_id
+    st.fragment(panel, run_every=1 if en_curso else None)()
+
+# Rol de usuario que ve el panel de rendimiento
+ROL_ADMIN = 'admin'
+
+def mostrar_panel_rendimiento(vista):
+    """Panel de administración con el desglose de tiempos de la ejecución actual"""
+    registro = instrumentacion.finalizar_ejecucion(vista=vista, usuario=st.session_state.get('usuario'))
+    if registro is None:
+        return
+    
+    # La medición se registra para todos; el panel solo lo ven los administradores
+    if st.session_state.get('rol') != ROL_ADMIN:
+        return
+    
+    historial = st.session_state.setdefault('historial_rendimiento', [])
+    historial.append(registro['total_ms'])
+    del historial[:-50]
+    
+    with st.sidebar.expander("🛠️ Rendimiento (admin)"):
+        st.metric("Ejecución actual", f"{registro['total_ms']:.0f} ms",
+                  f"media {np.mean(historial):.0f} ms en {len(historial)}", delta_color="off")
+        spans = pd.DataFrame(registro['spans'], columns=['nombre', 'nivel', 'inicio_ms', 'ms'])
+        if not spans.empty:
+            spans['Span'] = ['\u00a0\u00a0' * nivel + nombre for nivel, nombre in zip(spans['nivel'], spans['nombre'])]
+            st.dataframe(spans[['Span', 'ms']], use_container_width=True, hide_index=True)
+        st.caption(f"📄 Log: {instrumentacion.RUTA_LOG}")
+
 def main():
 
     # === AGREGAR ESTA LÍNEA AL INICIO DE main() ===
@@ -853,50 +1155,101 @@ def main():
     st.sidebar.header("Configuración del Sistema")
     
     # Cargar datos - AHORA SOPORTA CSV
-    archivo = st.sidebar.file_uploader("Cargar archivo (Excel o CSV)", type=['xlsx', 'csv'])
+    archivos = st.sidebar.file_uploader(
+        "Cargar archivos (Excel o CSV, uno por sección)", type=['xlsx', 'csv'], accept_multiple_files=True
+    )
+    
+    # file_id cambia con cada subida: un archivo corregido con el mismo nombre y tamaño se vuelve a cargar
+    # (si el contenido no cambió, la caché de ingesta lo encuentra por su huella)
+    clave_datos = tuple(archivo.file_id for archivo in archivos) if archivos else 'ejemplo'
     
-    if archivo is not None:
+    if archivos:
         try:
-            if archivo.name.endswith('.csv'):
-                df = pd.read_csv(archivo, dtype=str)  # ← CORREGIDO: agregado dtype=str
-            else:
-                df = pd.read_excel(archivo)
-            
-            # ← CORREGIDO: Agregada esta línea para formatear fechas
-            df = formatear_fechas_df(df)
-            
-            # Actualizar listas globales con los datos reales
-            actualizar_listas_desde_dataframe(df)
-            
-            # Calcular métricas
-            df = calcular_metricas(df)
+            # Cada sesión tiene su propio contexto; el dataset compartido de la caché no se modifica
+            contexto = contexto_sesion()
+            if contexto.clave != clave_datos:
+                datos = cargar_archivo(archivos[0]) if len(archivos) == 1 else cargar_archivos(archivos)
+                # Las calificaciones guardadas se asocian a los archivos por nombre (sobreviven a una corrección)
+                contexto = establecer_contexto(*datos, clave_datos, ' + '.join(sorted(archivo.name for archivo in archivos)))
+            df = contexto.df
             
             st.sidebar.success(f"✅ Datos cargados exitosamente!")
-            st.sidebar.info(f"📊 {len(df)} registros | 👨‍🎓 {len(ESTUDIANTES)} estudiantes | 📚 {len(CURSOS)} cursos")
+            st.sidebar.info(f"📊 {len(df)} registros | 👨‍🎓 {len(contexto.estudiantes)} estudiantes | 📚 {len(contexto.cursos)} cursos")
             
             # Mostrar vista previa de los datos
             with st.sidebar.expander("🔍 Vista previa de datos"):
                 st.dataframe(df.head(3), use_container_width=True)
+                estadisticas_cache = cargar_cache_ingesta().estadisticas()
+                st.caption(
+                    f"⚡ Caché de archivos: {estadisticas_cache['entradas']} en memoria | "
+                    f"{estadisticas_cache['mb_usados']:.1f}/{estadisticas_cache['mb_maximo']:.0f} MB | "
+                    f"{estadisticas_cache['aciertos']} aciertos"
+                )
+            
+            informe = st.session_state.get('informe_ingesta')
+            if informe:
+                mostrar_informe_ingesta(informe)
+            informe = st.session_state.get('informe_secciones')
+            if informe:
+                mostrar_informe_secciones(informe)
                 
         except Exception as e:
             st.sidebar.error(f"❌ Error al cargar archivo: {e}")
-            df = pd.DataFrame()
+            contexto = ContextoDatos(pd.DataFrame(), [], [])
+            df = contexto.df
+    elif almacen_parquet.existe_dataset() and st.sidebar.radio(
+            "Fuente de datos", ["Almacén Parquet", "Datos de ejemplo"]) == "Almacén Parquet":
+        try:
+            contexto = cargar_desde_parquet()
+            df = contexto.df
+            st.sidebar.info(f"📊 {len(df)} registros | 👨‍🎓 {len(contexto.estudiantes)} estudiantes | 📚 {len(contexto.cursos)} cursos")
+        except Exception as e:
+            st.sidebar.error(f"❌ Error al leer el almacén Parquet: {e}")
+            contexto = ContextoDatos(pd.DataFrame(), [], [])
+            df = contexto.df
     else:
         # Datos de ejemplo
         st.sidebar.info("ℹ️ Usando datos de ejemplo. Carga un archivo CSV o Excel para usar tus propios datos.")
-        df = generar_datos_ejemplo()
-        actualizar_listas_desde_dataframe(df)
+        contexto = contexto_sesion()
+        if contexto.clave != clave_datos:
+            contexto = establecer_contexto(*generar_datos_ejemplo(), clave_datos, 'ejemplo')
+        df = contexto.df
+    
+    st.sidebar.toggle(
+        "⚡ Actualización incremental", key="modo_incremental",
+        help="Los registros nuevos actualizan el modelo en milisegundos; el reentrenamiento completo se hace solo con el botón."
+    )
     
-    # Entrenar modelos si hay datos
+    # Usar un modelo guardado compatible con los datos (si existe)
+    sincronizar_modelo(contexto)
+    
+    # Entrenar modelos si hay datos (en segundo plano)
     if not df.empty and len(df) > 10:
-        if st.sidebar.button("🔧 Entrenar Modelos de Predicción"):
-            with st.spinner("Entrenando modelos de IA..."):
-                resultados = predictor.entrenar_modelos(df)
-                if resultados:
-                    st.sidebar.success("✅ Modelos entrenados exitosamente!")
-                    st.sidebar.metric("Árbol de Decisión", f"{resultados['arbol_accuracy']:.2%}")
-                    st.sidebar.metric("SVM", f"{resultados['svm_accuracy']:.2%}")
-                    st.sidebar.metric("KNN", f"{resultados['knn_accuracy']:.2%}")
+        entrenando = gestor_entrenamiento.activo() is not None
+        if st.sidebar.button("🔧 Entrenar Modelos de Predicción", disabled=entrenando):
+            st.session_state.trabajo_entrenamiento = gestor_entrenamiento.enviar(
+                df, contexto.huella(), elegir_motor_svm(len(df), st.session_state.get('modo_incremental', False)),
+                esquema.inferir_esquema(df)
+            )
+        metadatos_modelo = (contexto.modelo_registro[1] if contexto.modelo_registro
+                            else gestor_entrenamiento.metadatos_modelo)
+        if metadatos_modelo:
+            st.sidebar.caption(f"🗂️ Modelo {metadatos_modelo['version']} ({metadatos_modelo['fecha'].replace('T', ' ')})")
+        if st.session_state.get('modo_incremental') and predictor.entrenado and not predictor.admite_incremental():
+            st.sidebar.caption("ℹ️ Reentrena los modelos para habilitar la actualización incremental.")
+        elif predictor.actualizaciones:
+            st.sidebar.caption(f"⚡ {predictor.actualizaciones} actualizaciones incrementales desde el último reentrenamiento")
+        if gestor_entrenamiento.cambios_sin_guardar() and st.sidebar.button(
+            "💾 Guardar modelo actualizado",
+            help="Las actualizaciones incrementales se guardan solas cada pocos minutos; esto las guarda ya."
+        ):
+            if gestor_entrenamiento.guardar_cambios() is None:
+                st.sidebar.error("❌ No se pudo guardar el modelo")
+            else:
+                st.sidebar.success("✅ Modelo guardado en el registro")
+    
+    with st.sidebar:
+        mostrar_estado_entrenamiento()
     
     # Navegación
     opcion = st.sidebar.selectbox(
@@ -906,15 +1259,17 @@ def main():
     )
     
     if opcion == "📊 Dashboard General":
-        mostrar_dashboard_general(df)
+        mostrar_dashboard_general(contexto)
     elif opcion == "👨‍🎓 Monitoreo por Semana":
-        mostrar_monitoreo_semanal(df)
+        mostrar_monitoreo_semanal(contexto)
     elif opcion == "🔮 Predicción de Riesgo":
-        mostrar_prediccion_riesgo(df)
+        mostrar_prediccion_riesgo(contexto)
     elif opcion == "📈 Trayectoria Académica":
-        mostrar_trayectoria_academica(df)
+        mostrar_trayectoria_academica(contexto)
     elif opcion == "📝 Ingreso de Calificaciones":
-        mostrar_ingreso_calificaciones()
+        mostrar_ingreso_calificaciones(contexto)
+    
+    mostrar_panel_rendimiento(opcion)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
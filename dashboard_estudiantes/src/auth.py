@@ -1,29 +1,26 @@
 import streamlit as st
-import hashlib
-import re
 
-# Configuración de usuarios (en producción usar base de datos)
-USUARIOS = {
-    "zegarra": {
-        "password": "zegarra123",
-        "nombre": "Profesor Zegarra",
-        "rol": "profesor",
-        "grado": "6to Primaria"
-    }
-}
+import instrumentacion
+from almacen_usuarios import AlmacenUsuarios
 
-def hash_password(password):
-    """Hashea la contraseña para mayor seguridad"""
-    return hashlib.sha256(password.encode()).hexdigest()
+# Usuarios con contraseñas hasheadas (compartido por las sesiones)
+@st.cache_resource
+def cargar_almacen_usuarios():
+    return AlmacenUsuarios()
 
 def verificar_login(usuario, password):
-    """Verifica las credenciales del usuario"""
-    if usuario in USUARIOS:
-        # En este caso simple, comparamos directamente
-        # En producción compararíamos hashes
-        if USUARIOS[usuario]["password"] == password:
-            return True
-    return False
+    """Verifica las credenciales; devuelve (datos del usuario, None) o (None, mensaje de error)"""
+    return cargar_almacen_usuarios().autenticar(usuario, password)
+
+def iniciar_sesion(datos_usuario, token):
+    """Guarda en la sesión el usuario autenticado y su token firmado"""
+    st.session_state.logged_in = True
+    st.session_state.usuario = datos_usuario['usuario']
+    st.session_state.nombre = datos_usuario['nombre']
+    st.session_state.rol = datos_usuario['rol']
+    st.session_state.grado = datos_usuario['grado']
+    # Solo en la sesión del servidor: nunca en la URL (un enlace copiado daría acceso)
+    st.session_state.token_sesion = token
 
 def mostrar_login():
     """Muestra la interfaz de login"""
@@ -288,6 +285,10 @@ def mostrar_login():
                 
             st.markdown('<div class="login-title">SISTEMA DE MONITOREO Y PREDICCIÓN</div>', unsafe_allow_html=True)
                 
+            if not cargar_almacen_usuarios().listar():
+                st.info("ℹ️ No hay usuarios registrados. Créelos con: "
+                        "python dashboard_estudiantes/src/almacen_usuarios.py agregar <usuario>")
+            
             # Formulario de login
             with st.form("login_form"):
                     st.markdown('<div class="access-title">ACCESO PROFESORES</div>', unsafe_allow_html=True)
@@ -311,40 +312,29 @@ def mostrar_login():
                         if not usuario or not password:
                             st.error("❌ Por favor complete todos los campos")
                         else:
-                            with st.spinner("🔐 Verificando credenciales..."):
-                                import time
-                                time.sleep(1.5)
-                                
-                                if verificar_login(usuario, password):
-                                    st.session_state.logged_in = True
-                                    st.session_state.usuario = usuario
-                                    st.session_state.nombre = USUARIOS[usuario]["nombre"]
-                                    st.session_state.rol = USUARIOS[usuario]["rol"]
-                                    st.session_state.grado = USUARIOS[usuario]["grado"]
-                                    
-                                    st.success(f"✅ ¡Bienvenido/a {USUARIOS[usuario]['nombre']}!")
-                                    
-                                    st.markdown(
-                                        """
-                                        <div class="loading-spinner">
-                                            <p>⏳ Cargando sistema, por favor espere...</p>
-                                        </div>
-                                        """, 
-                                        unsafe_allow_html=True
-                                    )
-                                    
-                                    time.sleep(2)
-                                    st.rerun()
-                                else:
-                                    st.error("❌ Usuario o contraseña incorrectos")
+                            with st.spinner("🔐 Verificando credenciales..."), instrumentacion.span('auth.login'):
+                                datos_usuario, error = verificar_login(usuario, password)
+                                if datos_usuario:
+                                    iniciar_sesion(datos_usuario, cargar_almacen_usuarios().emitir_token(usuario))
+                            
+                            if datos_usuario:
+                                st.rerun()
+                            else:
+                                st.error(f"❌ {error}")
                 
 
 def verificar_autenticacion():
-    """Verifica si el usuario está autenticado"""
-    if not st.session_state.get('logged_in'):
-        mostrar_login()
-        st.stop()
-    return True
+    """Verifica si el usuario está autenticado con un token de sesión vigente (vence o se revoca al cerrar sesión)"""
+    if st.session_state.get('logged_in'):
+        # Los reruns solo validan la firma del token (sin volver a derivar la contraseña)
+        if cargar_almacen_usuarios().validar_token(st.session_state.get('token_sesion', '')):
+            return True
+        for key in list(st.session_state.keys()):
+            del st.session_state[key]
+        st.warning("⏳ La sesión venció. Ingrese nuevamente.")
+    
+    mostrar_login()
+    st.stop()
 
 def mostrar_logout():
     """Muestra el botón de logout en el sidebar"""
@@ -354,6 +344,8 @@ def mostrar_logout():
         st.sidebar.markdown(f"**🏫 Grado:** {st.session_state.get('grado', '')}")
         
         if st.sidebar.button("🚪 Cerrar Sesión"):
+            if st.session_state.get('token_sesion'):
+                cargar_almacen_usuarios().revocar_token(st.session_state.token_sesion)
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.rerun()
\ No newline at end of file
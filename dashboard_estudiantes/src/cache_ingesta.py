@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+
+# Límite de memoria de la caché (MB) y carpeta opcional para volcar a disco
+CACHE_INGESTA_MB = int(os.environ.get('CACHE_INGESTA_MB', '512'))
+CACHE_INGESTA_DIR = os.environ.get('CACHE_INGESTA_DIR', '')
+
+
+def huella_contenido(datos):
+    """Calcula la huella (hash) del contenido de un archivo"""
+    return hashlib.sha256(datos).hexdigest()
+
+
+def copia_compartida(df):
+    """Copia para una sesión: perezosa si pandas usa copy-on-write (comparte los datos hasta que se modifican)"""
+    return df.copy(deep=pd.options.mode.copy_on_write is not True)
+
+
+def tamano_dataframe(df):
+    """Estima la memoria que ocupa un DataFrame en bytes"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+class CacheIngesta:
+    """Caché LRU de archivos ya procesados, indexada por la huella de su contenido.
+
+    Los DataFrames guardados no se modifican: obtener() entrega a cada sesión una copia
+    con copia_compartida, así que varias sesiones con el mismo archivo comparten una sola
+    copia en memoria mientras no lo modifiquen.
+    """
+
+    def __init__(self, max_bytes=CACHE_INGESTA_MB * 1024 * 1024, directorio=CACHE_INGESTA_DIR or None):
+        self.max_bytes = max_bytes
+        self.directorio = directorio
+        self.entradas = OrderedDict()
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.lock = threading.Lock()
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+
+    def _ruta_disco(self, huella):
+        return os.path.join(self.directorio, f"{huella}.joblib")
+
+    def obtener(self, huella):
+        """Devuelve la entrada procesada (o None) y la marca como usada recientemente"""
+        with self.lock:
+            entrada = self.entradas.get(huella)
+            if entrada is not None:
+                self.entradas.move_to_end(huella)
+                self.aciertos += 1
+                return {**entrada, 'df': copia_compartida(entrada['df'])}
+
+        # Buscar en disco si la entrada fue desalojada de memoria
+        if self.directorio and os.path.exists(self._ruta_disco(huella)):
+            try:
+                entrada = joblib.load(self._ruta_disco(huella))
+                self.guardar(huella, **entrada)
+                with self.lock:
+                    self.aciertos += 1
+                return {**entrada, 'df': copia_compartida(entrada['df'])}
+            except Exception as e:
+                print(f"Error al leer caché de disco: {e}")
+
+        with self.lock:
+            self.fallos += 1
+        return None
+
+    def guardar(self, huella, df, **extra):
+        """Guarda un DataFrame procesado (y datos asociados) desalojando los menos usados"""
+        entrada = {'df': df, **extra}
+        tamano = tamano_dataframe(df)
+
+        with self.lock:
+            if huella in self.entradas:
+                self.bytes_usados -= self.entradas.pop(huella)['_bytes']
+
+            if tamano > self.max_bytes:
+                # Nunca cabría en memoria: no se desaloja nada por ella (solo se vuelca a disco)
+                desalojadas = [(huella, {**entrada, '_bytes': tamano})]
+            else:
+                desalojadas = []
+                while self.entradas and self.bytes_usados + tamano > self.max_bytes:
+                    huella_vieja, vieja = self.entradas.popitem(last=False)
+                    self.bytes_usados -= vieja['_bytes']
+                    desalojadas.append((huella_vieja, vieja))
+                self.entradas[huella] = {**entrada, '_bytes': tamano}
+                self.bytes_usados += tamano
+
+        # Volcar a disco fuera del lock para no bloquear a otras sesiones
+        if self.directorio:
+            for huella_vieja, vieja in desalojadas:
+                ruta = self._ruta_disco(huella_vieja)
+                if not os.path.exists(ruta):
+                    try:
+                        joblib.dump({k: v for k, v in vieja.items() if k != '_bytes'}, ruta)
+                    except Exception as e:
+                        print(f"Error al volcar caché a disco: {e}")
+
+    def limpiar(self):
+        """Vacía la caché en memoria"""
+        with self.lock:
+            self.entradas.clear()
+            self.bytes_usados = 0
+
+    def estadisticas(self):
+        """Resumen del estado de la caché"""
+        with self.lock:
+            return {
+                'entradas': len(self.entradas),
+                'mb_usados': self.bytes_usados / (1024 * 1024),
+                'mb_maximo': self.max_bytes / (1024 * 1024),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+            }
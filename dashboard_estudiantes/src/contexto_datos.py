@@ -0,0 +1,61 @@
+import esquema
+import metricas
+from registro_modelos import huella_dataset
+
+
+class ContextoDatos:
+    """Dataset de trabajo de una sesión con sus listas y resúmenes derivados.
+
+    Cada sesión tiene el suyo (en st.session_state), así que las listas de estudiantes y
+    cursos de una sesión no se mezclan con las de otra. El DataFrame suele ser una copia
+    perezosa (copy-on-write) del dataset compartido en la caché de ingesta. `dataset` nombra
+    su registro de calificaciones guardadas (archivos cargados, sección del almacén o ejemplo).
+    """
+
+    def __init__(self, df, estudiantes, cursos, clave=None, dataset=''):
+        self.clave = clave
+        self.dataset = dataset
+        self.estudiantes = list(estudiantes)
+        self.cursos = list(cursos)
+        self.df = df
+        self._agregados = None
+        self._indice = None
+        self._huella = None
+        self._caracteristicas = None
+        # (predictor, metadatos) del registro cuando el modelo compartido no sirve para este dataset
+        self.modelo_registro = None
+
+    def reemplazar_datos(self, df, semanas_afectadas=None):
+        """Cambia el dataset de trabajo; los agregados se actualizan solo en las semanas afectadas"""
+        self.df = df
+        if self._agregados is not None and semanas_afectadas is not None:
+            self._agregados.actualizar_semanas(df, semanas_afectadas)
+        else:
+            self._agregados = None
+        self._indice = None
+        self._huella = None
+        self._caracteristicas = None
+
+    def agregados_semanales(self):
+        """Agregados por semana del dataset (se calculan una vez por dataset)"""
+        if self._agregados is None:
+            self._agregados = metricas.AgregadosSemanales(self.df)
+        return self._agregados
+
+    def indice_estudiantes(self):
+        """Índice (estudiante, semana) del dataset (se construye una vez por versión)"""
+        if self._indice is None:
+            self._indice = metricas.IndiceEstudiantes(self.df)
+        return self._indice
+
+    def huella(self):
+        """Huella del dataset de trabajo (se calcula una vez por versión)"""
+        if self._huella is None:
+            self._huella = huella_dataset(self.df, self.df.columns)
+        return self._huella
+
+    def caracteristicas(self):
+        """Características que usaría el predictor con este dataset (se calculan una vez por versión)"""
+        if self._caracteristicas is None:
+            self._caracteristicas = esquema.inferir_esquema(self.df).caracteristicas(self.df.columns)
+        return self._caracteristicas
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import metricas
+
+NOMBRES_EJEMPLO = [
+    "Adriana Beatriz León Vargas", "Ariana Michelle León Cordero",
+    "Andrés Felipe Guerrero Soto", "Camila Estefanía Salazar Vega",
+    "Carlos Andrés Herrera Medina", "Carmen Rosa Méndez Fuentes",
+    "Dafne Isabel Castro Díaz", "Daniela Estefanía Vásquez Ruiz",
+    "Diana Sofia Campos Díaz", "Eduardo Enrique Prado Jiménez",
+    "Felipe Augusto Espinoza Torres", "Gabriela Isabel Ríos Medina",
+    "Gisela Emilia Contreras Mendizábal", "Hugo Francisco Mendoza Rojas",
+    "Jorge Eduardo Salazar Peña", "José Antonio Díaz Romero",
+    "Juan Carlos Morales Miranda", "Laura Valentina Paredes Silva",
+    "Luciana Andrea Vásquez Romero", "Luis Alberto García Pérez",
+    "Magdalena Alejandra Torres Mendoza", "María Fernanda Gutiérrez Rojas",
+    "Naomi Emilia Cervantes Herrera", "Natalia Eugenia Chávez Herrera",
+    "Pablo Daniel Cabrera Luna", "Paula Renata Gómez Silva",
+    "Renata Alejandra Olivos Díaz", "Ricardo José Navarro Campos",
+    "Sofía Camila Gutiérrez Salazar", "Sonia Valentina Quispe López",
+    "Valeria Alejandra Paredes Flores"
+]
+
+CURSOS_EJEMPLO = [
+    'Comunicación', 'Matemática', 'Ciencia y Tecnología',
+    'Personal Social', 'Educación Religiosa', 'Educación Física',
+    'Arte', 'Inglés'
+]
+
+# FECHA ACTUALIZADA A 2025
+FECHA_BASE = datetime(2025, 4, 14)
+
+
+def nombres_estudiantes(n_estudiantes):
+    """Devuelve n nombres: primero los de ejemplo y luego nombres numerados"""
+    nombres = NOMBRES_EJEMPLO[:n_estudiantes]
+    nombres += [f"Estudiante {i:06d}" for i in range(len(nombres) + 1, n_estudiantes + 1)]
+    return nombres
+
+
+def nombres_cursos(n_cursos):
+    """Devuelve n cursos: primero los de ejemplo y luego cursos numerados"""
+    cursos = CURSOS_EJEMPLO[:n_cursos]
+    cursos += [f"Curso {i}" for i in range(len(cursos) + 1, n_cursos + 1)]
+    return cursos
+
+
+@lru_cache(maxsize=4)
+def _generar_datos(n_estudiantes, n_semanas, n_cursos, seed):
+    rng = np.random.default_rng(seed)
+    cursos = nombres_cursos(n_cursos)
+    n_filas = n_estudiantes * n_semanas
+
+    # Índices por fila (estudiante-semana), ordenados por estudiante y semana
+    id_estudiante = np.repeat(np.arange(1, n_estudiantes + 1), n_semanas)
+    semana = np.tile(np.arange(1, n_semanas + 1), n_estudiantes)
+    en_riesgo = id_estudiante % 5 == 0  # Estudiantes en riesgo
+
+    # Promedio base por estudiante y tendencia por semana
+    promedio_base = rng.normal(13, 2, size=n_estudiantes)[id_estudiante - 1]
+    tendencia = np.where(
+        en_riesgo,
+        rng.choice([-0.1, -0.2, 0], p=[0.6, 0.3, 0.1], size=n_filas),
+        rng.choice([0.1, 0.05, 0], p=[0.5, 0.3, 0.2], size=n_filas)
+    )
+
+    # Notas con tendencia progresiva (matriz filas x cursos)
+    nota_base = np.clip(promedio_base[:, None] + rng.normal(0, 1, size=(n_filas, n_cursos)), 0, 20)
+    notas = np.clip(np.round(nota_base + (tendencia * semana)[:, None], 1), 0, 20)
+
+    # Asistencia con tendencia
+    clases_asistidas = np.where(
+        en_riesgo,
+        rng.integers(12, 18, size=n_filas),
+        rng.integers(16, 21, size=n_filas)
+    )
+
+    # Fechas: se formatean una vez por semana y se repiten por estudiante
+    inicios = [FECHA_BASE + timedelta(weeks=s) for s in range(n_semanas)]
+    fechas_inicio = np.array([f.strftime('%d/%m/%Y') for f in inicios], dtype=object)
+    fechas_fin = np.array([(f + timedelta(days=6)).strftime('%d/%m/%Y') for f in inicios], dtype=object)
+    alumnos = np.array(nombres_estudiantes(n_estudiantes), dtype=object)
+
+    df = pd.DataFrame({
+        'ID_Estudiante': id_estudiante,
+        'Alumno': alumnos[id_estudiante - 1],
+        'Semana': semana,
+        'Fecha Inicio': fechas_inicio[semana - 1],
+        'Fecha Fin': fechas_fin[semana - 1],
+        **{curso: notas[:, i] for i, curso in enumerate(cursos)},
+        'Clases Asistidas': clases_asistidas,
+        'Clases Totales': np.full(n_filas, 20, dtype='int64')
+    })
+    return metricas.calcular_metricas(df, cursos)
+
+
+def generar_datos(n_estudiantes=len(NOMBRES_EJEMPLO), n_semanas=36, n_cursos=len(CURSOS_EJEMPLO), seed=42):
+    """Genera datos sintéticos estudiante-semana (memorizados por parámetros)"""
+    return _generar_datos(n_estudiantes, n_semanas, n_cursos, seed).copy()
@@ -0,0 +1,224 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+
+from modelos import PredictorDesempeno
+from registro_modelos import INCREMENTAL, huella_dataset
+
+# Estados posibles de un trabajo de entrenamiento
+PENDIENTE = 'pendiente'
+EJECUTANDO = 'ejecutando'
+COMPLETADO = 'completado'
+CANCELADO = 'cancelado'
+ERROR = 'error'
+
+ESTADOS_FINALES = (COMPLETADO, CANCELADO, ERROR)
+
+# Segundos que una actualización incremental puede esperar antes de guardarse en el registro
+SEGUNDOS_GUARDADO_INCREMENTAL = float(os.environ.get('GUARDADO_INCREMENTAL_SEGUNDOS', '300'))
+
+
+def _entrenar_en_proceso(df, cola, motor_svm, esquema):
+    """Entrena un predictor nuevo en un proceso aparte y envía avance y resultado por la cola"""
+    try:
+        predictor = PredictorDesempeno()
+        resultados = predictor.entrenar_modelos(
+            df, progreso=lambda fraccion, mensaje: cola.put(('progreso', fraccion, mensaje)),
+            motor_svm=motor_svm, esquema=esquema
+        )
+        if resultados is None:
+            cola.put(('error', "No se pudieron entrenar los modelos con los datos actuales"))
+        else:
+            cola.put(('resultado', resultados, predictor))
+    except Exception as e:
+        cola.put(('error', str(e)))
+
+
+class GestorEntrenamientos:
+    """Ejecuta entrenamientos en procesos de fondo y reemplaza el predictor al terminar"""
+
+    def __init__(self, predictor=None, max_procesos=1, registro=None, metadatos_modelo=None):
+        self.predictor = predictor or PredictorDesempeno()
+        self.metadatos_modelo = metadatos_modelo
+        self.registro = registro
+        self.max_procesos = max_procesos
+        self.trabajos = {}
+        self.pendientes = []
+        self.lock = threading.Lock()
+        self.contexto = multiprocessing.get_context('spawn')
+        # Actualización incremental publicada pero aún no guardada: (huella o función que la calcula, resultados)
+        self.incremental_pendiente = None
+        self.pendiente_desde = None
+
+    def activo(self):
+        """ID del trabajo pendiente o en ejecución, si existe"""
+        with self.lock:
+            for trabajo in self.trabajos.values():
+                if trabajo['estado'] in (PENDIENTE, EJECUTANDO):
+                    return trabajo['id']
+        return None
+
+    def actualizar_incremental(self, df, huella=None):
+        """Actualiza una copia del predictor con filas nuevas (partial_fit) y la publica.
+
+        huella puede ser una función: solo se calcula cuando la versión se guarda en el registro,
+        junto con las que lleguen en los siguientes SEGUNDOS_GUARDADO_INCREMENTAL o con guardar_cambios().
+        """
+        with self.lock:
+            if not self.predictor.admite_incremental():
+                return None
+            # Copia para no modificar el predictor que otras sesiones están usando
+            predictor = self.predictor.copia_incremental()
+            resultados = predictor.actualizar_incremental(df)
+            if resultados is None:
+                return None
+            self.predictor = predictor
+            if self.registro is not None and huella is not None:
+                if self.incremental_pendiente is None:
+                    self.pendiente_desde = time.monotonic()
+                self.incremental_pendiente = (huella, resultados)
+                self._guardar_incremental(vencido=True)
+        return resultados
+
+    def cambios_sin_guardar(self):
+        """Indica si hay actualizaciones incrementales que aún no están en el registro"""
+        return self.incremental_pendiente is not None
+
+    def guardar_cambios(self):
+        """Guarda ya en el registro las actualizaciones incrementales pendientes"""
+        with self.lock:
+            return self._guardar_incremental()
+
+    def _guardar_incremental(self, vencido=False):
+        """Guarda la actualización pendiente (con vencido=True, solo si ya esperó el tiempo de guardado)"""
+        if self.incremental_pendiente is None:
+            return None
+        if vencido and time.monotonic() - self.pendiente_desde < SEGUNDOS_GUARDADO_INCREMENTAL:
+            return None
+        huella, resultados = self.incremental_pendiente
+        self.incremental_pendiente = None
+        metadatos = self.registro.guardar(
+            self.predictor, huella() if callable(huella) else huella, resultados, tipo=INCREMENTAL
+        )
+        if metadatos is not None:
+            self.metadatos_modelo = metadatos
+        return metadatos
+
+    def enviar(self, df, huella=None, motor_svm=None, esquema=None):
+        """Envía un entrenamiento en segundo plano (reutiliza el activo para no duplicarlo)"""
+        trabajo_activo = self.activo()
+        if trabajo_activo is not None:
+            return trabajo_activo
+
+        if huella is None and self.registro is not None:
+            huella = huella_dataset(df, df.columns)
+
+        trabajo = {
+            'id': uuid.uuid4().hex[:8],
+            'huella': huella,
+            'motor_svm': motor_svm,
+            'esquema': esquema,
+            'estado': PENDIENTE,
+            'progreso': 0.0,
+            'mensaje': "En cola",
+            'resultados': None,
+            'inicio': None,
+            'fin': None,
+            'datos': df,
+            'proceso': None,
+            'cola': None,
+        }
+        with self.lock:
+            self.trabajos[trabajo['id']] = trabajo
+            self.pendientes.append(trabajo['id'])
+        self.actualizar()
+        return trabajo['id']
+
+    def _iniciar(self, trabajo):
+        trabajo['cola'] = self.contexto.Queue()
+        trabajo['proceso'] = self.contexto.Process(
+            target=_entrenar_en_proceso, args=(trabajo['datos'], trabajo['cola'], trabajo['motor_svm'], trabajo['esquema']), daemon=True
+        )
+        trabajo['proceso'].start()
+        trabajo['datos'] = None
+        trabajo['estado'] = EJECUTANDO
+        trabajo['mensaje'] = "Iniciando"
+        trabajo['inicio'] = time.time()
+
+    def _leer_mensajes(self, trabajo):
+        while True:
+            try:
+                mensaje = trabajo['cola'].get_nowait()
+            except queue.Empty:
+                return
+            if mensaje[0] == 'progreso':
+                trabajo['progreso'], trabajo['mensaje'] = mensaje[1], mensaje[2]
+            elif mensaje[0] == 'resultado':
+                trabajo['resultados'] = mensaje[1]
+                # Guardar la versión en el registro para el arranque en caliente
+                metadatos = None
+                if self.registro is not None:
+                    metadatos = self.registro.guardar(mensaje[2], trabajo['huella'], mensaje[1])
+                # Reemplazo atómico: las vistas toman la referencia al inicio de cada rerun
+                self.predictor = mensaje[2]
+                self.metadatos_modelo = metadatos
+                self.incremental_pendiente = None
+                self._finalizar(trabajo, COMPLETADO, "Entrenamiento completado")
+            elif mensaje[0] == 'error':
+                self._finalizar(trabajo, ERROR, mensaje[1])
+
+    def _finalizar(self, trabajo, estado, mensaje):
+        trabajo['estado'] = estado
+        trabajo['mensaje'] = mensaje
+        trabajo['fin'] = time.time()
+        if estado == COMPLETADO:
+            trabajo['progreso'] = 1.0
+
+    def actualizar(self):
+        """Lee el avance de los procesos, cierra los terminados e inicia los pendientes"""
+        with self.lock:
+            self._guardar_incremental(vencido=True)
+            for trabajo in self.trabajos.values():
+                if trabajo['estado'] != EJECUTANDO:
+                    continue
+                self._leer_mensajes(trabajo)
+                if trabajo['estado'] == EJECUTANDO and not trabajo['proceso'].is_alive():
+                    self._leer_mensajes(trabajo)
+                    if trabajo['estado'] == EJECUTANDO:
+                        self._finalizar(trabajo, ERROR, f"El proceso terminó inesperadamente ({trabajo['proceso'].exitcode})")
+                if trabajo['estado'] in ESTADOS_FINALES:
+                    trabajo['proceso'].join(timeout=1)
+
+            en_ejecucion = sum(1 for t in self.trabajos.values() if t['estado'] == EJECUTANDO)
+            while self.pendientes and en_ejecucion < self.max_procesos:
+                self._iniciar(self.trabajos[self.pendientes.pop(0)])
+                en_ejecucion += 1
+
+    def cancelar(self, trabajo_id):
+        """Cancela un trabajo pendiente o en ejecución"""
+        with self.lock:
+            trabajo = self.trabajos.get(trabajo_id)
+            if trabajo is None or trabajo['estado'] in ESTADOS_FINALES:
+                return False
+            if trabajo['estado'] == PENDIENTE:
+                self.pendientes.remove(trabajo_id)
+                trabajo['datos'] = None
+            else:
+                trabajo['proceso'].terminate()
+                trabajo['proceso'].join(timeout=5)
+            self._finalizar(trabajo, CANCELADO, "Cancelado por el usuario")
+            return True
+
+    def estado(self, trabajo_id):
+        """Estado visible de un trabajo (sin el proceso ni los datos)"""
+        with self.lock:
+            trabajo = self.trabajos.get(trabajo_id)
+            if trabajo is None:
+                return None
+            estado = {k: v for k, v in trabajo.items() if k not in ('datos', 'proceso', 'cola')}
+        fin = estado['fin'] or time.time()
+        estado['duracion'] = fin - estado['inicio'] if estado['inicio'] else 0.0
+        return estado
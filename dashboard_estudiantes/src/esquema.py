@@ -0,0 +1,135 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Roles fijos de columnas
+COLUMNA_ID = 'ID_Estudiante'
+COLUMNAS_ESTUDIANTE = ['Alumno', 'Estudiante', 'Nombre', 'Student']  # en orden de preferencia
+COLUMNA_SEMANA = 'Semana'
+COLUMNAS_FECHA = ['Fecha Inicio', 'Fecha Fin']
+COLUMNAS_ASISTENCIA = ['Clases Asistidas', 'Clases Totales']
+COLUMNAS_DERIVADAS = ['Promedio', 'Asistencia (%)', 'Promedio_Anterior',
+                      'Progreso Académico (%)', 'Desempeño academico', 'en_riesgo']
+COLUMNAS_PARTICION = ['Anio', 'Seccion']
+
+# Columnas que nunca se consideran cursos
+COLUMNAS_EXCLUIR = ([COLUMNA_ID] + COLUMNAS_ESTUDIANTE + [COLUMNA_SEMANA] + COLUMNAS_FECHA
+                    + COLUMNAS_ASISTENCIA + COLUMNAS_DERIVADAS + COLUMNAS_PARTICION)
+
+# Métricas derivadas que el predictor usa junto con los cursos
+METRICAS_PREDICTOR = ['Asistencia (%)', 'Progreso Académico (%)']
+
+CURSOS_PREDETERMINADOS = [
+    'Comunicación', 'Matemática', 'Ciencia y Tecnología',
+    'Personal Social', 'Educación Religiosa', 'Educación Física',
+    'Arte', 'Inglés'
+]
+
+# Filas que se examinan para decidir si una columna de texto contiene notas
+MUESTRA_FILAS = 1000
+# Esquemas que se conservan en la caché (por huella de archivo o firma de la muestra)
+MAX_ESQUEMAS = 64
+
+
+class EsquemaDatos:
+    """Roles de las columnas de un dataset de calificaciones"""
+
+    def __init__(self, identidad, estudiante, semana, fechas, cursos, asistencia, derivadas,
+                 cursos_predeterminados=False):
+        self.identidad = identidad                      # columna de ID o None
+        self.estudiante = estudiante                    # columna con el nombre o None
+        self.semana = semana                            # columna de semana o None
+        self.fechas = tuple(fechas)
+        self.cursos = tuple(cursos)
+        self.asistencia = tuple(asistencia)
+        self.derivadas = tuple(derivadas)
+        self.cursos_predeterminados = cursos_predeterminados  # True si no se detectó ningún curso
+
+    def caracteristicas(self, columnas):
+        """Columnas de entrada del predictor: cursos y métricas derivadas presentes en columnas"""
+        return list(self.cursos) + [col for col in METRICAS_PREDICTOR if col in columnas]
+
+    def __repr__(self):
+        return (f"EsquemaDatos(identidad={self.identidad!r}, estudiante={self.estudiante!r}, "
+                f"semana={self.semana!r}, cursos={list(self.cursos)!r})")
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def firma_columnas(df):
+    """Firma barata del DataFrame basada en nombres y tipos de columnas"""
+    firma = '|'.join(f"{col}:{tipo}" for col, tipo in df.dtypes.items())
+    return 'columnas-' + hashlib.sha256(firma.encode()).hexdigest()[:16]
+
+
+def _muestra(df, n_filas):
+    if len(df) <= n_filas:
+        return df
+    # Filas repartidas en todo el archivo, no solo las primeras
+    return df.iloc[np.linspace(0, len(df) - 1, n_filas).astype(int)]
+
+
+def firma_muestra(df, n_filas=MUESTRA_FILAS):
+    """Firma de las columnas y del contenido de la muestra que decide el esquema.
+
+    Las columnas numéricas siempre son cursos, así que solo el texto de la muestra
+    (las mismas filas que examina _inferir) entra en la firma.
+    """
+    firma = hashlib.sha256(firma_columnas(df).encode())
+    texto = [col for col in df.columns
+             if col not in COLUMNAS_EXCLUIR and not pd.api.types.is_numeric_dtype(df[col])]
+    if texto:
+        muestra = _muestra(df[texto], n_filas).astype(str)
+        firma.update(pd.util.hash_pandas_object(muestra, index=False).to_numpy().tobytes())
+    return 'muestra-' + firma.hexdigest()[:16]
+
+
+def _contiene_notas(serie):
+    if pd.api.types.is_numeric_dtype(serie):
+        return True
+    try:
+        return pd.to_numeric(serie, errors='coerce').notna().any()
+    except Exception:
+        return False
+
+
+def _inferir(df, n_filas):
+    muestra = _muestra(df, n_filas)
+    cursos = [col for col in df.columns if col not in COLUMNAS_EXCLUIR and _contiene_notas(muestra[col])]
+    return EsquemaDatos(
+        identidad=COLUMNA_ID if COLUMNA_ID in df.columns else None,
+        estudiante=next((col for col in COLUMNAS_ESTUDIANTE if col in df.columns), None),
+        semana=COLUMNA_SEMANA if COLUMNA_SEMANA in df.columns else None,
+        fechas=[col for col in COLUMNAS_FECHA if col in df.columns],
+        cursos=cursos or CURSOS_PREDETERMINADOS,
+        asistencia=[col for col in COLUMNAS_ASISTENCIA if col in df.columns],
+        derivadas=[col for col in COLUMNAS_DERIVADAS if col in df.columns],
+        cursos_predeterminados=not cursos,
+    )
+
+
+def inferir_esquema(df, huella=None, n_filas=MUESTRA_FILAS):
+    """Esquema del DataFrame a partir de una muestra acotada, en caché por huella de archivo o de la muestra"""
+    clave = huella or firma_muestra(df, n_filas)
+    with _lock:
+        if clave in _cache:
+            _cache.move_to_end(clave)
+            return _cache[clave]
+
+    esquema = _inferir(df, n_filas)
+    with _lock:
+        _cache[clave] = esquema
+        while len(_cache) > MAX_ESQUEMAS:
+            _cache.popitem(last=False)
+    return esquema
+
+
+def limpiar_cache():
+    """Vacía la caché de esquemas"""
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,380 @@
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from pandas.api.types import union_categoricals
+
+import metricas
+from esquema import COLUMNA_ID, COLUMNA_SEMANA, COLUMNAS_DERIVADAS, inferir_esquema
+
+# Filas por bloque en la lectura por bloques: acota la memoria de texto crudo que se tiene a la vez
+FILAS_BLOQUE = int(os.environ.get('INGESTA_FILAS_BLOQUE', '100000'))
+# Desde cuántas filas el Excel se escribe en modo streaming (write-only) de openpyxl
+FILAS_EXCEL_STREAMING = int(os.environ.get('EXPORTAR_FILAS_STREAMING', '5000'))
+# Filas que se convierten a la vez al escribir en modo streaming
+FILAS_LOTE_EXCEL = 10000
+# Procesos para procesar varios archivos de sección a la vez (por defecto, uno por CPU)
+PROCESOS_INGESTA = int(os.environ.get('INGESTA_PROCESOS', '0')) or os.cpu_count() or 1
+
+
+def leer_archivo(archivo, nombre=None):
+    """Lee un archivo CSV o Excel (ruta o archivo cargado)"""
+    nombre = nombre or getattr(archivo, 'name', str(archivo))
+    if nombre.lower().endswith('.csv'):
+        return pd.read_csv(archivo, dtype=str)  # ← CORREGIDO: agregado dtype=str
+    return pd.read_excel(archivo)
+
+
+def formatear_fechas_df(df):
+    """Convierte las fechas al formato día/mes/año"""
+    columnas_fecha = ['Fecha Inicio', 'Fecha Fin']
+
+    for col in columnas_fecha:
+        if col in df.columns:
+            # Para CSV, las fechas vienen como texto, intentar parsear
+            try:
+                # Primero detectar el formato original y convertir a datetime
+                df[col] = pd.to_datetime(df[col], dayfirst=True, errors='coerce').dt.strftime('%d/%m/%Y')
+            except:
+                # Si falla, intentar otro método
+                try:
+                    df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%d/%m/%Y')
+                except:
+                    pass
+    return df
+
+
+def detectar_estudiantes(df, huella=None):
+    """Devuelve la lista ordenada de estudiantes del DataFrame"""
+    columna = inferir_esquema(df, huella).estudiante
+    if columna is None:
+        return []
+    return sorted(df[columna].unique().tolist())
+
+
+def detectar_cursos(df, huella=None):
+    """Identifica las columnas de cursos automáticamente (predeterminados si no hay ninguna)"""
+    return list(inferir_esquema(df, huella).cursos)
+
+
+def exportar_excel(df, hoja='Calificaciones'):
+    """Genera en memoria un archivo Excel con el DataFrame (en streaming si es grande)"""
+    if len(df) >= FILAS_EXCEL_STREAMING:
+        return _exportar_excel_streaming(df, hoja)
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name=hoja, index=False)
+    return output.getvalue()
+
+
+def _exportar_excel_streaming(df, hoja):
+    """Escribe el Excel fila por fila con un libro write-only, sin mantener las celdas en memoria"""
+    libro = Workbook(write_only=True)
+    hoja_excel = libro.create_sheet(hoja)
+    hoja_excel.append([str(col) for col in df.columns])
+    for inicio in range(0, len(df), FILAS_LOTE_EXCEL):
+        lote = df.iloc[inicio:inicio + FILAS_LOTE_EXCEL]
+        # Vacíos como celdas vacías (openpyxl no acepta NaN) y valores como tipos de Python
+        valores = lote.astype(object).where(lote.notna(), None).to_numpy()
+        for fila in valores.tolist():
+            hoja_excel.append(fila)
+    output = io.BytesIO()
+    libro.save(output)
+    return output.getvalue()
+
+
+def exportar_csv(df):
+    """Genera en memoria un CSV (UTF-8 con BOM para que Excel muestre bien las tildes)"""
+    return df.to_csv(index=False).encode('utf-8-sig')
+
+
+def exportar_parquet(df):
+    """Genera en memoria un archivo Parquet"""
+    output = io.BytesIO()
+    df.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+# Formatos de descarga: función, extensión y tipo MIME
+FORMATOS_EXPORTACION = {
+    'Excel': (exportar_excel, 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'CSV': (exportar_csv, 'csv', 'text/csv'),
+    'Parquet': (exportar_parquet, 'parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def _compactar_numerico(serie):
+    """Entero pequeño si la columna no tiene vacíos; float32 en caso contrario"""
+    valores = pd.to_numeric(serie, errors='coerce')
+    if valores.notna().all() and (valores % 1 == 0).all():
+        return pd.to_numeric(valores, downcast='integer')
+    return valores.astype('float32')
+
+
+def _tipar_bloque(bloque, esquema, validacion):
+    """Convierte un bloque leído como texto a tipos compactos y lo valida"""
+    # Semana: entero pequeño; las filas sin semana válida se descartan
+    if esquema.semana is not None:
+        semanas = pd.to_numeric(bloque[esquema.semana], errors='coerce')
+        invalidas = semanas.isna() | (semanas % 1 != 0)
+        if invalidas.any():
+            validacion['semanas_invalidas'] += int(invalidas.sum())
+            bloque = bloque[~invalidas.to_numpy()].copy()
+            semanas = semanas[~invalidas]
+        bloque[esquema.semana] = semanas.astype('int16')
+
+    # Notas: float32; los textos no numéricos cuentan como 0 igual que en calcular_metricas
+    for curso in esquema.cursos:
+        if curso not in bloque.columns:
+            continue
+        notas = pd.to_numeric(bloque[curso], errors='coerce')
+        validacion['notas_invalidas'] += int((notas.isna() & bloque[curso].notna()).sum())
+        validacion['notas_fuera_rango'] += int(((notas < 0) | (notas > metricas.RANGO_NOTAS)).sum())
+        bloque[curso] = notas.astype('float32')
+
+    for col in esquema.asistencia:
+        bloque[col] = _compactar_numerico(bloque[col])
+
+    # ID numérico como entero; el resto del texto (nombres, IDs alfanuméricos, fechas) como categoría.
+    # Las fechas se formatean al final, sobre sus valores distintos
+    if esquema.identidad is not None:
+        ids = pd.to_numeric(bloque[esquema.identidad], errors='coerce')
+        if ids.notna().all() and (ids % 1 == 0).all():
+            bloque[esquema.identidad] = pd.to_numeric(ids, downcast='integer')
+    # (las columnas derivadas se recalculan después, así que no se compactan)
+    for col in bloque.columns:
+        if bloque[col].dtype == object and col not in COLUMNAS_DERIVADAS:
+            bloque[col] = bloque[col].astype('category')
+    return bloque
+
+
+def _unir_bloques(bloques):
+    """Concatena los bloques uniendo las categorías sin pasar por texto"""
+    columnas = bloques[0].columns
+    categoricas = [col for col in columnas
+                   if all(isinstance(bloque[col].dtype, pd.CategoricalDtype) for bloque in bloques)]
+    df = pd.concat([bloque.drop(columns=categoricas) for bloque in bloques], ignore_index=True)
+    for col in categoricas:
+        df[col] = union_categoricals([bloque[col] for bloque in bloques], sort_categories=True)
+    # Columnas que quedaron como texto por tener tipos distintos entre bloques (ej. IDs mixtos)
+    return _categorizar_texto(df)[columnas]
+
+
+def _categorizar_texto(df):
+    """Convierte a categoría las columnas de texto que no son derivadas"""
+    for col in df.columns:
+        if df[col].dtype == object and col not in COLUMNAS_DERIVADAS:
+            df[col] = df[col].astype(str).astype('category')
+    return df
+
+
+def _formatear_fechas_categoricas(df, columnas, primeras):
+    """Formatea fechas categóricas convirtiendo solo sus valores distintos"""
+    for col in columnas:
+        categorias = list(df[col].cat.categories)
+        # El primer valor del archivo va adelante para que el formato se infiera igual que al leer todo junto
+        prefijo = [primeras[col]] if col in primeras else []
+        valores = pd.DataFrame({col: pd.Series(prefijo + categorias, dtype=object)})
+        formateadas = formatear_fechas_df(valores)[col].iloc[len(prefijo):]
+        df[col] = df[col].map(dict(zip(categorias, formateadas))).astype('category')
+    return df
+
+
+def reporte_memoria(antes, despues):
+    """Bytes por columna antes (texto) y después (tipos compactos) de la lectura por bloques"""
+    compacto = despues.memory_usage(index=False, deep=True)
+    reporte = pd.DataFrame({
+        'Tipo': despues.dtypes.astype(str),
+        'Bytes texto': [antes.get(col, 0) for col in despues.columns],
+        'Bytes compacto': compacto.to_numpy(),
+    }, index=despues.columns)
+    reporte.loc['Total'] = ['', reporte['Bytes texto'].sum(), reporte['Bytes compacto'].sum()]
+    texto = reporte['Bytes texto'].astype('float64')
+    reporte['Reducción (%)'] = ((1 - reporte['Bytes compacto'] / texto.where(texto > 0)) * 100).round(1)
+    return reporte
+
+
+def leer_csv_por_bloques(archivo, huella=None, filas_bloque=FILAS_BLOQUE, progreso=None):
+    """Lee un CSV por bloques con tipos compactos, validando y calculando métricas en cada bloque.
+
+    Devuelve (df, estudiantes, cursos, informe); el informe incluye la validación y el
+    reporte de memoria por columna.
+    """
+    propio = isinstance(archivo, (str, os.PathLike))
+    fuente = open(archivo, 'rb') if propio else archivo
+    try:
+        fuente.seek(0, os.SEEK_END)
+        tamano = fuente.tell() or 1
+        fuente.seek(0)
+
+        esquema = None
+        bloques = []
+        primeras_fechas = {}
+        niveles = pd.CategoricalDtype([nivel for _, nivel in metricas.NIVELES_DESEMPENO] + [metricas.NIVEL_RIESGO])
+        bytes_texto = {}
+        validacion = {'filas': 0, 'semanas_invalidas': 0, 'notas_invalidas': 0, 'notas_fuera_rango': 0}
+        for bloque in pd.read_csv(fuente, dtype=str, chunksize=filas_bloque):
+            # Memoria que ocuparía el bloque como texto (lectura con dtype=str)
+            for col, valor in bloque.memory_usage(index=False, deep=True).items():
+                bytes_texto[col] = bytes_texto.get(col, 0) + int(valor)
+            validacion['filas'] += len(bloque)
+
+            # El esquema se infiere con el primer bloque y se reutiliza en los demás
+            if esquema is None:
+                esquema = inferir_esquema(bloque, huella)
+                if not all(curso in bloque.columns for curso in esquema.cursos):
+                    raise ValueError("No se pudieron identificar las columnas de cursos")
+
+            for col in esquema.fechas:
+                if col not in primeras_fechas and bloque[col].notna().any():
+                    primeras_fechas[col] = bloque[col].dropna().iloc[0]
+
+            bloque = metricas.calcular_metricas_fila(_tipar_bloque(bloque, esquema, validacion),
+                                                     list(esquema.cursos), 'float32')
+            bloque['Desempeño academico'] = bloque['Desempeño academico'].astype(niveles)
+            bloques.append(bloque)
+
+            if progreso is not None:
+                progreso(min(fuente.tell() / tamano, 1.0), f"{validacion['filas']:,} filas leídas")
+    finally:
+        if propio:
+            fuente.close()
+
+    if not bloques:
+        raise ValueError("El archivo CSV no tiene filas")
+
+    df = _formatear_fechas_categoricas(_unir_bloques(bloques), esquema.fechas, primeras_fechas)
+    df = metricas.calcular_progreso_df(df)
+    informe = {**validacion, 'bloques': len(bloques), 'memoria': reporte_memoria(bytes_texto, df)}
+    estudiantes = sorted(df[esquema.estudiante].unique().tolist()) if esquema.estudiante else []
+    return df, estudiantes, list(esquema.cursos), informe
+
+
+def procesar_dataframe(df, huella=None):
+    """Aplica fechas, detección de listas y métricas; devuelve (df, estudiantes, cursos)"""
+    df = formatear_fechas_df(df)
+    estudiantes = detectar_estudiantes(df, huella)
+    cursos = detectar_cursos(df, huella)
+    if not all(curso in df.columns for curso in cursos):
+        raise ValueError("No se pudieron identificar las columnas de cursos")
+    return metricas.calcular_metricas(df, cursos), estudiantes, cursos
+
+
+def nombre_seccion(nombre):
+    """Sección de un archivo: su nombre sin carpeta ni extensión"""
+    return os.path.splitext(os.path.basename(nombre))[0]
+
+
+def procesar_seccion(nombre, datos):
+    """Procesa un archivo de sección (en un proceso del pool); devuelve (df, cursos, segundos, error)"""
+    inicio = time.perf_counter()
+    try:
+        archivo = io.BytesIO(datos)
+        if nombre.lower().endswith('.csv'):
+            df, _, cursos, _ = leer_csv_por_bloques(archivo)
+        else:
+            df, _, cursos = procesar_dataframe(leer_archivo(archivo, nombre))
+        if 'Seccion' not in df.columns:
+            df['Seccion'] = pd.Categorical.from_codes(np.zeros(len(df), dtype='int8'), [nombre_seccion(nombre)])
+        return df, cursos, time.perf_counter() - inicio, None
+    except Exception as e:
+        return None, [], time.perf_counter() - inicio, str(e)
+
+
+def crear_pool_ingesta(max_procesos=PROCESOS_INGESTA):
+    """Pool de procesos para procesar archivos en paralelo (spawn, igual que el entrenamiento)"""
+    return ProcessPoolExecutor(max_workers=max_procesos, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _unir_secciones(dfs):
+    """Concatena los datasets de cada sección ordenados por (ID, Semana)"""
+    # Cada sección suele numerar sus IDs desde 1: si se repiten entre archivos se antepone la sección
+    ids_repetidos = False
+    if all(COLUMNA_ID in df.columns for df in dfs):
+        ids = [set(df[COLUMNA_ID].unique().tolist()) for df in dfs]
+        ids_repetidos = len(set().union(*ids)) < sum(len(grupo) for grupo in ids)
+    if ids_repetidos:
+        for df in dfs:
+            df[COLUMNA_ID] = df['Seccion'].astype(str) + '-' + df[COLUMNA_ID].astype(str)
+
+    df = _categorizar_texto(pd.concat(dfs, ignore_index=True))
+    orden = [col for col in [COLUMNA_ID, COLUMNA_SEMANA] if col in df.columns]
+    if len(orden) == 2:
+        df = df.sort_values(orden, kind='stable', ignore_index=True)
+    return df, ids_repetidos
+
+
+def procesar_secciones(archivos, pool=None, progreso=None):
+    """Procesa varios archivos (nombre, bytes) en paralelo y los une en un dataset con columna Seccion.
+
+    Devuelve (df, estudiantes, cursos, informe); el informe tiene una fila por archivo con
+    sus filas, tiempo y error, el tiempo total de la carga y 'pool_roto' si algún proceso
+    del pool murió (esos archivos fallaron por el pool, no por su contenido). Si varios
+    archivos dan la misma sección (6A.csv y 6A.xlsx) solo se usa el primero: sus IDs
+    con prefijo de sección chocarían y se mezclarían estudiantes distintos.
+    """
+    inicio = time.perf_counter()
+    resultados = [None] * len(archivos)
+    primero_por_seccion = {}
+    for i, (nombre, _) in enumerate(archivos):
+        seccion = nombre_seccion(nombre)
+        if seccion in primero_por_seccion:
+            resultados[i] = (None, [], 0.0,
+                             f"La sección {seccion} ya viene en {primero_por_seccion[seccion]}; renombra el archivo")
+        else:
+            primero_por_seccion[seccion] = nombre
+    pendientes = [i for i, resultado in enumerate(resultados) if resultado is None]
+
+    propio = pool is None
+    pool = pool or crear_pool_ingesta(max(1, min(PROCESOS_INGESTA, len(pendientes))))
+    pool_roto = False
+    try:
+        futuros = {pool.submit(procesar_seccion, *archivos[i]): i for i in pendientes}
+        for completados, futuro in enumerate(as_completed(futuros), 1):
+            i = futuros[futuro]
+            try:
+                resultados[i] = futuro.result()
+            except BrokenProcessPool as e:
+                pool_roto = True
+                resultados[i] = (None, [], 0.0, f"El proceso terminó de forma inesperada: {e}")
+            except Exception as e:
+                # El proceso terminó de forma inesperada (p. ej. sin memoria)
+                resultados[i] = (None, [], 0.0, str(e))
+            if progreso is not None:
+                progreso(completados / len(futuros), f"{completados}/{len(futuros)} archivos ({archivos[i][0]})")
+    finally:
+        if propio:
+            pool.shutdown()
+
+    archivos_informe = pd.DataFrame([{
+        'Archivo': nombre,
+        'Sección': nombre_seccion(nombre),
+        'Filas': 0 if df is None else len(df),
+        'Segundos': round(segundos, 2),
+        'Error': error or '',
+    } for (nombre, _), (df, _, segundos, error) in zip(archivos, resultados)])
+
+    validos = [(df, cursos_archivo) for df, cursos_archivo, _, _ in resultados if df is not None]
+    if not validos:
+        if pool_roto:
+            raise BrokenProcessPool("; ".join(archivos_informe['Error']))
+        raise ValueError("No se pudo procesar ningún archivo: " + "; ".join(archivos_informe['Error']))
+
+    cursos = []
+    for _, cursos_archivo in validos:
+        cursos += [curso for curso in cursos_archivo if curso not in cursos]
+    df, ids_repetidos = _unir_secciones([df for df, _ in validos])
+
+    informe = {
+        'archivos': archivos_informe,
+        'segundos': time.perf_counter() - inicio,
+        'ids_con_seccion': ids_repetidos,
+        'pool_roto': pool_roto,
+    }
+    return df, detectar_estudiantes(df), cursos, informe
@@ -0,0 +1,125 @@
+"""Instrumentación opcional de latencia por ejecución (rerun) de la app.
+
+Se activa con la variable de entorno INSTRUMENTACION=1. Desactivada, los decoradores
+devuelven la función original y span() no mide nada, así que no tiene costo.
+"""
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+ACTIVA = os.environ.get('INSTRUMENTACION', '0').lower() in ('1', 'true', 'si', 'sí')
+RUTA_LOG = os.environ.get(
+    'INSTRUMENTACION_LOG',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs', 'instrumentacion.jsonl')
+)
+MAX_MB_LOG = float(os.environ.get('INSTRUMENTACION_LOG_MB', '5'))
+RESPALDOS_LOG = 3
+
+# Cada sesión de Streamlit ejecuta su script en un hilo propio
+_estado = threading.local()
+_SIN_MEDICION = contextlib.nullcontext()
+_logger = None
+_lock_logger = threading.Lock()
+
+
+@contextlib.contextmanager
+def _medir_span(nombre):
+    spans = getattr(_estado, 'spans', None)
+    nivel = getattr(_estado, 'nivel', 0)
+    inicio = time.perf_counter()
+    registro = None
+    if spans is not None:
+        # Se agrega al iniciar para conservar el orden de llamada (padres antes que hijos)
+        registro = {'nombre': nombre, 'nivel': nivel, 'inicio_ms': round((inicio - _estado.inicio) * 1000, 3)}
+        spans.append(registro)
+    _estado.nivel = nivel + 1
+    try:
+        yield
+    finally:
+        _estado.nivel = nivel
+        if registro is not None:
+            registro['ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+
+
+def span(nombre):
+    """Mide un bloque con nombre dentro de la ejecución actual"""
+    if not ACTIVA:
+        return _SIN_MEDICION
+    return _medir_span(nombre)
+
+
+def medir(nombre=None):
+    """Decorador que mide cada llamada a la función como un span"""
+    def decorador(funcion):
+        if not ACTIVA:
+            return funcion
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with _medir_span(etiqueta):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def instrumentar_clase(cls):
+    """Decorador de clase que mide todos sus métodos (excepto los especiales)"""
+    if ACTIVA:
+        for nombre, atributo in list(vars(cls).items()):
+            if callable(atributo) and not nombre.startswith('__'):
+                setattr(cls, nombre, medir(f"{cls.__name__}.{nombre}")(atributo))
+    return cls
+
+
+def iniciar_ejecucion():
+    """Comienza a registrar los spans de una ejecución del script"""
+    if not ACTIVA:
+        return
+    _estado.spans = []
+    _estado.nivel = 0
+    _estado.inicio = time.perf_counter()
+
+
+def finalizar_ejecucion(**contexto):
+    """Cierra la ejecución actual, la agrega al log JSONL y devuelve su registro"""
+    if not ACTIVA or getattr(_estado, 'spans', None) is None:
+        return None
+
+    registro = {
+        'fecha': datetime.now().isoformat(timespec='milliseconds'),
+        'ejecucion': uuid.uuid4().hex[:8],
+        'total_ms': round((time.perf_counter() - _estado.inicio) * 1000, 3),
+        **contexto,
+        'spans': _estado.spans,
+    }
+    _estado.spans = None
+    _escribir_log(registro)
+    return registro
+
+
+def _escribir_log(registro):
+    global _logger
+
+    try:
+        with _lock_logger:
+            if _logger is None:
+                os.makedirs(os.path.dirname(RUTA_LOG), exist_ok=True)
+                manejador = RotatingFileHandler(
+                    RUTA_LOG, maxBytes=int(MAX_MB_LOG * 2**20), backupCount=RESPALDOS_LOG, encoding='utf-8'
+                )
+                manejador.setFormatter(logging.Formatter('%(message)s'))
+                _logger = logging.getLogger('instrumentacion')
+                _logger.setLevel(logging.INFO)
+                _logger.propagate = False
+                _logger.addHandler(manejador)
+        _logger.info(json.dumps(registro, ensure_ascii=False, default=str))
+    except Exception as e:
+        print(f"Error al escribir el log de instrumentación: {e}")
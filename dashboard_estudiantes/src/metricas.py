@@ -0,0 +1,284 @@
+import pandas as pd
+import numpy as np
+
+# Rango de notas usado para expresar el progreso en porcentaje
+RANGO_NOTAS = 20
+
+# Cortes del desempeño académico (de mayor a menor)
+NIVELES_DESEMPENO = [(16, 'Excelente'), (14, 'Bueno'), (11, 'Regular')]
+NIVEL_RIESGO = 'En Riesgo'
+
+
+def a_numerico(serie, dtype=None):
+    """Convierte una serie a numérico solo si todavía no lo es"""
+    if not (pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)):
+        serie = pd.to_numeric(serie, errors='coerce')
+    return serie.astype(dtype, copy=False) if dtype else serie
+
+
+def normalizar_semana(df):
+    """Asegura que la columna Semana sea entera para ordenar correctamente"""
+    if 'Semana' in df.columns and not pd.api.types.is_integer_dtype(df['Semana']):
+        semanas = pd.to_numeric(df['Semana'], errors='coerce')
+        if not semanas.isna().any():
+            df['Semana'] = semanas.astype('int64')
+    return df
+
+
+def clasificar_desempeno(promedio):
+    """Clasifica un arreglo de promedios en niveles de desempeño"""
+    promedio = np.asarray(promedio, dtype='float64')
+    condiciones = [promedio >= corte for corte, _ in NIVELES_DESEMPENO]
+    opciones = [nivel for _, nivel in NIVELES_DESEMPENO]
+    return np.select(condiciones, opciones, default=NIVEL_RIESGO).astype(object)
+
+
+def calcular_progreso(ids, promedios):
+    """Calcula Promedio_Anterior y Progreso sobre arreglos ya ordenados por (ID, Semana)"""
+    promedio_anterior = np.full(len(promedios), np.nan)
+    if len(promedios) > 1:
+        mismo_estudiante = ids[1:] == ids[:-1]
+        promedio_anterior[1:] = np.where(mismo_estudiante, promedios[:-1], np.nan)
+
+    valido = ~np.isnan(promedio_anterior) & (promedio_anterior != 0)
+    progreso = np.where(valido, (promedios - promedio_anterior) / RANGO_NOTAS * 100, 0.0)
+    return promedio_anterior, np.round(progreso, 2)
+
+
+def calcular_metricas_fila(df, cursos, dtype_notas='float64'):
+    """Calcula Promedio, Asistencia y Desempeño, que solo dependen de cada fila"""
+    # Notas en el tipo indicado (solo se convierten las columnas que no son numéricas)
+    for curso in cursos:
+        df[curso] = a_numerico(df[curso], dtype_notas).fillna(0)
+
+    notas = df[cursos].to_numpy(dtype='float64')
+    df['Promedio'] = np.round(notas.mean(axis=1), 2)
+
+    # Asistencia
+    if 'Clases Asistidas' in df.columns and 'Clases Totales' in df.columns:
+        df['Clases Asistidas'] = a_numerico(df['Clases Asistidas'])
+        df['Clases Totales'] = a_numerico(df['Clases Totales'])
+        df['Asistencia (%)'] = np.round(
+            df['Clases Asistidas'].to_numpy(dtype='float64') / df['Clases Totales'].to_numpy(dtype='float64') * 100, 2
+        )
+    elif 'Asistencia' in df.columns:
+        df['Asistencia (%)'] = np.round(a_numerico(df['Asistencia'], 'float64').to_numpy(), 2)
+
+    df['Desempeño academico'] = clasificar_desempeno(df['Promedio'].to_numpy())
+    return df
+
+
+def calcular_progreso_df(df):
+    """Ordena por (ID, Semana) y calcula el progreso respecto a la semana anterior del mismo estudiante"""
+    if 'ID_Estudiante' not in df.columns or 'Semana' not in df.columns:
+        return df
+
+    df = normalizar_semana(df)
+    df = df.sort_values(['ID_Estudiante', 'Semana'], kind='stable')
+    ids = df['ID_Estudiante']
+    # Con IDs categóricos basta comparar los códigos enteros
+    ids = ids.cat.codes.to_numpy() if isinstance(ids.dtype, pd.CategoricalDtype) else ids.to_numpy()
+    promedio_anterior, progreso = calcular_progreso(ids, df['Promedio'].to_numpy(dtype='float64'))
+    df['Promedio_Anterior'] = promedio_anterior
+    df['Progreso Académico (%)'] = progreso
+    return df
+
+
+def calcular_metricas(df, cursos, dtype_notas='float64'):
+    """Calcula Promedio, Asistencia, Progreso y Desempeño con operaciones por columnas"""
+    df = calcular_metricas_fila(df, cursos, dtype_notas)
+    # El progreso depende de la semana anterior, así que se calcula sobre el dataset completo
+    return calcular_progreso_df(df)
+
+
+class AgregadosSemanales:
+    """Tabla materializada de indicadores por semana (se construye una vez por versión del dataset)"""
+
+    def __init__(self, df, top_k=5):
+        self.top_k = top_k
+        self.resumen, self.distribucion, self.top = self._calcular(df)
+
+    def _calcular(self, df):
+        por_semana = df.groupby('Semana', sort=True)
+        resumen = por_semana.agg(**{
+            'Registros': ('Promedio', 'size'),
+            'Promedio': ('Promedio', 'mean'),
+            'Asistencia (%)': ('Asistencia (%)', 'mean'),
+        })
+        if 'Progreso Académico (%)' in df.columns:
+            resumen['Progreso Académico (%)'] = por_semana['Progreso Académico (%)'].mean().fillna(0)
+        else:
+            resumen['Progreso Académico (%)'] = 0.0
+
+        # Distribución del desempeño (conteos por nivel)
+        niveles = [nivel for _, nivel in NIVELES_DESEMPENO] + [NIVEL_RIESGO]
+        distribucion = pd.crosstab(df['Semana'], df['Desempeño academico']).reindex(columns=niveles, fill_value=0)
+        resumen['En Riesgo'] = distribucion[NIVEL_RIESGO]
+
+        # Top-k por semana (mismo orden que nlargest: empates por orden de aparición)
+        columnas_top = [col for col in ['Alumno', 'Promedio', 'Asistencia (%)', 'Desempeño academico'] if col in df.columns]
+        ordenado = df.sort_values(['Semana', 'Promedio'], ascending=[True, False], kind='stable')
+        mejores = ordenado.groupby('Semana', sort=False).head(self.top_k)
+        top = {semana: grupo[columnas_top] for semana, grupo in mejores.groupby('Semana', sort=False)}
+
+        return resumen, distribucion, top
+
+    def semanas(self):
+        """Semanas disponibles en orden"""
+        return self.resumen.index.tolist()
+
+    def semana(self, semana):
+        """Indicadores de una semana: resumen (dict), distribución (Series) y top-k (DataFrame)"""
+        return self.resumen.loc[semana].to_dict(), self.distribucion.loc[semana], self.top[semana]
+
+    def evolucion(self):
+        """Promedio y asistencia de todas las semanas"""
+        return self.resumen[['Promedio', 'Asistencia (%)']].reset_index()
+
+    def actualizar_semanas(self, df, semanas):
+        """Recalcula solo las semanas indicadas"""
+        semanas = list(semanas)
+        resumen, distribucion, top = self._calcular(df[df['Semana'].isin(semanas)])
+        self.resumen = pd.concat([self.resumen.drop(semanas, errors='ignore'), resumen]).sort_index()
+        self.distribucion = pd.concat([self.distribucion.drop(semanas, errors='ignore'), distribucion]).sort_index()
+        self.top.update(top)
+
+
+class IndiceEstudiantes:
+    """Índice (estudiante, semana) sobre un dataset agrupado por estudiante y ordenado por semana"""
+
+    def __init__(self, df):
+        self.clave = 'ID_Estudiante' if 'ID_Estudiante' in df.columns else 'Alumno'
+        claves = df[self.clave].to_numpy()
+        semanas = df['Semana'].to_numpy()
+
+        # Verificar que cada estudiante ocupe un bloque contiguo ordenado por semana
+        cambio = claves[1:] != claves[:-1]
+        inicios = np.r_[0, np.flatnonzero(cambio) + 1] if len(df) else np.array([], dtype=int)
+        agrupado = len(inicios) == pd.unique(claves).size and bool(np.all(cambio | (np.diff(semanas) > 0)))
+        if not agrupado:
+            df = df.sort_values([self.clave, 'Semana'], kind='stable')
+            claves = df[self.clave].to_numpy()
+            semanas = df['Semana'].to_numpy()
+            inicios = np.r_[0, np.flatnonzero(claves[1:] != claves[:-1]) + 1] if len(df) else np.array([], dtype=int)
+
+        fines = np.r_[inicios[1:], len(df)]
+        self.df = df
+        self.semanas = semanas
+        self.bloques = dict(zip(claves[inicios].tolist(), zip(inicios.tolist(), fines.tolist())))
+        # Nombre y sección de cada clave; un nombre puede corresponder a varios estudiantes (otra sección)
+        self.nombres = {}
+        self.por_alumno = {}
+        if 'Alumno' in df.columns:
+            self.nombres = dict(zip(claves[inicios].tolist(), df['Alumno'].to_numpy()[inicios].tolist()))
+            for clave, alumno in self.nombres.items():
+                self.por_alumno.setdefault(alumno, []).append(clave)
+        self.secciones = {}
+        if 'Seccion' in df.columns:
+            secciones = df['Seccion'].to_numpy()[inicios].tolist()
+            self.secciones = {clave: str(seccion) for clave, seccion in zip(claves[inicios].tolist(), secciones)
+                              if pd.notna(seccion)}
+
+    def estudiantes(self):
+        """Claves de los estudiantes ordenadas por nombre (opciones de los selectores)"""
+        return sorted(self.bloques, key=lambda clave: (str(self.nombres.get(clave, clave)), str(clave)))
+
+    def etiqueta(self, clave):
+        """Nombre del estudiante, con su sección (o ID) si otro estudiante se llama igual"""
+        nombre = self.nombres.get(clave, clave)
+        if len(self.por_alumno.get(nombre, ())) > 1:
+            return f"{nombre} ({self.secciones.get(clave) or f'ID {clave}'})"
+        return str(nombre)
+
+    def _bloque(self, estudiante):
+        # Por clave del estudiante o, si se da un nombre, el primer estudiante con ese nombre
+        if estudiante not in self.bloques:
+            estudiante = self.por_alumno.get(estudiante, [estudiante])[0]
+        return self.bloques.get(estudiante, (0, 0))
+
+    def historial(self, estudiante):
+        """Filas del estudiante (clave del índice) ordenadas por semana (porción contigua del dataset)"""
+        inicio, fin = self._bloque(estudiante)
+        return self.df.iloc[inicio:fin]
+
+    def fila(self, estudiante, semana):
+        """Fila del estudiante (clave del índice) en una semana (DataFrame vacío si no existe)"""
+        inicio, fin = self._bloque(estudiante)
+        posicion = inicio + int(np.searchsorted(self.semanas[inicio:fin], semana))
+        if posicion < fin and self.semanas[posicion] == semana:
+            return self.df.iloc[posicion:posicion + 1]
+        return self.df.iloc[0:0]
+
+
+def actualizar_registro(df, registro, cursos):
+    """Inserta o reemplaza un registro semanal recalculando solo la cadena del estudiante afectado"""
+    id_estudiante = registro['ID_Estudiante']
+    semana = registro['Semana']
+
+    # Métricas propias de la fila nueva (promedio, asistencia y desempeño)
+    nuevo = calcular_metricas(pd.DataFrame([registro]), cursos)
+
+    del_estudiante = (df['ID_Estudiante'] == id_estudiante).to_numpy()
+    posiciones = np.flatnonzero(del_estudiante)
+    historial = df.iloc[posiciones]
+
+    # Conservar la etiqueta de índice si se reemplaza una semana existente
+    misma_semana = (historial['Semana'] == semana).to_numpy()
+    if misma_semana.any():
+        nuevo.index = historial.index[misma_semana][:1]
+    else:
+        nuevo.index = [df.index.max() + 1 if len(df) else 0]
+    historial = pd.concat([historial[~misma_semana], nuevo]).sort_values('Semana', kind='stable')
+
+    # Recalcular solo el progreso del estudiante afectado
+    promedio_anterior, progreso = calcular_progreso(
+        historial['ID_Estudiante'].to_numpy(), historial['Promedio'].to_numpy()
+    )
+    historial['Promedio_Anterior'] = promedio_anterior
+    historial['Progreso Académico (%)'] = progreso
+
+    # Semanas cuyos agregados cambian: la ingresada y la siguiente del mismo estudiante
+    semanas_historial = historial['Semana'].to_numpy()
+    semanas_afectadas = {semana}
+    posteriores = semanas_historial[semanas_historial > semana]
+    if len(posteriores):
+        semanas_afectadas.add(posteriores.min().item())
+
+    # Reemplazar el bloque del estudiante sin recalcular el resto del dataset
+    if len(posiciones) and posiciones[-1] - posiciones[0] + 1 == len(posiciones):
+        df = pd.concat([df.iloc[:posiciones[0]], historial, df.iloc[posiciones[-1] + 1:]])
+    else:
+        df = pd.concat([df[~del_estudiante], historial])
+
+    registro_calculado = historial.loc[nuevo.index[0]].to_dict()
+    return df, registro_calculado, semanas_afectadas
+
+
+def aplicar_registros(df, registros, cursos):
+    """Reemplaza o agrega varios registros semanales del mismo dataset y recalcula las métricas una vez"""
+    if registros.empty or 'ID_Estudiante' not in df.columns or 'Alumno' not in df.columns:
+        return df
+
+    # Solo registros de estudiantes del dataset (mismo ID y nombre; los IDs se comparan como texto)
+    estudiantes = df[['ID_Estudiante', 'Alumno']].drop_duplicates()
+    ids_originales = dict(zip(
+        zip(estudiantes['ID_Estudiante'].astype(str), estudiantes['Alumno'].astype(str)), estudiantes['ID_Estudiante']
+    ))
+    claves_registros = list(zip(registros['ID_Estudiante'].astype(str), registros['Alumno'].astype(str)))
+    propios = np.array([clave in ids_originales for clave in claves_registros], dtype=bool)
+    if not propios.any():
+        return df
+
+    registros = registros[propios].reindex(columns=df.columns)
+    registros['ID_Estudiante'] = [ids_originales[clave] for clave, propio in zip(claves_registros, propios) if propio]
+    if 'Seccion' in df.columns:
+        # El almacén no guarda la sección: se toma de las filas del propio estudiante
+        secciones = df.drop_duplicates('ID_Estudiante').set_index('ID_Estudiante')['Seccion']
+        registros['Seccion'] = registros['ID_Estudiante'].map(secciones)
+    registros['Semana'] = a_numerico(registros['Semana'], 'int64')
+    registros = calcular_metricas_fila(registros, cursos)
+
+    claves = pd.MultiIndex.from_arrays([df['ID_Estudiante'].astype(str), a_numerico(df['Semana'], 'int64')])
+    reemplazadas = claves.isin(pd.MultiIndex.from_arrays([registros['ID_Estudiante'].astype(str), registros['Semana']]))
+    df = pd.concat([df[~reemplazadas], registros.dropna(axis=1, how='all')], ignore_index=True)
+    return calcular_progreso_df(df)
@@ -1,69 +1,98 @@
 import pandas as pd
 import numpy as np
+from sklearn.base import clone
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.svm import SVC
-from sklearn.neighbors import KNeighborsClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.neighbors import KNeighborsClassifier, NearestNeighbors
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
+from joblib import Parallel, delayed
+import copy
+import os
+import time
 import warnings
+import instrumentacion
+from esquema import inferir_esquema
 warnings.filterwarnings('ignore')
 
+# Motores de SVM: 'kernel' (SVC con calibración interna), 'lineal' (SGD calibrado aparte)
+# u 'online' (SGD con pérdida huber modificada, admite actualizaciones incrementales)
+MOTORES_SVM = ['kernel', 'lineal', 'online']
+# A partir de cuántas filas conviene el motor lineal (el kernel crece más que linealmente)
+UMBRAL_SVM_LINEAL = int(os.environ.get('UMBRAL_SVM_LINEAL', '20000'))
+# Registros agregados por actualizaciones incrementales que se buscan aparte antes de reconstruir el KD-tree
+MAX_REFERENCIAS_RECIENTES = int(os.environ.get('KNN_MAX_RECIENTES', '256'))
+
+def crear_modelo_svm(motor='kernel'):
+    """Crea el clasificador SVM del motor indicado"""
+    if motor == 'lineal':
+        # SVM lineal por descenso de gradiente; probabilidades con calibración sigmoide (Platt)
+        return CalibratedClassifierCV(
+            SGDClassifier(loss='hinge', alpha=1e-4, max_iter=50, tol=1e-3, random_state=42),
+            method='sigmoid', cv=3
+        )
+    if motor == 'online':
+        return SGDClassifier(loss='modified_huber', alpha=1e-4, max_iter=50, tol=1e-3, random_state=42)
+    if motor == 'kernel':
+        return SVC(random_state=42, probability=True)
+    raise ValueError(f"Motor SVM desconocido: {motor}")
+
+def elegir_motor_svm(n_filas, incremental=False):
+    """Motor SVM recomendado según el tamaño del dataset (o el modo incremental)"""
+    if incremental:
+        return 'online'
+    return 'lineal' if n_filas >= UMBRAL_SVM_LINEAL else 'kernel'
+
+def claves_registros(df):
+    """Clave estudiante-semana de cada fila (ID o nombre del alumno)"""
+    clave = 'ID_Estudiante' if 'ID_Estudiante' in df.columns else 'Alumno'
+    return pd.MultiIndex.from_arrays(
+        [df[clave].astype(str).to_numpy(), pd.to_numeric(df['Semana'], errors='coerce').to_numpy()]
+    )
+
+def entrenar_y_evaluar(nombre, modelo, X_train, y_train, X_test, y_test):
+    """Entrena un modelo y devuelve su precisión y el tiempo empleado"""
+    inicio = time.perf_counter()
+    modelo.fit(X_train, y_train)
+    precision = accuracy_score(y_test, modelo.predict(X_test))
+    return nombre, precision, time.perf_counter() - inicio
+
+@instrumentacion.instrumentar_clase
 class PredictorDesempeno:
-    def __init__(self):
+    def __init__(self, motor_svm='kernel'):
         self.modelo_arbol = DecisionTreeClassifier(random_state=42, max_depth=5)
-        self.modelo_svm = SVC(random_state=42, probability=True)
-        self.modelo_knn = KNeighborsClassifier(n_neighbors=3)
+        self.motor_svm = motor_svm
+        self.modelo_svm = crear_modelo_svm(motor_svm)
+        # Índice espacial explícito (KD-tree) construido en cada entrenamiento y guardado con el modelo
+        self.modelo_knn = KNeighborsClassifier(n_neighbors=3, algorithm='kd_tree')
         self.encoder = LabelEncoder()
         self.scaler = StandardScaler()
         self.entrenado = False
         self.caracteristicas = []
+        self.referencias = None
+        # Registros de las actualizaciones incrementales aún fuera del KD-tree y posiciones
+        # de las referencias indexadas que quedaron reemplazadas por una versión más reciente
+        self.referencias_recientes = None
+        self.reemplazadas = np.empty(0, dtype=int)
+        self.knn_recientes = None
+        self._claves_referencias = None
+        self.claves_vistas = None
+        self.actualizaciones = 0
         
-    def preparar_datos(self, df):
+    def preparar_datos(self, df, esquema=None):
         """Prepara los datos para el entrenamiento"""
         try:
+            # Roles de columnas desde el esquema compartido (en caché), antes de agregar el objetivo
+            esquema = esquema or inferir_esquema(df)
+            self.caracteristicas = esquema.caracteristicas(df.columns)
+            
             # Crear variable objetivo (1: en riesgo, 0: no en riesgo)
             df['en_riesgo'] = np.where(df['Promedio'] < 11, 1, 0)
             
-            # Detectar columnas de cursos automáticamente
-            columnas_excluir = ['ID_Estudiante', 'Alumno', 'Estudiante', 'Nombre', 'Student', 'Semana', 
-                               'Fecha Inicio', 'Fecha Fin', 'Clases Asistidas', 'Clases Totales', 
-                               'Promedio', 'Asistencia (%)', 'Promedio_Anterior', 
-                               'Progreso Académico (%)', 'Desempeño academico', 'en_riesgo']
-            
-            cursos_detectados = []
-            for col in df.columns:
-                if col not in columnas_excluir:
-                    # Verificar si es numérica o puede convertirse
-                    if pd.api.types.is_numeric_dtype(df[col]):
-                        cursos_detectados.append(col)
-                    else:
-                        try:
-                            # Intentar convertir a numérico
-                            temp_series = pd.to_numeric(df[col], errors='coerce')
-                            if not temp_series.isna().all():  # Si al menos algunos valores son numéricos
-                                cursos_detectados.append(col)
-                        except:
-                            continue
-            
-            # Si no se detectan cursos, usar los predeterminados
-            if not cursos_detectados:
-                cursos_detectados = [
-                    'Comunicación', 'Matemática', 'Ciencia y Tecnología', 
-                    'Personal Social', 'Educación Religiosa', 'Educación Física', 
-                    'Arte', 'Inglés'
-                ]
-            
-            # Seleccionar características
-            self.caracteristicas = cursos_detectados.copy()
-            
-            # Agregar métricas si existen
-            if 'Asistencia (%)' in df.columns:
-                self.caracteristicas.append('Asistencia (%)')
-            if 'Progreso Académico (%)' in df.columns:
-                self.caracteristicas.append('Progreso Académico (%)')
-            
             # Asegurar que todas las características sean numéricas
             for col in self.caracteristicas:
                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
@@ -77,10 +106,16 @@ class PredictorDesempeno:
             print(f"Error en preparar_datos: {e}")
             return None, None
     
-    def entrenar_modelos(self, df):
-        """Entrena los tres modelos con los datos proporcionados"""
+    def entrenar_modelos(self, df, progreso=None, motor_svm=None, esquema=None):
+        """Entrena los tres modelos con los datos proporcionados (motor_svm='auto' lo elige por tamaño)"""
+        def avisar(fraccion, mensaje):
+            # Reporta el avance (0-1) a quien lo solicite, p. ej. un trabajo en segundo plano
+            if progreso is not None:
+                progreso(fraccion, mensaje)
+        
         try:
-            X, y = self.preparar_datos(df)
+            avisar(0.0, "Preparando datos")
+            X, y = self.preparar_datos(df, esquema)
             
             if X is None or y is None:
                 return None
@@ -90,32 +125,53 @@ class PredictorDesempeno:
                 print("No hay suficientes datos para entrenar")
                 return None
             
+            # Cambiar de motor SVM si se pidió uno distinto
+            if motor_svm == 'auto':
+                motor_svm = elegir_motor_svm(len(X))
+            if motor_svm is not None and motor_svm != self.motor_svm:
+                self.motor_svm = motor_svm
+                self.modelo_svm = crear_modelo_svm(motor_svm)
+            
             # Dividir datos
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
+            avisar(0.1, "Dividiendo datos")
+            X_train, X_test, y_train, y_test, pos_train, _ = train_test_split(
+                X, y, np.arange(len(X)), test_size=0.2, random_state=42, stratify=y
             )
             
             # Escalar características
             X_train_scaled = self.scaler.fit_transform(X_train)
             X_test_scaled = self.scaler.transform(X_test)
             
-            # Entrenar modelos
-            self.modelo_arbol.fit(X_train, y_train)
-            self.modelo_svm.fit(X_train_scaled, y_train)
-            self.modelo_knn.fit(X_train_scaled, y_train)
+            # Entrenar y evaluar los tres modelos en paralelo (son independientes;
+            # sklearn libera el GIL durante el ajuste, por eso bastan hilos)
+            tareas = [
+                ('arbol', self.modelo_arbol, X_train, X_test),
+                ('svm', self.modelo_svm, X_train_scaled, X_test_scaled),
+                ('knn', self.modelo_knn, X_train_scaled, X_test_scaled),
+            ]
+            avisar(0.2, f"Entrenando Árbol de Decisión, SVM ({self.motor_svm}) y KNN en paralelo")
             
-            # Evaluar modelos
-            predicciones_arbol = self.modelo_arbol.predict(X_test)
-            predicciones_svm = self.modelo_svm.predict(X_test_scaled)
-            predicciones_knn = self.modelo_knn.predict(X_test_scaled)
+            resultados = {}
+            inicio = time.perf_counter()
+            ejecucion = Parallel(n_jobs=len(tareas), backend='threading', return_as='generator_unordered')(
+                delayed(entrenar_y_evaluar)(nombre, modelo, X_tr, y_train, X_te, y_test)
+                for nombre, modelo, X_tr, X_te in tareas
+            )
+            for completados, (nombre, precision, duracion) in enumerate(ejecucion, 1):
+                resultados[f'{nombre}_accuracy'] = precision
+                resultados[f'{nombre}_tiempo'] = duracion
+                avisar(0.2 + 0.7 * completados / len(tareas), f"Modelo {nombre} listo")
+            resultados['tiempo_total'] = time.perf_counter() - inicio
             
-            resultados = {
-                'arbol_accuracy': accuracy_score(y_test, predicciones_arbol),
-                'svm_accuracy': accuracy_score(y_test, predicciones_svm),
-                'knn_accuracy': accuracy_score(y_test, predicciones_knn)
-            }
+            # Quién es cada punto del índice KNN (para buscar estudiantes con perfil similar)
+            # y sus características sin escalar (para reconstruirlo en las actualizaciones incrementales)
+            self.referencias = self._referencias(df.iloc[pos_train], X_train)
+            self._limpiar_recientes()
+            self.claves_vistas = claves_registros(df) if 'Semana' in df.columns else None
+            self.actualizaciones = 0
             
             self.entrenado = True
+            avisar(1.0, "Entrenamiento completado")
             return resultados
             
         except Exception as e:
@@ -124,97 +180,381 @@ class PredictorDesempeno:
     
     def predecir_riesgo_manual(self, notas_estudiante, asistencia_porcentaje, progreso_academico=0):
         """Predice riesgo basado en notas manualmente ingresadas"""
+        return self.predecir_riesgo_manual_lote([(notas_estudiante, asistencia_porcentaje, progreso_academico)])[0]
+
+    def _fila_manual(self, notas_estudiante, asistencia_porcentaje, progreso_academico):
+        """Fila de características (en el orden del entrenamiento) para una predicción manual"""
+        datos_estudiante = []
+        
+        # Agregar notas de cursos
+        for i, caracteristica in enumerate(self.caracteristicas):
+            if caracteristica in ['Asistencia (%)', 'Progreso Académico (%)']:
+                continue
+            if i < len(notas_estudiante):
+                datos_estudiante.append(notas_estudiante[i])
+            else:
+                datos_estudiante.append(0)  # Valor por defecto si faltan notas
+        
+        # Agregar asistencia y progreso si están en las características
+        if 'Asistencia (%)' in self.caracteristicas:
+            datos_estudiante.append(asistencia_porcentaje)
+        if 'Progreso Académico (%)' in self.caracteristicas:
+            datos_estudiante.append(progreso_academico)
+        return datos_estudiante
+
+    def predecir_riesgo_manual_lote(self, entradas):
+        """Predice varias entradas (notas, asistencia, progreso) con una llamada por modelo; un resultado por entrada"""
         if not self.entrenado:
-            return {"error": "Modelo no entrenado"}
+            return [{"error": "Modelo no entrenado"} for _ in entradas]
         
         try:
             # Verificar que tenemos características definidas
             if not self.caracteristicas:
-                return {"error": "No hay características definidas para la predicción"}
-            
-            # Preparar datos del estudiante
-            datos_estudiante = []
-            
-            # Agregar notas de cursos
-            for i, caracteristica in enumerate(self.caracteristicas):
-                if caracteristica in ['Asistencia (%)', 'Progreso Académico (%)']:
-                    continue
-                if i < len(notas_estudiante):
-                    datos_estudiante.append(notas_estudiante[i])
-                else:
-                    datos_estudiante.append(0)  # Valor por defecto si faltan notas
+                return [{"error": "No hay características definidas para la predicción"} for _ in entradas]
             
-            # Agregar asistencia y progreso si están en las características
-            if 'Asistencia (%)' in self.caracteristicas:
-                datos_estudiante.append(asistencia_porcentaje)
-            if 'Progreso Académico (%)' in self.caracteristicas:
-                datos_estudiante.append(progreso_academico)
-            
-            # Crear DataFrame
-            X_estudiante = pd.DataFrame([datos_estudiante], columns=self.caracteristicas)
-            X_estudiante_scaled = self.scaler.transform(X_estudiante)
+            # Crear DataFrame con una fila por entrada
+            X = pd.DataFrame([self._fila_manual(*entrada) for entrada in entradas], columns=self.caracteristicas)
+            X_scaled = self.scaler.transform(X)
             
             # Realizar predicciones
-            pred_arbol = self.modelo_arbol.predict(X_estudiante)[0]
-            pred_svm = self.modelo_svm.predict(X_estudiante_scaled)[0]
-            pred_knn = self.modelo_knn.predict(X_estudiante_scaled)[0]
+            pred_arbol = self.modelo_arbol.predict(X)
+            pred_svm = self.modelo_svm.predict(X_scaled)
+            proba_knn = self._proba_knn(X_scaled)
+            pred_knn = self.modelo_knn.classes_.take(proba_knn.argmax(axis=1))
             
             # Obtener probabilidades
-            proba_arbol = self.modelo_arbol.predict_proba(X_estudiante)[0]
-            proba_svm = self.modelo_svm.predict_proba(X_estudiante_scaled)[0]
-            proba_knn = self.modelo_knn.predict_proba(X_estudiante_scaled)[0]
-            
-            # Votación mayoritaria
-            predicciones = [pred_arbol, pred_svm, pred_knn]
-            riesgo_final = 1 if sum(predicciones) >= 2 else 0
+            conf_arbol = self.modelo_arbol.predict_proba(X).max(axis=1)
+            conf_svm = self.modelo_svm.predict_proba(X_scaled).max(axis=1)
+            conf_knn = proba_knn.max(axis=1)
             
-            # Calcular promedio y determinar nivel de desempeño
-            promedio = np.mean(notas_estudiante)
+            resultados = []
+            for i, (notas_estudiante, asistencia_porcentaje, _) in enumerate(entradas):
+                # Votación mayoritaria
+                riesgo_final = 1 if int(pred_arbol[i]) + int(pred_svm[i]) + int(pred_knn[i]) >= 2 else 0
+                
+                # Calcular promedio y determinar nivel de desempeño
+                promedio = np.mean(notas_estudiante)
+                
+                if promedio >= 16:
+                    nivel_desempeno = "ALTO"
+                    color_desempeno = "🟢"
+                elif promedio >= 11:
+                    nivel_desempeno = "MEDIO" 
+                    color_desempeno = "🟡"
+                else:
+                    nivel_desempeno = "BAJO"
+                    color_desempeno = "🔴"
+                
+                # Calcular confianza promedio
+                confianza_promedio = np.mean([conf_arbol[i], conf_svm[i], conf_knn[i]])
+                
+                resultados.append({
+                    'en_riesgo': bool(riesgo_final),
+                    'nivel_desempeno': nivel_desempeno,
+                    'color_desempeno': color_desempeno,
+                    'promedio': float(promedio),
+                    'predicciones_individuales': {
+                        'arbol': {
+                            'prediccion': bool(pred_arbol[i]), 
+                            'confianza': float(conf_arbol[i])
+                        },
+                        'svm': {
+                            'prediccion': bool(pred_svm[i]), 
+                            'confianza': float(conf_svm[i])
+                        },
+                        'knn': {
+                            'prediccion': bool(pred_knn[i]), 
+                            'confianza': float(conf_knn[i])
+                        }
+                    },
+                    'confianza_general': float(confianza_promedio),
+                    'recomendaciones': self.generar_recomendaciones(riesgo_final, nivel_desempeno, promedio, asistencia_porcentaje)
+                })
+            return resultados
             
-            if promedio >= 16:
-                nivel_desempeno = "ALTO"
-                color_desempeno = "🟢"
-            elif promedio >= 11:
-                nivel_desempeno = "MEDIO" 
-                color_desempeno = "🟡"
+        except Exception as e:
+            return [{"error": f"Error en predicción: {str(e)}"} for _ in entradas]
+    
+    def matriz_caracteristicas(self, df):
+        """Matriz de características con las mismas columnas y orden del entrenamiento"""
+        X = pd.DataFrame(index=df.index)
+        for col in self.caracteristicas:
+            if col in df.columns:
+                X[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
             else:
-                nivel_desempeno = "BAJO"
-                color_desempeno = "🔴"
-            
-            # Calcular confianza promedio
-            confianzas = [
-                max(proba_arbol),
-                max(proba_svm),
-                max(proba_knn)
-            ]
-            confianza_promedio = np.mean(confianzas)
-            
+                X[col] = 0.0
+        return X
+
+    def predecir_riesgo_lote(self, df):
+        """Predice el riesgo de todas las filas (estudiante-semana) de un DataFrame en una sola pasada"""
+        if not self.entrenado:
+            print("Modelo no entrenado")
+            return None
+
+        try:
+            X = self.matriz_caracteristicas(df)
+            X_scaled = self.scaler.transform(X)
+
+            # Una sola llamada por modelo; árbol y KNN derivan la clase de sus probabilidades
+            proba_arbol = self.modelo_arbol.predict_proba(X)
+            proba_svm = self.modelo_svm.predict_proba(X_scaled)
+            proba_knn = self._proba_knn(X_scaled)
+
+            pred_arbol = self.modelo_arbol.classes_.take(proba_arbol.argmax(axis=1))
+            pred_svm = self.modelo_svm.predict(X_scaled)
+            pred_knn = self.modelo_knn.classes_.take(proba_knn.argmax(axis=1))
+
+            conf_arbol = proba_arbol.max(axis=1)
+            conf_svm = proba_svm.max(axis=1)
+            conf_knn = proba_knn.max(axis=1)
+
+            # Votación mayoritaria
+            votos = pred_arbol.astype(int) + pred_svm.astype(int) + pred_knn.astype(int)
+
+            # Promedio de cursos y nivel de desempeño (mismos cortes que la predicción manual)
+            cursos = [c for c in self.caracteristicas if c not in ['Asistencia (%)', 'Progreso Académico (%)']]
+            promedio = X[cursos].to_numpy(dtype=float).mean(axis=1) if cursos else np.zeros(len(X))
+            nivel = np.select([promedio >= 16, promedio >= 11], ['ALTO', 'MEDIO'], default='BAJO')
+
+            resultados = pd.DataFrame(index=df.index)
+            for col in ['ID_Estudiante', 'Alumno', 'Semana']:
+                if col in df.columns:
+                    resultados[col] = df[col]
+            resultados['Promedio'] = promedio.round(2)
+            resultados['Nivel Desempeño'] = nivel
+            resultados['Árbol'] = pred_arbol.astype(bool)
+            resultados['Confianza Árbol'] = conf_arbol
+            resultados['SVM'] = pred_svm.astype(bool)
+            resultados['Confianza SVM'] = conf_svm
+            resultados['KNN'] = pred_knn.astype(bool)
+            resultados['Confianza KNN'] = conf_knn
+            resultados['Votos Riesgo'] = votos
+            resultados['Confianza General'] = (conf_arbol + conf_svm + conf_knn) / 3
+            resultados['En Riesgo'] = votos >= 2
+
+            return resultados
+
+        except Exception as e:
+            print(f"Error en predicción por lote: {e}")
+            return None
+
+    def _referencias(self, df, X):
+        columnas = [col for col in ['ID_Estudiante', 'Alumno', 'Semana', 'Promedio', 'Desempeño academico']
+                    if col in df.columns]
+        referencias = pd.concat(
+            [df[columnas].reset_index(drop=True), X[self.caracteristicas].reset_index(drop=True)], axis=1
+        )
+        referencias['En Riesgo'] = (pd.to_numeric(df['Promedio'], errors='coerce') < 11).to_numpy()
+        return referencias
+
+    def _limpiar_recientes(self):
+        self.referencias_recientes = None
+        self.reemplazadas = np.empty(0, dtype=int)
+        self.knn_recientes = None
+        self._claves_referencias = None
+
+    def _hay_recientes(self):
+        return self.referencias_recientes is not None or len(self.reemplazadas) > 0
+
+    def _todas_referencias(self):
+        """Referencias indexadas seguidas de las recientes (las posiciones de _vecinos apuntan aquí)"""
+        if self.referencias_recientes is None:
+            return self.referencias
+        return pd.concat([self.referencias, self.referencias_recientes], ignore_index=True)
+
+    def _puntos_knn(self):
+        """Cantidad de referencias vigentes (sin las reemplazadas)"""
+        recientes = 0 if self.referencias_recientes is None else len(self.referencias_recientes)
+        return len(self.referencias) - len(self.reemplazadas) + recientes
+
+    def _vecinos_indexados(self, X_scaled, n_vecinos):
+        """Vecinos en el KD-tree saltando las referencias reemplazadas (se pide el doble a las filas que no completan)"""
+        n_indexadas = len(self.referencias)
+        n_vecinos = min(n_vecinos, n_indexadas - len(self.reemplazadas))
+        distancias = np.empty((len(X_scaled), max(n_vecinos, 0)))
+        posiciones = np.empty((len(X_scaled), max(n_vecinos, 0)), dtype=int)
+        if n_vecinos <= 0:
+            return distancias, posiciones
+
+        pendientes = np.arange(len(X_scaled))
+        pedidos = min(n_indexadas, n_vecinos + 1)
+        while len(pendientes):
+            d, p = self.modelo_knn.kneighbors(X_scaled[pendientes], n_neighbors=pedidos)
+            validos = ~np.isin(p, self.reemplazadas)
+            completas = validos.sum(axis=1) >= n_vecinos
+            # Los vecinos válidos primero, conservando el orden por distancia
+            orden = np.argsort(~validos[completas], axis=1, kind='stable')[:, :n_vecinos]
+            distancias[pendientes[completas]] = np.take_along_axis(d[completas], orden, axis=1)
+            posiciones[pendientes[completas]] = np.take_along_axis(p[completas], orden, axis=1)
+            pendientes = pendientes[~completas]
+            pedidos = min(n_indexadas, pedidos * 2)
+        return distancias, posiciones
+
+    def _vecinos(self, X_scaled, n_vecinos):
+        """Distancias y posiciones (en _todas_referencias) de los vecinos más cercanos vigentes"""
+        if not self._hay_recientes():
+            return self.modelo_knn.kneighbors(X_scaled, n_neighbors=n_vecinos)
+        distancias, posiciones = self._vecinos_indexados(X_scaled, n_vecinos)
+        if self.knn_recientes is not None:
+            d, p = self.knn_recientes.kneighbors(X_scaled, n_neighbors=min(n_vecinos, len(self.referencias_recientes)))
+            distancias = np.hstack([distancias, d])
+            posiciones = np.hstack([posiciones, p + len(self.referencias)])
+            orden = np.argsort(distancias, axis=1, kind='stable')[:, :n_vecinos]
+            distancias = np.take_along_axis(distancias, orden, axis=1)
+            posiciones = np.take_along_axis(posiciones, orden, axis=1)
+        return distancias, posiciones
+
+    def _proba_knn(self, X_scaled):
+        """Probabilidades del KNN contando también las referencias recientes (votos uniformes)"""
+        if not self._hay_recientes():
+            return self.modelo_knn.predict_proba(X_scaled)
+        _, posiciones = self._vecinos(X_scaled, self.modelo_knn.n_neighbors)
+        etiquetas = self.referencias['En Riesgo'].astype(int).to_numpy()
+        if self.referencias_recientes is not None:
+            etiquetas = np.concatenate([etiquetas, self.referencias_recientes['En Riesgo'].astype(int).to_numpy()])
+        votos = etiquetas[posiciones]
+        return (votos[:, :, None] == self.modelo_knn.classes_).mean(axis=1)
+
+    def _reconstruir_indice(self):
+        """Pasa las referencias recientes al KD-tree y descarta las reemplazadas"""
+        vigentes = np.ones(len(self.referencias), dtype=bool)
+        vigentes[self.reemplazadas] = False
+        partes = [self.referencias[vigentes]]
+        if self.referencias_recientes is not None:
+            partes.append(self.referencias_recientes)
+        self.referencias = pd.concat(partes, ignore_index=True)
+        self.modelo_knn = clone(self.modelo_knn).fit(
+            self.scaler.transform(self.referencias[self.caracteristicas]), self.referencias['En Riesgo'].astype(int)
+        )
+        self._limpiar_recientes()
+
+    def admite_incremental(self):
+        """Indica si el predictor puede actualizarse con partial_fit sin reentrenar"""
+        return self.entrenado and self.motor_svm == 'online' and self.referencias is not None
+
+    def copia_incremental(self):
+        """Copia para actualizar sin tocar a quien use este predictor; solo se duplica lo que partial_fit modifica"""
+        copia = copy.copy(self)
+        copia.modelo_svm = copy.deepcopy(self.modelo_svm)
+        return copia
+
+    def filas_nuevas(self, df):
+        """Filas de df cuyo par estudiante-semana no se ha usado aún para entrenar o actualizar"""
+        if self.claves_vistas is None or 'Semana' not in df.columns:
+            return df
+        return df[~claves_registros(df).isin(self.claves_vistas)]
+
+    def actualizar_incremental(self, df):
+        """Actualiza el SVM en línea y las referencias del KNN solo con las filas dadas (sin reentrenar).
+
+        El escalador queda fijo hasta el próximo reentrenamiento para que el KD-tree siga siendo válido;
+        las filas nuevas se buscan aparte y el árbol se reconstruye cada MAX_REFERENCIAS_RECIENTES filas.
+        """
+        if not self.admite_incremental():
+            print("El modelo actual no admite actualización incremental")
+            return None
+
+        try:
+            inicio = time.perf_counter()
+            X = self.matriz_caracteristicas(df)
+            y = (pd.to_numeric(df['Promedio'], errors='coerce') < 11).astype(int).to_numpy()
+            X_scaled = self.scaler.transform(X)
+
+            # Precisión del SVM sobre las filas nuevas antes de aprender de ellas
+            precision_previa = accuracy_score(y, self.modelo_svm.predict(X_scaled))
+            self.modelo_svm.partial_fit(X_scaled, y)
+
+            # Índice KNN: los registros editados reemplazan a su versión anterior, indexada o reciente
+            nuevas = self._referencias(df, X)
+            recientes = self.referencias_recientes
+            if 'Semana' in df.columns:
+                claves_nuevas = claves_registros(df)
+                if self._claves_referencias is None:
+                    self._claves_referencias = claves_registros(self.referencias)
+                if self._claves_referencias.is_unique:
+                    posiciones = self._claves_referencias.get_indexer(claves_nuevas)
+                    posiciones = posiciones[posiciones >= 0]
+                else:
+                    posiciones = np.flatnonzero(self._claves_referencias.isin(claves_nuevas))
+                self.reemplazadas = np.union1d(self.reemplazadas, posiciones)
+                if recientes is not None:
+                    recientes = recientes[~claves_registros(recientes).isin(claves_nuevas)]
+                if not claves_nuevas.isin(self.claves_vistas).all():
+                    self.claves_vistas = self.claves_vistas.append(claves_nuevas).unique()
+            self.referencias_recientes = nuevas if recientes is None else pd.concat([recientes, nuevas], ignore_index=True)
+
+            if len(self.referencias_recientes) >= MAX_REFERENCIAS_RECIENTES:
+                self._reconstruir_indice()
+            else:
+                self.knn_recientes = NearestNeighbors(algorithm='brute').fit(
+                    self.scaler.transform(self.referencias_recientes[self.caracteristicas])
+                )
+
+            self.actualizaciones += 1
             return {
-                'en_riesgo': bool(riesgo_final),
-                'nivel_desempeno': nivel_desempeno,
-                'color_desempeno': color_desempeno,
-                'promedio': float(promedio),
-                'predicciones_individuales': {
-                    'arbol': {
-                        'prediccion': bool(pred_arbol), 
-                        'confianza': float(max(proba_arbol))
-                    },
-                    'svm': {
-                        'prediccion': bool(pred_svm), 
-                        'confianza': float(max(proba_svm))
-                    },
-                    'knn': {
-                        'prediccion': bool(pred_knn), 
-                        'confianza': float(max(proba_knn))
-                    }
-                },
-                'confianza_general': float(confianza_promedio),
-                'recomendaciones': self.generar_recomendaciones(riesgo_final, nivel_desempeno, promedio, asistencia_porcentaje)
+                'filas': len(df),
+                'svm_accuracy_previa': precision_previa,
+                'knn_puntos': self._puntos_knn(),
+                'tiempo_total': time.perf_counter() - inicio,
             }
-            
+
         except Exception as e:
-            return {"error": f"Error en predicción: {str(e)}"}
-    
+            print(f"Error en actualización incremental: {e}")
+            return None
+
+    def buscar_similares(self, df, k=5):
+        """Para cada fila de df, los k estudiantes con perfil más cercano en el índice KNN"""
+        if not self.entrenado or self.referencias is None:
+            print("Modelo sin índice de vecinos")
+            return None
+
+        try:
+            X_scaled = self.scaler.transform(self.matriz_caracteristicas(df))
+            referencias = self._todas_referencias()
+            total = self._puntos_knn()
+            clave = next((col for col in ['ID_Estudiante', 'Alumno'] if col in referencias.columns), None)
+            claves_referencia = referencias[clave].astype(str).to_numpy() if clave else None
+            propias = df[clave].astype(str).to_numpy() if clave in df.columns else None
+
+            # Se piden vecinos de sobra (pueden repetirse semanas del propio estudiante o de otro);
+            # las filas que no alcanzan k compañeros distintos se vuelven a consultar con el doble
+            pendientes = np.arange(len(df))
+            n_vecinos = min(total, (k + 1) * 4)
+            partes = []
+            while len(pendientes):
+                distancias, posiciones = self._vecinos(X_scaled[pendientes], n_vecinos)
+                vecinos = pd.DataFrame({
+                    'fila': np.repeat(pendientes, n_vecinos),
+                    'posicion': posiciones.ravel(),
+                    'Distancia': distancias.ravel().round(3),
+                })
+                if clave is not None:
+                    # Sin el propio estudiante y con una sola semana (la más cercana) por compañero
+                    vecinos['clave'] = claves_referencia[vecinos['posicion']]
+                    if propias is not None:
+                        vecinos = vecinos[vecinos['clave'].to_numpy() != propias[vecinos['fila']]]
+                    vecinos = vecinos.drop_duplicates(['fila', 'clave'])
+                vecinos = vecinos.groupby('fila', sort=False).head(k)
+
+                completas = vecinos['fila'].value_counts()
+                completas = completas.index[completas >= k].to_numpy()
+                if n_vecinos == total:
+                    completas = pendientes
+                partes.append(vecinos[vecinos['fila'].isin(completas)])
+                pendientes = np.setdiff1d(pendientes, completas)
+                n_vecinos = min(total, n_vecinos * 2)
+
+            vecinos = pd.concat(partes).sort_values(['fila', 'Distancia'], kind='stable')
+            columnas = [col for col in referencias.columns if col not in self.caracteristicas]
+            resultado = referencias.iloc[vecinos['posicion']][columnas].reset_index(drop=True)
+            resultado.insert(0, 'Consulta', df.index.to_numpy()[vecinos['fila']])
+            resultado['Distancia'] = vecinos['Distancia'].to_numpy()
+            return resultado
+
+        except Exception as e:
+            print(f"Error al buscar estudiantes similares: {e}")
+            return None
+
     def generar_recomendaciones(self, riesgo, nivel_desempeno, promedio, asistencia):
         """Genera recomendaciones personalizadas basadas en el análisis"""
         recomendaciones = []
@@ -260,7 +600,13 @@ class PredictorDesempeno:
                 'svm': self.modelo_svm,
                 'knn': self.modelo_knn,
                 'scaler': self.scaler,
+                'motor_svm': self.motor_svm,
                 'caracteristicas': self.caracteristicas,
+                'referencias': self.referencias,
+                'referencias_recientes': self.referencias_recientes,
+                'reemplazadas': self.reemplazadas,
+                'claves_vistas': self.claves_vistas,
+                'actualizaciones': self.actualizaciones,
                 'entrenado': self.entrenado
             }, ruta)
             return True
@@ -268,15 +614,26 @@ class PredictorDesempeno:
             print(f"Error al guardar modelos: {e}")
             return False
     
-    def cargar_modelos(self, ruta):
-        """Carga modelos previamente entrenados"""
+    def cargar_modelos(self, ruta, mmap_mode=None):
+        """Carga modelos previamente entrenados (mmap_mode='c' mapea los arreglos en memoria)"""
         try:
-            modelos = joblib.load(ruta)
+            modelos = joblib.load(ruta, mmap_mode=mmap_mode)
             self.modelo_arbol = modelos['arbol']
             self.modelo_svm = modelos['svm']
             self.modelo_knn = modelos['knn']
             self.scaler = modelos['scaler']
+            self.motor_svm = modelos.get('motor_svm', 'kernel')
             self.caracteristicas = modelos.get('caracteristicas', [])
+            self.referencias = modelos.get('referencias')
+            self._limpiar_recientes()
+            self.referencias_recientes = modelos.get('referencias_recientes')
+            self.reemplazadas = np.asarray(modelos.get('reemplazadas', np.empty(0, dtype=int)))
+            if self.referencias_recientes is not None:
+                self.knn_recientes = NearestNeighbors(algorithm='brute').fit(
+                    self.scaler.transform(self.referencias_recientes[self.caracteristicas])
+                )
+            self.claves_vistas = modelos.get('claves_vistas')
+            self.actualizaciones = modelos.get('actualizaciones', 0)
             self.entrenado = modelos.get('entrenado', False)
             return True
         except Exception as e:
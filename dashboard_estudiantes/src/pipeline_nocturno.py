@@ -0,0 +1,271 @@
+"""Pipeline nocturno sin Streamlit: ingesta → fechas → métricas → modelo → riesgo por lote → resultados.
+
+Cada archivo de sección se procesa y se puntúa en un proceso aparte. Cada paso deja un punto
+de control en la carpeta de salida (parquet + estado.json): si la ejecución se interrumpe,
+al repetirla se retoma donde quedó y solo se rehacen los archivos que cambiaron.
+
+Uso (desde la raíz del repositorio):
+    python dashboard_estudiantes/src/pipeline_nocturno.py secciones/*.xlsx --salida resultados/
+    python dashboard_estudiantes/src/pipeline_nocturno.py secciones/*.csv --salida resultados/ --procesos 4 --entrenar siempre
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+from datetime import datetime
+
+import pandas as pd
+
+import esquema
+import ingesta
+from cache_ingesta import huella_contenido
+from modelos import PredictorDesempeno, elegir_motor_svm
+from registro_modelos import RegistroModelos, huella_dataset
+
+# Cuándo entrenar: 'si-cambian-datos' reentrena si ningún modelo del registro tiene la huella de los datos
+MODOS_ENTRENAMIENTO = ['si-cambian-datos', 'si-falta', 'siempre']
+
+# Predictores cargados en cada proceso del pool (un proceso puntúa varias secciones con el mismo modelo)
+_predictores = {}
+
+
+def _escribir_parquet(df, ruta):
+    """Escribe el parquet de forma atómica (un archivo a medias nunca queda como punto de control)"""
+    temporal = ruta + '.tmp'
+    df.to_parquet(temporal, index=False)
+    os.replace(temporal, ruta)
+
+
+def ingerir_seccion(ruta, destino):
+    """Procesa un archivo de sección (en un proceso del pool) y guarda el resultado; devuelve (filas, cursos, segundos, error)"""
+    with open(ruta, 'rb') as f:
+        df, cursos, segundos, error = ingesta.procesar_seccion(os.path.basename(ruta), f.read())
+    if error is None:
+        _escribir_parquet(df, destino)
+    return (0 if df is None else len(df)), cursos, segundos, error
+
+
+def puntuar_seccion(origen, ruta_modelo, destino):
+    """Predice el riesgo de todas las filas de una sección (en un proceso del pool); devuelve (filas, en_riesgo, segundos, error)"""
+    inicio = time.perf_counter()
+    try:
+        if ruta_modelo not in _predictores:
+            predictor = PredictorDesempeno()
+            if not predictor.cargar_modelos(ruta_modelo, mmap_mode='c'):
+                raise ValueError(f"No se pudo cargar el modelo {ruta_modelo}")
+            _predictores.clear()
+            _predictores[ruta_modelo] = predictor
+        df = pd.read_parquet(origen)
+        resultados = _predictores[ruta_modelo].predecir_riesgo_lote(df)
+        if resultados is None:
+            raise ValueError("Error en predicción por lote")
+        resultados.insert(0, 'Seccion', df['Seccion'].astype(str).to_numpy())
+        _escribir_parquet(resultados, destino)
+        return len(resultados), int(resultados['En Riesgo'].sum()), time.perf_counter() - inicio, None
+    except Exception as e:
+        return 0, 0, time.perf_counter() - inicio, str(e)
+
+
+class EstadoPipeline:
+    """Puntos de control de una carpeta de salida (estado.json + parquet por sección)"""
+
+    def __init__(self, salida):
+        self.salida = salida
+        self.ruta = os.path.join(salida, 'estado.json')
+        for carpeta in ['secciones', 'riesgo']:
+            os.makedirs(os.path.join(salida, carpeta), exist_ok=True)
+        try:
+            with open(self.ruta, encoding='utf-8') as f:
+                self.datos = json.load(f)
+        except (OSError, ValueError):
+            self.datos = {'secciones': {}, 'modelo': None}
+
+    def guardar(self):
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.datos, f, ensure_ascii=False, indent=2)
+        os.replace(temporal, self.ruta)
+
+    def seccion(self, nombre):
+        return self.datos['secciones'].setdefault(nombre, {})
+
+    def ruta_seccion(self, nombre):
+        return os.path.join(self.salida, 'secciones', f"{nombre}.parquet")
+
+    def ruta_riesgo(self, nombre):
+        return os.path.join(self.salida, 'riesgo', f"{nombre}.parquet")
+
+
+def ejecutar_en_pool(pool, tareas, funcion, al_terminar):
+    """Envía las tareas {nombre: argumentos} al pool y llama al_terminar(nombre, resultado) a medida que terminan"""
+    futuros = {pool.submit(funcion, *argumentos): nombre for nombre, argumentos in tareas.items()}
+    for futuro in as_completed(futuros):
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            # El proceso terminó de forma inesperada (p. ej. sin memoria)
+            resultado = (0, 0, 0.0, str(e))
+        al_terminar(futuros[futuro], resultado)
+
+
+def validar_secciones(archivos):
+    """Quita rutas repetidas y falla si dos archivos distintos dan la misma sección (chocarían sus puntos de control)"""
+    archivos = list(dict.fromkeys(os.path.abspath(ruta) for ruta in archivos))
+    por_seccion = {}
+    for ruta in archivos:
+        por_seccion.setdefault(ingesta.nombre_seccion(ruta), []).append(ruta)
+    repetidas = {nombre: rutas for nombre, rutas in por_seccion.items() if len(rutas) > 1}
+    if repetidas:
+        detalle = "; ".join(f"{nombre}: {', '.join(rutas)}" for nombre, rutas in repetidas.items())
+        raise SystemExit(f"❌ Varios archivos corresponden a la misma sección (renómbralos): {detalle}")
+    return archivos
+
+
+def etapa_ingesta(estado, archivos, pool):
+    """Procesa las secciones nuevas o modificadas; devuelve los nombres de las secciones disponibles"""
+    pendientes = {}
+    for ruta in archivos:
+        nombre = ingesta.nombre_seccion(ruta)
+        with open(ruta, 'rb') as f:
+            huella = huella_contenido(f.read())
+        info = estado.seccion(nombre)
+        if info.get('huella') == huella and info.get('error') is None and os.path.exists(estado.ruta_seccion(nombre)):
+            print(f"⏭️  {nombre}: sin cambios (punto de control)")
+            continue
+        estado.datos['secciones'][nombre] = {'archivo': os.path.abspath(ruta), 'huella': huella}
+        pendientes[nombre] = (ruta, estado.ruta_seccion(nombre))
+
+    def al_terminar(nombre, resultado):
+        filas, cursos, segundos, error = resultado
+        info = estado.seccion(nombre)
+        if error is None:
+            info.update({'filas': filas, 'cursos': cursos, 'segundos_ingesta': round(segundos, 2), 'error': None})
+            print(f"✅ {nombre}: {filas} registros ({segundos:.1f} s)")
+        else:
+            info['error'] = error
+            print(f"❌ {nombre}: {error}")
+        estado.guardar()
+
+    ejecutar_en_pool(pool, pendientes, ingerir_seccion, al_terminar)
+    return [ingesta.nombre_seccion(ruta) for ruta in archivos
+            if estado.seccion(ingesta.nombre_seccion(ruta)).get('error') is None]
+
+
+def etapa_modelo(estado, secciones, registro, modo):
+    """Carga del registro un modelo para los datos de todas las secciones o entrena uno nuevo"""
+    df = pd.concat([pd.read_parquet(estado.ruta_seccion(nombre)) for nombre in secciones], ignore_index=True)
+    esquema_datos = esquema.inferir_esquema(df)
+    caracteristicas = esquema_datos.caracteristicas(df.columns)
+    huella = huella_dataset(df, df.columns)
+
+    metadatos = None
+    if modo != 'siempre':
+        metadatos = registro.buscar_compatible(caracteristicas, huella)
+        if metadatos is not None and modo == 'si-cambian-datos' and metadatos['huella'] != huella:
+            metadatos = None
+    if metadatos is not None:
+        print(f"🗂️ Modelo {metadatos['version']} del registro (compatible con los datos)")
+        return metadatos
+
+    print(f"🔧 Entrenando modelos con {len(df)} registros...")
+    predictor = PredictorDesempeno()
+    resultados = predictor.entrenar_modelos(df, motor_svm=elegir_motor_svm(len(df)), esquema=esquema_datos)
+    if resultados is None:
+        raise SystemExit("❌ No se pudo entrenar el modelo con los datos de las secciones")
+    metadatos = registro.guardar(predictor, huella, resultados)
+    if metadatos is None:
+        raise SystemExit("❌ No se pudo guardar el modelo en el registro")
+    print(f"✅ Modelo {metadatos['version']} entrenado en {resultados['tiempo_total']:.1f} s")
+    return metadatos
+
+
+def etapa_puntuacion(estado, secciones, ruta_modelo, version, pool):
+    """Predice el riesgo de las secciones que aún no se puntuaron con esta versión del modelo"""
+    pendientes = {}
+    for nombre in secciones:
+        info = estado.seccion(nombre)
+        if info.get('modelo') == version and os.path.exists(estado.ruta_riesgo(nombre)):
+            print(f"⏭️  {nombre}: ya puntuada con {version} (punto de control)")
+            continue
+        pendientes[nombre] = (estado.ruta_seccion(nombre), ruta_modelo, estado.ruta_riesgo(nombre))
+
+    def al_terminar(nombre, resultado):
+        filas, en_riesgo, segundos, error = resultado
+        info = estado.seccion(nombre)
+        if error is None:
+            info.update({'modelo': version, 'en_riesgo': en_riesgo, 'segundos_riesgo': round(segundos, 2)})
+            print(f"✅ {nombre}: {en_riesgo} de {filas} registros en riesgo ({segundos:.1f} s)")
+        else:
+            info.update({'modelo': None, 'error': error})
+            print(f"❌ {nombre}: {error}")
+        estado.guardar()
+
+    ejecutar_en_pool(pool, pendientes, puntuar_seccion, al_terminar)
+    return [nombre for nombre in secciones if estado.seccion(nombre).get('modelo') == version]
+
+
+def etapa_resultados(estado, secciones, formato):
+    """Une el riesgo de las secciones en un archivo y escribe el resumen por sección"""
+    riesgo = pd.concat([pd.read_parquet(estado.ruta_riesgo(nombre)) for nombre in secciones], ignore_index=True)
+    exportar, extension, _ = ingesta.FORMATOS_EXPORTACION[formato]
+    ruta = os.path.join(estado.salida, f"riesgo_{datetime.now().strftime('%Y%m%d')}.{extension}")
+    with open(ruta, 'wb') as f:
+        f.write(exportar(riesgo))
+
+    resumen = pd.DataFrame([{
+        'Sección': nombre,
+        'Registros': estado.seccion(nombre)['filas'],
+        'En Riesgo': estado.seccion(nombre)['en_riesgo'],
+        'Modelo': estado.seccion(nombre)['modelo'],
+    } for nombre in secciones])
+    resumen.to_csv(os.path.join(estado.salida, 'resumen_secciones.csv'), index=False, encoding='utf-8-sig')
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline nocturno de riesgo académico (sin Streamlit)")
+    parser.add_argument('archivos', nargs='+', help="Archivos de sección (Excel o CSV)")
+    parser.add_argument('--salida', required=True, help="Carpeta de resultados y puntos de control")
+    parser.add_argument('--procesos', type=int, default=ingesta.PROCESOS_INGESTA)
+    parser.add_argument('--registro', help="Directorio del registro de modelos")
+    parser.add_argument('--entrenar', choices=MODOS_ENTRENAMIENTO, default='si-cambian-datos')
+    parser.add_argument('--formato', choices=list(ingesta.FORMATOS_EXPORTACION), default='CSV')
+    parser.add_argument('--reiniciar', action='store_true', help="Ignora los puntos de control y procesa todo")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    archivos = validar_secciones(args.archivos)
+    estado = EstadoPipeline(args.salida)
+    if args.reiniciar:
+        estado.datos = {'secciones': {}, 'modelo': None}
+    registro = RegistroModelos(args.registro) if args.registro else RegistroModelos()
+
+    pool = ingesta.crear_pool_ingesta(max(1, min(args.procesos, len(archivos))))
+    try:
+        secciones = etapa_ingesta(estado, archivos, pool)
+        if not secciones:
+            raise SystemExit("❌ No se pudo procesar ningún archivo")
+
+        metadatos = etapa_modelo(estado, secciones, registro, args.entrenar)
+        estado.datos['modelo'] = metadatos['version']
+        estado.guardar()
+
+        ruta_modelo = os.path.join(registro.directorio, metadatos['archivo'])
+        secciones = etapa_puntuacion(estado, secciones, ruta_modelo, metadatos['version'], pool)
+    finally:
+        pool.shutdown()
+    if not secciones:
+        raise SystemExit("❌ No se pudo puntuar ninguna sección")
+
+    ruta = etapa_resultados(estado, secciones, args.formato)
+    fallidas = len(archivos) - len(secciones)
+    print(f"📄 Resultados: {ruta}")
+    print(f"⏱️ {len(secciones)} secciones en {time.perf_counter() - inicio:.1f} s"
+          + (f" | ❌ {fallidas} con errores (ver {estado.ruta})" if fallidas else ""))
+    sys.exit(1 if fallidas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from modelos import PredictorDesempeno
+
+DIRECTORIO_MODELOS = os.environ.get(
+    'REGISTRO_MODELOS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'modelos')
+)
+# Cantidad de versiones que se conservan en disco
+MAX_VERSIONES = int(os.environ.get('REGISTRO_MODELOS_MAX', '5'))
+
+# Tipos de versión: reentrenamiento completo o actualización incremental guardada
+COMPLETA = 'completa'
+INCREMENTAL = 'incremental'
+
+
+def huella_dataset(df, columnas):
+    """Huella del contenido del dataset en las columnas indicadas"""
+    columnas = [col for col in columnas if col in df.columns]
+    huella = hashlib.sha256('|'.join(columnas).encode())
+    huella.update(pd.util.hash_pandas_object(df[columnas], index=False).to_numpy().tobytes())
+    return huella.hexdigest()[:16]
+
+
+class RegistroModelos:
+    """Registro en disco de predictores entrenados, con historial de versiones"""
+
+    def __init__(self, directorio=DIRECTORIO_MODELOS, max_versiones=MAX_VERSIONES):
+        self.directorio = directorio
+        self.max_versiones = max_versiones
+        self.ruta_indice = os.path.join(directorio, 'registro.json')
+        self.lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def versiones(self):
+        """Metadatos de las versiones guardadas (de la más reciente a la más antigua)"""
+        if not os.path.exists(self.ruta_indice):
+            return []
+        try:
+            with open(self.ruta_indice, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except Exception as e:
+            print(f"Error al leer el registro de modelos: {e}")
+            return []
+
+    def _escribir_indice(self, versiones):
+        temporal = self.ruta_indice + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(versiones, archivo, ensure_ascii=False, indent=2)
+        os.replace(temporal, self.ruta_indice)
+
+    def guardar(self, predictor, huella, resultados=None, tipo=COMPLETA):
+        """Guarda un predictor como nueva versión y aplica el límite de retención (sin borrar la última completa)"""
+        fecha = datetime.now()
+        version = f"v{fecha.strftime('%Y%m%d%H%M%S%f')}-{huella[:8]}"
+        archivo = f"{version}.joblib"
+
+        # Sin compresión para poder mapear los arreglos en memoria al cargar
+        if not predictor.guardar_modelos(os.path.join(self.directorio, archivo)):
+            return None
+
+        metadatos = {
+            'version': version,
+            'archivo': archivo,
+            'huella': huella,
+            'caracteristicas': list(predictor.caracteristicas),
+            'motor_svm': predictor.motor_svm,
+            'resultados': {k: float(v) for k, v in (resultados or {}).items()},
+            'tipo': tipo,
+            'fecha': fecha.isoformat(timespec='seconds'),
+        }
+        with self.lock:
+            versiones = [metadatos] + self.versiones()
+            conservar = versiones[:self.max_versiones]
+            # Las versiones incrementales no desplazan a la última completa (base para volver a reentrenar)
+            completa = next((v for v in versiones if v.get('tipo', COMPLETA) == COMPLETA), None)
+            if completa is not None and completa not in conservar:
+                conservar = conservar[:max(self.max_versiones - 1, 1)] + [completa]
+            eliminar = [v for v in versiones if v not in conservar]
+            self._escribir_indice(conservar)
+        for vieja in eliminar:
+            try:
+                os.remove(os.path.join(self.directorio, vieja['archivo']))
+            except OSError:
+                pass
+        return metadatos
+
+    def buscar_compatible(self, caracteristicas=None, huella=None):
+        """Metadatos de la versión más reciente compatible (prefiere la misma huella de datos)"""
+        candidatas = [
+            v for v in self.versiones()
+            if caracteristicas is None or v['caracteristicas'] == list(caracteristicas)
+        ]
+        if huella is not None:
+            exactas = [v for v in candidatas if v['huella'] == huella]
+            candidatas = exactas or candidatas
+        return candidatas[0] if candidatas else None
+
+    def cargar(self, metadatos):
+        """Carga el predictor de una versión usando mapeo de memoria"""
+        predictor = PredictorDesempeno()
+        if predictor.cargar_modelos(os.path.join(self.directorio, metadatos['archivo']), mmap_mode='c'):
+            return predictor
+        return None
+
+    def cargar_compatible(self, caracteristicas=None, huella=None):
+        """Carga la versión más reciente compatible; devuelve (predictor, metadatos) o (None, None)"""
+        metadatos = self.buscar_compatible(caracteristicas, huella)
+        if metadatos is None:
+            return None, None
+        predictor = self.cargar(metadatos)
+        return (predictor, metadatos) if predictor is not None else (None, None)
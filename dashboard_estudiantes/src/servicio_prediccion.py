@@ -0,0 +1,248 @@
+"""Servicio HTTP (tornado) de predicción de riesgo con el último modelo del registro.
+
+Uso (desde la raíz del repositorio):
+    python dashboard_estudiantes/src/servicio_prediccion.py --puerto 8600
+
+    POST /predict        {"notas": [14, 12, ...] o {"Matemática": 14, ...}, "asistencia": 90, "progreso": 0}
+    POST /predict/lote   {"estudiantes": [{...}, {...}]}
+    GET  /salud
+
+Las respuestas tienen la misma estructura que PredictorDesempeno.predecir_riesgo_manual.
+Las peticiones individuales que llegan casi juntas se agrupan en un solo lote por modelo.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+from registro_modelos import RegistroModelos
+
+# Espera máxima para juntar peticiones individuales en un lote y tamaño máximo del lote
+ESPERA_LOTE_MS = float(os.environ.get('SERVICIO_ESPERA_LOTE_MS', 2))
+MAX_LOTE = int(os.environ.get('SERVICIO_MAX_LOTE', 256))
+# Hilos que ejecutan los lotes (la predicción de sklearn libera el GIL en buena parte)
+HILOS_PREDICCION = int(os.environ.get('SERVICIO_HILOS', 2))
+# Máximo de estudiantes aceptados en una petición /predict/lote
+MAX_ESTUDIANTES_PETICION = 10_000
+# Token opcional: si está definido se exige la cabecera "Authorization: Bearer <token>"
+TOKEN_SERVICIO = os.environ.get('SERVICIO_TOKEN')
+
+
+class EntradaInvalida(ValueError):
+    """Petición con datos que no se pueden evaluar"""
+
+
+def leer_entrada(datos, cursos):
+    """Convierte un JSON de estudiante en (notas, asistencia, progreso) como lo espera el predictor"""
+    if not isinstance(datos, dict):
+        raise EntradaInvalida("Cada estudiante debe ser un objeto JSON")
+    notas = datos.get('notas')
+    if isinstance(notas, dict):
+        faltantes = [curso for curso in cursos if curso not in notas]
+        if faltantes:
+            raise EntradaInvalida(f"Faltan notas de: {', '.join(faltantes)}")
+        notas = [notas[curso] for curso in cursos]
+    if not isinstance(notas, list) or len(notas) != len(cursos):
+        raise EntradaInvalida(f"'notas' debe ser una lista de {len(cursos)} notas ({', '.join(cursos)}) "
+                              "o un objeto {curso: nota}")
+    try:
+        notas = [float(nota) for nota in notas]
+        asistencia = float(datos.get('asistencia', 100))
+        progreso = float(datos.get('progreso', 0))
+    except (TypeError, ValueError):
+        raise EntradaInvalida("Las notas, la asistencia y el progreso deben ser números")
+    # json.loads acepta NaN e Infinity: no se pueden evaluar
+    if not all(math.isfinite(valor) for valor in notas + [asistencia, progreso]):
+        raise EntradaInvalida("Las notas, la asistencia y el progreso deben ser números finitos")
+    return notas, asistencia, progreso
+
+
+class AgrupadorLotes:
+    """Junta las peticiones individuales que llegan en una ventana corta y las evalúa en un solo lote"""
+
+    def __init__(self, predictor, espera_ms=ESPERA_LOTE_MS, max_lote=MAX_LOTE, hilos=HILOS_PREDICCION):
+        self.predictor = predictor
+        self.espera = espera_ms / 1000
+        self.max_lote = max_lote
+        self.ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='prediccion')
+        self.pendientes = []
+        self.temporizador = None
+        self.lotes = 0
+        self.predicciones = 0
+
+    async def predecir(self, entrada):
+        """Resultado de una entrada, evaluada junto con las que lleguen en la misma ventana"""
+        futuro = asyncio.get_running_loop().create_future()
+        self.pendientes.append((entrada, futuro))
+        if len(self.pendientes) >= self.max_lote or self.espera <= 0:
+            self._despachar()
+        elif self.temporizador is None:
+            self.temporizador = asyncio.get_running_loop().call_later(self.espera, self._despachar)
+        return await futuro
+
+    async def predecir_varias(self, entradas):
+        """Resultados de varias entradas (una petición de lote), en trozos de max_lote"""
+        resultados = []
+        for inicio in range(0, len(entradas), self.max_lote):
+            resultados.extend(await self._ejecutar(entradas[inicio:inicio + self.max_lote]))
+        return resultados
+
+    def _despachar(self):
+        if self.temporizador is not None:
+            self.temporizador.cancel()
+            self.temporizador = None
+        lote, self.pendientes = self.pendientes, []
+        if lote:
+            asyncio.ensure_future(self._resolver(lote))
+
+    async def _resolver(self, lote):
+        try:
+            resultados = await self._ejecutar([entrada for entrada, _ in lote])
+        except Exception as e:
+            resultados = [{"error": f"Error en predicción: {e}"} for _ in lote]
+        for (_, futuro), resultado in zip(lote, resultados):
+            if not futuro.done():
+                futuro.set_result(resultado)
+
+    async def _ejecutar(self, entradas):
+        self.lotes += 1
+        self.predicciones += len(entradas)
+        return await asyncio.get_running_loop().run_in_executor(self.ejecutor, self._predecir_lote, entradas)
+
+    def _predecir_lote(self, entradas):
+        resultados = self.predictor.predecir_riesgo_manual_lote(entradas)
+        if len(entradas) > 1 and any('error' in resultado for resultado in resultados):
+            # El lote mezcla peticiones de varios clientes: una entrada que falla no debe arrastrar a las demás
+            resultados = [self.predictor.predecir_riesgo_manual_lote([entrada])[0] for entrada in entradas]
+        return resultados
+
+
+class ManejadorBase(tornado.web.RequestHandler):
+    def initialize(self, servicio):
+        self.servicio = servicio
+
+    def prepare(self):
+        autorizacion = self.request.headers.get('Authorization', '')
+        if TOKEN_SERVICIO and not hmac.compare_digest(autorizacion.encode(), f"Bearer {TOKEN_SERVICIO}".encode()):
+            self.responder({"error": "No autorizado"}, 401)
+            self.finish()
+
+    def responder(self, datos, estado=200):
+        self.set_status(estado)
+        self.set_header('Content-Type', 'application/json; charset=utf-8')
+        self.write(json.dumps(datos, ensure_ascii=False))
+
+    def leer_json(self):
+        try:
+            return json.loads(self.request.body or b'{}')
+        except ValueError:
+            raise EntradaInvalida("El cuerpo de la petición no es JSON válido")
+
+
+class ManejadorPrediccion(ManejadorBase):
+    async def post(self):
+        try:
+            entrada = leer_entrada(self.leer_json(), self.servicio['cursos'])
+        except EntradaInvalida as e:
+            return self.responder({"error": str(e)}, 400)
+        resultado = await self.servicio['agrupador'].predecir(entrada)
+        self.responder(resultado, 500 if 'error' in resultado else 200)
+
+
+class ManejadorPrediccionLote(ManejadorBase):
+    async def post(self):
+        try:
+            cuerpo = self.leer_json()
+            estudiantes = cuerpo.get('estudiantes') if isinstance(cuerpo, dict) else None
+            if not isinstance(estudiantes, list) or not estudiantes:
+                raise EntradaInvalida("'estudiantes' debe ser una lista no vacía")
+            if len(estudiantes) > MAX_ESTUDIANTES_PETICION:
+                raise EntradaInvalida(f"Máximo {MAX_ESTUDIANTES_PETICION} estudiantes por petición")
+            entradas = [leer_entrada(datos, self.servicio['cursos']) for datos in estudiantes]
+        except EntradaInvalida as e:
+            return self.responder({"error": str(e)}, 400)
+        resultados = await self.servicio['agrupador'].predecir_varias(entradas)
+        self.responder({"resultados": resultados})
+
+
+class ManejadorSalud(ManejadorBase):
+    def get(self):
+        agrupador = self.servicio['agrupador']
+        self.responder({
+            "estado": "ok",
+            "version": self.servicio['metadatos']['version'],
+            "cursos": self.servicio['cursos'],
+            "caracteristicas": self.servicio['predictor'].caracteristicas,
+            "lotes": agrupador.lotes,
+            "predicciones": agrupador.predicciones,
+        })
+
+
+def cargar_predictor(directorio=None, version=None):
+    """Predictor y metadatos de la versión pedida (o la más reciente) del registro de modelos"""
+    registro = RegistroModelos(directorio) if directorio else RegistroModelos()
+    versiones = registro.versiones()
+    if version:
+        versiones = [v for v in versiones if v['version'] == version]
+    if not versiones:
+        raise SystemExit("❌ No hay modelos en el registro: entrena uno desde la app primero")
+    predictor = registro.cargar(versiones[0])
+    if predictor is None:
+        raise SystemExit(f"❌ No se pudo cargar el modelo {versiones[0]['version']}")
+    return predictor, versiones[0]
+
+
+def crear_aplicacion(predictor, metadatos, espera_ms=ESPERA_LOTE_MS, max_lote=MAX_LOTE, hilos=HILOS_PREDICCION):
+    """Aplicación tornado con el predictor cargado una sola vez"""
+    servicio = {
+        'predictor': predictor,
+        'metadatos': metadatos,
+        'cursos': [c for c in predictor.caracteristicas if c not in ['Asistencia (%)', 'Progreso Académico (%)']],
+        'agrupador': AgrupadorLotes(predictor, espera_ms, max_lote, hilos),
+    }
+    return tornado.web.Application([
+        (r'/predict', ManejadorPrediccion, dict(servicio=servicio)),
+        (r'/predict/lote', ManejadorPrediccionLote, dict(servicio=servicio)),
+        (r'/salud', ManejadorSalud, dict(servicio=servicio)),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de predicción de riesgo")
+    parser.add_argument('--puerto', type=int, default=8600)
+    parser.add_argument('--direccion', default='127.0.0.1')
+    parser.add_argument('--registro', help="Directorio del registro de modelos")
+    parser.add_argument('--version', help="Versión del modelo (por defecto la más reciente)")
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos que atienden el puerto (0 = uno por CPU)")
+    parser.add_argument('--espera-ms', type=float, default=ESPERA_LOTE_MS)
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE)
+    parser.add_argument('--hilos', type=int, default=HILOS_PREDICCION)
+    args = parser.parse_args()
+
+    sockets = tornado.netutil.bind_sockets(args.puerto, args.direccion)
+    if args.procesos != 1:
+        # Cada proceso hijo carga el modelo por su cuenta (mapeado en memoria desde el registro)
+        tornado.process.fork_processes(args.procesos)
+
+    async def servir():
+        predictor, metadatos = cargar_predictor(args.registro, args.version)
+        servidor = tornado.httpserver.HTTPServer(
+            crear_aplicacion(predictor, metadatos, args.espera_ms, args.max_lote, args.hilos)
+        )
+        servidor.add_sockets(sockets)
+        print(f"✅ Modelo {metadatos['version']} sirviendo en http://{args.direccion}:{args.puerto}", flush=True)
+        await asyncio.Event().wait()
+
+    asyncio.run(servir())
+
+
+if __name__ == '__main__':
+    main()